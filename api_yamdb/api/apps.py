@@ -1,5 +1,11 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from api import autocomplete, checks, signals  # noqa: F401
+        post_migrate.connect(autocomplete.create_trigram_indexes,
+                             sender=apps.get_app_config('users'))
@@ -0,0 +1,218 @@
+"""Автодополнение для пользователей, категорий и жанров.
+
+Сначала выводятся совпадения по началу строки, затем, если места в
+ответе осталось, — похожие по триграммам (опечатки, пропущенные буквы).
+
+Категорий и жанров немного, поэтому они целиком держатся в памяти
+процесса в префиксном дереве и перестраиваются, когда меняется поколение
+их пространства имён в кэше API. Пользователей может быть миллионы: на
+PostgreSQL поиск идёт по GIN-индексу pg_trgm, на других СУБД — по
+диапазону уникального индекса username (с учётом регистра).
+"""
+import threading
+
+from django.db import connections, router
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from reviews.models import Category, Genre
+from users.models import User
+from .cache import CATEGORIES, GENRES, get_generation
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# Порог похожести, как pg_trgm.similarity_threshold по умолчанию.
+SIMILARITY_THRESHOLD = 0.3
+# Сколько кандидатов для нечёткого поиска просматривать без pg_trgm.
+FUZZY_CANDIDATES = 1000
+USERNAME_INDEX = 'users_user_username_trgm_idx'
+
+
+def trigrams(text):
+    """Триграммы слов строки по правилам pg_trgm."""
+    result = set()
+    for word in text.lower().split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(first, second):
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0
+    return len(first & second) / len(first | second)
+
+
+def merge(prefix_matches, fuzzy_matches, limit, key):
+    result = list(prefix_matches[:limit])
+    seen = {key(item) for item in result}
+    for item in fuzzy_matches:
+        if len(result) >= limit:
+            break
+        if key(item) not in seen:
+            seen.add(key(item))
+            result.append(item)
+    return result
+
+
+class PrefixTrie:
+    """Префиксное дерево: ключ — строка, значения копятся в узлах."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, value):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(value)
+
+    def values(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        result = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    result.extend(child)
+                else:
+                    stack.append(child)
+        return result
+
+
+class CatalogueIndex:
+    """Категории или жанры в памяти процесса для автодополнения."""
+
+    fields = ('name', 'slug')
+
+    def __init__(self, model, namespace):
+        self.model = model
+        self.namespace = namespace
+        self.generation = None
+        self.items = []
+        self.trie = PrefixTrie()
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        generation = get_generation(self.namespace)
+        if generation == self.generation:
+            return
+        with self.lock:
+            if generation == self.generation:
+                return
+            items = list(self.model.objects.order_by('name')
+                         .values(*self.fields))
+            trie = PrefixTrie()
+            for position, item in enumerate(items):
+                keys = {item['name'].lower(), item['slug'].lower(),
+                        *item['name'].lower().split()}
+                for key in keys:
+                    trie.insert(key, position)
+            self.items, self.trie = items, trie
+            self.generation = generation
+
+    def complete(self, text, limit=DEFAULT_LIMIT):
+        self.refresh()
+        items, text = self.items, text.lower()
+        positions = sorted(set(self.trie.values(text)))
+        prefix_matches = [items[position] for position in positions]
+        if len(prefix_matches) >= limit:
+            return prefix_matches[:limit]
+        scored = ((similarity(text, item['name']), item) for item in items)
+        fuzzy_matches = [item for score, item in sorted(
+            scored, key=lambda pair: -pair[0])
+            if score >= SIMILARITY_THRESHOLD]
+        return merge(prefix_matches, fuzzy_matches, limit,
+                     key=lambda item: item['slug'])
+
+
+catalogue_indexes = {
+    Category: CatalogueIndex(Category, CATEGORIES),
+    Genre: CatalogueIndex(Genre, GENRES),
+}
+
+
+def complete_catalogue(queryset, text, limit=DEFAULT_LIMIT):
+    """Категории или жанры из индекса в памяти процесса."""
+    return catalogue_indexes[queryset.model].complete(text, limit)
+
+
+def uses_trigrams(model):
+    return connections[router.db_for_read(model)].vendor == 'postgresql'
+
+
+def create_trigram_indexes(using='default', **kwargs):
+    """Расширение pg_trgm и GIN-индекс по username; вызывается после migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {USERNAME_INDEX} '
+            f'ON {quote(User._meta.db_table)} '
+            f'USING gin ({quote("username")} gin_trgm_ops)')
+
+
+def escape_like(text):
+    return (text.replace('\\', '\\\\').replace('%', '\\%')
+            .replace('_', '\\_'))
+
+
+def complete_users_trigram(queryset, text, limit):
+    # По одной-двум буквам триграммный индекс почти ничего не отсекает:
+    # такие префиксы ищутся по индексу username_like (с учётом регистра),
+    # который Django создаёт для уникального поля.
+    if len(text) < 3:
+        return list(queryset.filter(
+            username__startswith=text).order_by('username')[:limit])
+    quote = connections[queryset.db].ops.quote_name
+    column = f'{quote(User._meta.db_table)}.{quote("username")}'
+    prefix_matches = list(queryset.annotate(
+        username_prefix=RawSQL(f'{column} ILIKE %s',
+                               (escape_like(text) + '%',),
+                               output_field=BooleanField()),
+    ).filter(username_prefix=True).order_by('username')[:limit])
+    if len(prefix_matches) >= limit:
+        return prefix_matches
+    fuzzy_matches = queryset.annotate(
+        username_similar=RawSQL(f'{column} %% %s', (text,),
+                                output_field=BooleanField()),
+        username_similarity=RawSQL(f'similarity({column}, %s)', (text,),
+                                   output_field=FloatField()),
+    ).filter(username_similar=True).order_by(
+        '-username_similarity', 'username')[:limit]
+    return merge(prefix_matches, fuzzy_matches, limit,
+                 key=lambda user: user.pk)
+
+
+def complete_users_range(queryset, text, limit):
+    prefix_matches = list(queryset.filter(
+        username__gte=text, username__lt=text + chr(0x10FFFF)
+    ).order_by('username')[:limit])
+    if len(prefix_matches) >= limit or len(text) < 2:
+        return prefix_matches
+    candidates = queryset.filter(
+        username__gte=text[:2], username__lt=text[:2] + chr(0x10FFFF)
+    ).order_by('username')[:FUZZY_CANDIDATES]
+    scored = [(similarity(text, user.username), user) for user in candidates]
+    fuzzy_matches = [user for score, user in sorted(
+        scored, key=lambda pair: (-pair[0], pair[1].username))
+        if score >= SIMILARITY_THRESHOLD]
+    return merge(prefix_matches, fuzzy_matches, limit,
+                 key=lambda user: user.pk)
+
+
+def complete_users(queryset, text, limit=DEFAULT_LIMIT):
+    """Пользователи, чьё имя начинается с text или похоже на него."""
+    if uses_trigrams(queryset.model):
+        return complete_users_trigram(queryset, text, limit)
+    return complete_users_range(queryset, text, limit)
@@ -0,0 +1,261 @@
+"""Нагрузочный замер API по сценариям и отчёт в JSON.
+
+Сценарий — детерминированный список запросов, построенный по данным в
+базе и seed генератора, поэтому на одних данных разные коммиты получают
+одинаковую нагрузку. Запросы выполняются тестовым клиентом Django в
+этом же процессе или по HTTP к локально запущенному gunicorn. Число
+запросов к БД берётся из заголовка Server-Timing (см. api.metrics).
+"""
+import json
+import platform
+import re
+import subprocess
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Genre, Review, Title
+from users.authentication import UserClaimsAccessToken
+from users.models import User
+from .metrics import quantile
+
+PREFIX = 'bench_api'
+Call = namedtuple('Call', 'method path data token')
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Dataset:
+    """Id и слаги, по которым строятся запросы сценариев."""
+
+    def __init__(self):
+        self.titles = list(Title.objects.order_by('pk')
+                           .values_list('pk', flat=True))
+        self.categories = list(Category.objects.order_by('slug')
+                               .values_list('slug', flat=True))
+        self.genres = list(Genre.objects.order_by('slug')
+                           .values_list('slug', flat=True))
+        self.years = sorted(set(Title.objects.exclude(year=None)
+                                .values_list('year', flat=True)))
+        self.reviews = list(Review.objects.order_by('pk')
+                            .values_list('title_id', 'pk')[:10000])
+        self.admin_token = None
+        self.posters = []
+
+    def prepare_users(self, count):
+        """Администратор и count новых пользователей для публикации отзывов.
+
+        Пользователи предыдущего прогона удаляются вместе с отзывами.
+        """
+        cleanup()
+        admin = User.objects.create(username=f'{PREFIX}_admin',
+                                    email=f'{PREFIX}_admin@yamdb.fake',
+                                    role=User.ADMIN)
+        self.admin_token = token(admin)
+        User.objects.bulk_create(
+            User(username=f'{PREFIX}_{i}', email=f'{PREFIX}_{i}@yamdb.fake')
+            for i in range(count))
+        self.posters = [token(user) for user in User.objects.filter(
+            username__startswith=f'{PREFIX}_').exclude(
+            role=User.ADMIN).order_by('pk')]
+
+
+def token(user):
+    return str(UserClaimsAccessToken.for_user(user))
+
+
+def cleanup():
+    User.objects.filter(username__startswith=f'{PREFIX}_').delete()
+
+
+def browse_titles(rng, data, count):
+    """Аноним листает произведения с фильтрами и открывает карточки."""
+    filters = [lambda: '',
+               lambda: f'category={rng.choice(data.categories)}',
+               lambda: f'genre={rng.choice(data.genres)}',
+               lambda: f'year={rng.choice(data.years)}',
+               lambda: f'offset={rng.randrange(0, 100, 10)}']
+    calls = []
+    for _ in range(count):
+        if rng.random() < 0.3:
+            path = f'/api/v1/titles/{rng.choice(data.titles)}/'
+        else:
+            query = '&'.join(part for part in (
+                rng.choice(filters)(), rng.choice(filters)()) if part)
+            path = f'/api/v1/titles/?{query}'
+        calls.append(Call('GET', path, None, None))
+    return calls
+
+
+def read_threads(rng, data, count):
+    """Чтение отзывов на произведение и комментариев к отзыву."""
+    calls = []
+    for _ in range(count):
+        title_id, review_id = rng.choice(data.reviews)
+        if rng.random() < 0.5:
+            path = f'/api/v1/titles/{title_id}/reviews/?cursor='
+        else:
+            path = (f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+                    'comments/?cursor=')
+        calls.append(Call('GET', path, None, None))
+    return calls
+
+
+def post_reviews(rng, data, count):
+    """Авторизованные пользователи публикуют отзывы, каждый — один."""
+    return [Call('POST', f'/api/v1/titles/{rng.choice(data.titles)}/reviews/',
+                 {'text': 'Отзыв для замера', 'score': rng.randint(1, 10)},
+                 poster)
+            for poster in data.posters[:count]]
+
+
+def list_users(rng, data, count):
+    """Администратор листает список пользователей."""
+    return [Call('GET', f'/api/v1/users/?offset={rng.randrange(0, 100, 10)}',
+                 None, data.admin_token)
+            for _ in range(count)]
+
+
+SCENARIOS = {
+    'browse': browse_titles,
+    'threads': read_threads,
+    'post_review': post_reviews,
+    'admin_users': list_users,
+}
+
+
+def queries_from(header):
+    match = _QUERIES.search(header or '')
+    return int(match.group(1)) if match else None
+
+
+class ClientRunner:
+    """Запросы тестовым клиентом Django в этом же процессе."""
+
+    name = 'client'
+
+    def __init__(self):
+        self.client = APIClient()
+
+    def send(self, call):
+        headers = {}
+        if call.token:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {call.token}'
+        response = self.client.generic(
+            call.method, call.path,
+            json.dumps(call.data) if call.data is not None else '',
+            content_type='application/json', **headers)
+        return response.status_code, queries_from(
+            response.get('Server-Timing'))
+
+
+class HttpRunner:
+    """Запросы по HTTP к запущенному серверу, например gunicorn."""
+
+    name = 'http'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def send(self, call):
+        headers = {}
+        if call.token:
+            headers['Authorization'] = f'Bearer {call.token}'
+        response = self.session.request(
+            call.method, self.base_url + call.path, json=call.data,
+            headers=headers)
+        return response.status_code, queries_from(
+            response.headers.get('Server-Timing'))
+
+
+def run_scenario(runner, calls, concurrency=1, warmup=0):
+    """Выполняет запросы (первые warmup не учитываются) и сводит итоги."""
+    for call in calls[:warmup]:
+        runner.send(call)
+    calls = calls[warmup:]
+
+    def timed(call):
+        started = time.perf_counter()
+        status, queries = runner.send(call)
+        return (time.perf_counter() - started) * 1000, status, queries
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(timed, calls))
+    else:
+        results = [timed(call) for call in calls]
+    return summarize(results, time.perf_counter() - started)
+
+
+def summarize(results, elapsed):
+    """Итоги по списку (мс, статус, запросов к БД или None)."""
+    timings = sorted(duration for duration, _, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    statuses = Counter(status for _, status, _ in results)
+    return {
+        'requests': len(results),
+        'errors': sum(number for status, number in statuses.items()
+                      if status >= 400),
+        'statuses': {str(status): number
+                     for status, number in sorted(statuses.items())},
+        'throughput_rps': (round(len(results) / elapsed, 2)
+                           if elapsed else None),
+        'latency_ms': {
+            'mean': round(sum(timings) / len(timings), 3),
+            'p50': round(quantile(timings, 0.5), 3),
+            'p95': round(quantile(timings, 0.95), 3),
+            'p99': round(quantile(timings, 0.99), 3),
+            'max': round(timings[-1], 3),
+        } if timings else None,
+        'queries_per_request': (round(sum(queries) / len(queries), 2)
+                                if queries else None),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(runner, concurrency, options, results):
+    return {
+        'commit': git_commit(),
+        'created': timezone.now().isoformat(),
+        'runner': runner.name,
+        'concurrency': concurrency,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'options': options,
+        'scenarios': results,
+    }
+
+
+def compare(previous, current):
+    """Строки с изменением p50, p95 и пропускной способности в процентах."""
+    lines = []
+    for name, result in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if not before or not before['latency_ms'] or not result['latency_ms']:
+            continue
+        changes = []
+        for label, old, new in (
+                ('p50', before['latency_ms']['p50'],
+                 result['latency_ms']['p50']),
+                ('p95', before['latency_ms']['p95'],
+                 result['latency_ms']['p95']),
+                ('rps', before['throughput_rps'], result['throughput_rps'])):
+            if old and new:
+                changes.append(f'{label} {old:g} → {new:g} '
+                               f'({(new - old) / old * 100:+.1f}%)')
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
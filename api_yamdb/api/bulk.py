@@ -0,0 +1,231 @@
+"""Пакетная запись категорий, жанров и произведений.
+
+Каждый элемент списка проверяется отдельно, ошибки возвращаются с его
+номером, а корректные элементы записываются в одной транзакции: слаги
+и существующие объекты читаются одним запросом на пачку, строки
+вставляются bulk_create, обновляются bulk_update, жанры произведений
+пишутся напрямую в промежуточную таблицу. Сигналы моделей при этом не
+отправляются, поэтому в конце отправляется catalogue_changed.
+"""
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+
+from reviews.importer import batched
+from reviews.models import Category, Genre, GenreTitle, Title, TitleStats
+from reviews.signals import catalogue_changed
+
+CREATED = 'created'
+UPDATED = 'updated'
+
+
+class BulkResult:
+    """Результаты и ошибки по номерам элементов запроса."""
+
+    def __init__(self):
+        self.results = []
+        self.errors = []
+
+    def ok(self, index, status, **fields):
+        self.results.append({'index': index, 'status': status, **fields})
+
+    def error(self, index, errors):
+        self.errors.append({'index': index, 'errors': errors})
+
+    def as_dict(self):
+        def index(item):
+            return item['index']
+        return {'results': sorted(self.results, key=index),
+                'errors': sorted(self.errors, key=index)}
+
+
+def validate_items(serializer_class, payload, result, partial_key=None):
+    """Проверяет элементы по отдельности; возвращает [(номер, данные)].
+
+    Если у элемента есть partial_key (например, id), он проверяется как
+    частичное обновление.
+    """
+    valid = []
+    for index, item in enumerate(payload):
+        if not isinstance(item, dict):
+            result.error(index, {'non_field_errors': ['Ожидается объект']})
+            continue
+        serializer = serializer_class(
+            data=item, partial=partial_key is not None and partial_key in item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            result.error(index, serializer.errors)
+    return valid
+
+
+def unique_items(items, result, *keys):
+    """Отбрасывает элементы, повторяющие значение ключа в одном запросе."""
+    seen = {key: {} for key in keys}
+    unique = []
+    for index, data in items:
+        errors = {}
+        for key in keys:
+            if key not in data:
+                continue
+            if data[key] in seen[key]:
+                errors[key] = [f'Повторяет элемент {seen[key][data[key]]}']
+            else:
+                seen[key][data[key]] = index
+        if errors:
+            result.error(index, errors)
+        else:
+            unique.append((index, data))
+    return unique
+
+
+def upsert_by_slug(model, items, result, batch_size):
+    """Создаёт или обновляет категории/жанры по слагу."""
+    items = unique_items(items, result, 'slug', 'name')
+    with transaction.atomic():
+        for batch in batched(items, batch_size):
+            slugs = [data['slug'] for _, data in batch]
+            names = [data['name'] for _, data in batch]
+            known = list(model.objects.filter(
+                Q(slug__in=slugs) | Q(name__in=names)))
+            by_slug = {obj.slug: obj for obj in known}
+            by_name = {obj.name: obj for obj in known}
+            to_create, to_update = [], []
+            for index, data in batch:
+                obj = by_slug.get(data['slug'])
+                owner = by_name.get(data['name'])
+                if owner is not None and owner is not obj:
+                    result.error(index, {'name': [
+                        f'Название уже занято слагом {owner.slug}']})
+                    continue
+                if obj is None:
+                    to_create.append((index, model(**data)))
+                else:
+                    obj.name = data['name']
+                    to_update.append(obj)
+                    result.ok(index, UPDATED, slug=data['slug'])
+            insert_by_slug(model, to_create, result)
+            model.objects.bulk_update(to_update, ['name'])
+    if result.results:
+        # Категории и жанры не индексируются поиском.
+        catalogue_changed.send(sender=model, documents={})
+
+
+def insert_by_slug(model, created, result):
+    """Вставляет [(номер, объект)] и записывает результаты элементов.
+
+    Если параллельный запрос успел вставить тот же слаг или название
+    после чтения пачки, строки вставляются по одной, а конфликтующие
+    становятся ошибками своих элементов.
+    """
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([obj for _, obj in created])
+    except IntegrityError:
+        for index, obj in created:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([obj])
+            except IntegrityError:
+                result.error(index, {'slug': [
+                    'Слаг или название уже заняты другим запросом']})
+            else:
+                result.ok(index, CREATED, slug=obj.slug)
+        return
+    for index, obj in created:
+        result.ok(index, CREATED, slug=obj.slug)
+
+
+def resolve_slugs(model, slugs):
+    return dict(model.objects.filter(slug__in=set(slugs))
+                .values_list('slug', 'pk'))
+
+
+def create_titles(titles):
+    """Вставляет произведения со строками статистики; у объектов есть pk."""
+    connection = connections[Title.objects.db]
+    if not connection.features.can_return_ids_from_bulk_insert:
+        # SQLite не возвращает id из пакетной вставки.
+        for title in titles:
+            title.save()
+        return
+    Title.objects.bulk_create(titles)
+    TitleStats.objects.bulk_create(TitleStats(title=title)
+                                   for title in titles)
+
+
+def prepare_title(data, categories, genres, existing):
+    """Произведение с применёнными полями элемента или словарь ошибок.
+
+    Возвращает (произведение, изменённые поля, id жанров или None, ошибки).
+    """
+    data = dict(data)
+    errors = {}
+    if 'category' in data:
+        slug = data.pop('category')
+        data['category_id'] = categories.get(slug) if slug else None
+        if slug and data['category_id'] is None:
+            errors['category'] = [f'Категория {slug} не найдена']
+    genre_slugs = data.pop('genre', None)
+    missing = [slug for slug in genre_slugs or () if slug not in genres]
+    if missing:
+        errors['genre'] = [f'Жанры не найдены: {", ".join(missing)}']
+    pk = data.pop('id', None)
+    title = Title() if pk is None else existing.get(pk)
+    if title is None:
+        errors['id'] = [f'Произведение {pk} не найдено']
+    if errors:
+        return None, (), None, errors
+    for name, value in data.items():
+        setattr(title, name, value)
+    fields = ['category' if name == 'category_id' else name for name in data]
+    genre_ids = (None if genre_slugs is None
+                 else list(dict.fromkeys(genres[slug]
+                                         for slug in genre_slugs)))
+    return title, fields, genre_ids, None
+
+
+def upsert_titles(items, result, batch_size):
+    """Создаёт произведения без id и обновляет произведения с id."""
+    items = unique_items(items, result, 'id')
+    written = []
+    with transaction.atomic():
+        for batch in batched(items, batch_size):
+            categories = resolve_slugs(Category, (
+                data['category'] for _, data in batch
+                if data.get('category')))
+            genres = resolve_slugs(Genre, (
+                slug for _, data in batch for slug in data.get('genre', ())))
+            existing = Title.objects.in_bulk(
+                [data['id'] for _, data in batch if 'id' in data])
+            to_create, to_update, update_fields, genre_rows = [], [], set(), []
+            created = []
+            for index, data in batch:
+                title, fields, genre_ids, errors = prepare_title(
+                    data, categories, genres, existing)
+                if errors:
+                    result.error(index, errors)
+                    continue
+                if title.pk is None:
+                    to_create.append(title)
+                    created.append((index, title))
+                else:
+                    to_update.append(title)
+                    update_fields.update(fields)
+                    result.ok(index, UPDATED, id=title.pk)
+                if genre_ids is not None:
+                    genre_rows.append((title, genre_ids))
+            create_titles(to_create)
+            for index, title in created:
+                result.ok(index, CREATED, id=title.pk)
+            if update_fields:
+                Title.objects.bulk_update(to_update, update_fields)
+            created_pks = {title.pk for title in to_create}
+            GenreTitle.objects.filter(title__in=[
+                title.pk for title, _ in genre_rows
+                if title.pk not in created_pks]).delete()
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title_id=title.pk, genre_id=genre_id)
+                for title, genre_ids in genre_rows for genre_id in genre_ids)
+            written += [title.pk for title in to_create + to_update]
+    if written:
+        catalogue_changed.send(sender=Title, documents={Title: written})
@@ -0,0 +1,169 @@
+"""Кэш ответов для публичных справочников (категории, жанры, произведения).
+
+Ключ ответа строится по полному адресу запроса (фильтры, limit/offset),
+а рядом с данными хранится поколение пространства имён, для которого они
+получены. При изменении данных поколение увеличивается, и старые ответы
+перестают отдаваться без перебора ключей в кэше — они перезаписываются
+или вытесняются по таймауту. Поколение и ответ читаются одним get_many.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from api_yamdb.db import router
+
+CATEGORIES = 'categories'
+GENRES = 'genres'
+TITLES = 'titles'
+USERS = 'users'
+NAMESPACES = (CATEGORIES, GENRES, TITLES, USERS)
+REPLICA_LAG_KEY = 'api:replica_lag'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        hits, misses = _stats['hit'], _stats['miss']
+    total = hits + misses
+    return {'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None}
+
+
+def generation_key(namespace):
+    return f'api:generation:{namespace}'
+
+
+def modified_key(namespace):
+    return f'api:modified:{namespace}'
+
+
+def reviews_namespace(title_id):
+    return f'reviews:{title_id}'
+
+
+def comments_namespace(review_id):
+    return f'comments:{review_id}'
+
+
+def get_generation(namespace):
+    key = generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # Начальное значение берётся от времени, чтобы после вытеснения
+        # счётчика не совпасть с поколением уже закэшированных ответов.
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_versions(namespaces):
+    """Поколения и время последнего изменения для набора пространств имён.
+
+    Все значения читаются одним запросом к кэшу; отсутствующие создаются.
+    """
+    keys = [generation_key(namespace) for namespace in namespaces]
+    keys += [modified_key(namespace) for namespace in namespaces]
+    values = cache.get_many(keys)
+    generations = []
+    modified = []
+    for namespace in namespaces:
+        generation = values.get(generation_key(namespace))
+        if generation is None:
+            generation = get_generation(namespace)
+        timestamp = values.get(modified_key(namespace))
+        if timestamp is None:
+            timestamp = int(time.time())
+            cache.add(modified_key(namespace), timestamp, None)
+        generations.append(generation)
+        modified.append(timestamp)
+    return generations, max(modified)
+
+
+def invalidate(*namespaces):
+    now = int(time.time())
+    for namespace in namespaces or NAMESPACES:
+        try:
+            cache.incr(generation_key(namespace))
+        except ValueError:
+            get_generation(namespace)
+        cache.set(modified_key(namespace), now, None)
+    if settings.READ_REPLICAS:
+        cache.set(REPLICA_LAG_KEY, True, settings.REPLICA_PIN_SECONDS)
+
+
+def replica_may_lag():
+    """Запрос читает с реплики, а данные менялись за последние
+    REPLICA_PIN_SECONDS секунд (это время должно быть больше отставания
+    реплик).
+
+    Такой ответ может быть старым, но его версия (поколение) уже новая:
+    его нельзя ни кэшировать, ни помечать ETag.
+    """
+    return (router.replica() is not None
+            and cache.get(REPLICA_LAG_KEY) is not None)
+
+
+def response_key(namespace, request):
+    url = request.build_absolute_uri()
+    digest = hashlib.md5(url.encode('utf-8')).hexdigest()
+    return f'api:response:{namespace}:{digest}'
+
+
+def is_current(namespace, generation):
+    """Поколение не сменилось, а ответ не прочитан с отстающей реплики
+    (см. replica_may_lag); оба значения читаются одним запросом к кэшу."""
+    values = cache.get_many([generation_key(namespace), REPLICA_LAG_KEY])
+    if values.get(generation_key(namespace)) != generation:
+        return False
+    return router.replica() is None or REPLICA_LAG_KEY not in values
+
+
+class CachedResponseMixin:
+    """Кэширует ответы list/retrieve вьюсета для безопасных методов.
+
+    Кэшируются данные сериализатора, а не отрендеренный ответ, поэтому
+    один и тот же ключ подходит для любого рендерера.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve,
+                                    request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        namespace = self.cache_namespace
+        key = response_key(namespace, request)
+        values = cache.get_many([generation_key(namespace), key])
+        generation = values.get(generation_key(namespace))
+        if generation is None:
+            generation = get_generation(namespace)
+        cached = values.get(key)
+        if cached is not None and cached[0] == generation:
+            count('hit')
+            return Response(cached[1], headers={'X-Cache': 'HIT'})
+        count('miss')
+        response = handler(request, *args, **kwargs)
+        # Поколение сменилось во время запроса — ответ мог прочитать
+        # строки до изменения (например, с отстающей реплики).
+        if response.status_code == 200 and is_current(namespace, generation):
+            cache.set(key, (generation, response.data),
+                      settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Поколения кэша API и закрепления за основной БД должны быть видны
+    всем процессам: web, воркерам gunicorn и командам manage.py."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend != LOCAL_CACHE:
+        return []
+    return [Error(
+        f'Кэш {backend} не общий для процессов: изменения из команд и '
+        f'других воркеров не сбросят кэш ответов API.',
+        hint='Задайте CACHE_BACKEND, например '
+             'django.core.cache.backends.memcached.MemcachedCache.',
+        id='api.E001')]
@@ -0,0 +1,53 @@
+"""Условные GET-запросы: ETag и Last-Modified по счётчикам версий.
+
+Валидаторы строятся из поколений пространств имён кэша (см. api.cache),
+а не из отрендеренного тела, поэтому ответ 304 отдаётся до обращения к
+базе данных и сериализации.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_versions, replica_may_lag
+
+
+def make_validators(namespaces, request):
+    generations, last_modified = get_versions(namespaces)
+    source = '|'.join([request.get_full_path(),
+                       request.accepted_renderer.format,
+                       *map(str, generations)])
+    etag = quote_etag(hashlib.md5(source.encode('utf-8')).hexdigest())
+    return etag, last_modified
+
+
+class ConditionalGetMixin:
+    """Добавляет ETag/Last-Modified к list/retrieve и отвечает 304."""
+
+    def get_version_namespaces(self):
+        return (self.cache_namespace,)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list,
+                                         request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve,
+                                         request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = make_validators(
+            self.get_version_namespaces(), request)
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        # Если данные поменялись во время запроса, прочитанное может быть
+        # старше новой версии: такой ответ ETag не получает.
+        if (response.status_code == 200 and not replica_may_lag()
+                and make_validators(self.get_version_namespaces(),
+                                    request)[0] == etag):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,134 @@
+"""Быстрый read-only путь сериализации для списков.
+
+Сериализатор DRF один раз «компилируется» в набор функций, которые
+собирают ответ прямо из словарей values(): без создания экземпляров
+моделей и без обхода полей сериализатора на каждый объект. Для
+форматирования значений используются to_representation тех же полей
+DRF, поэтому результат совпадает с обычным сериализатором байт в байт.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import relations, serializers
+
+
+def _scalar(key, to_representation):
+    def get(row, related):
+        value = row[key]
+        return None if value is None else to_representation(value)
+    return get
+
+
+def _raw(key):
+    def get(row, related):
+        return row[key]
+    return get
+
+
+def _nested(key, compiled):
+    def get(row, related):
+        if row[key] is None:
+            return None
+        return compiled.build(row, related)
+    return get
+
+
+def _many(name, pk_key):
+    def get(row, related):
+        return related[name].get(row[pk_key], [])
+    return get
+
+
+class CompiledSerializer:
+    """Набор функций, повторяющих вывод сериализатора DRF по строкам."""
+
+    def __init__(self, serializer, prefix='', fields=None):
+        self.model = serializer.Meta.model
+        self.pk_key = prefix + self.model._meta.pk.attname
+        self.columns = [self.pk_key]
+        self.getters = []
+        self.many = {}
+        for name, field in serializer.fields.items():
+            if fields and name not in fields:
+                continue
+            self.getters.append((name, self.compile_field(field, prefix)))
+
+    def compile_field(self, field, prefix):
+        if '.' in field.source or field.source == '*':
+            raise ImproperlyConfigured(
+                f'Поле {field.field_name} нельзя скомпилировать')
+        key = prefix + field.source
+        if isinstance(field, serializers.ListSerializer):
+            self.many[field.field_name] = (
+                self.model._meta.get_field(field.source),
+                CompiledSerializer(field.child))
+            return _many(field.field_name, self.pk_key)
+        if isinstance(field, serializers.BaseSerializer):
+            nested = CompiledSerializer(field, prefix=f'{key}__')
+            self.columns += [key] + nested.columns
+            return _nested(key, nested)
+        if isinstance(field, relations.SlugRelatedField):
+            self.columns.append(f'{key}__{field.slug_field}')
+            return _raw(f'{key}__{field.slug_field}')
+        if isinstance(field, relations.PrimaryKeyRelatedField):
+            self.columns.append(key)
+            return _raw(key)
+        if isinstance(field, relations.RelatedField):
+            raise ImproperlyConfigured(
+                f'Поле {field.field_name} нельзя скомпилировать')
+        self.columns.append(key)
+        return _scalar(key, field.to_representation)
+
+    def rows(self, queryset, extra_columns=()):
+        """Queryset словарей с колонками, нужными для вывода.
+
+        extra_columns — колонки, которые нужны не для вывода, а, например,
+        пагинации по ключу.
+        """
+        columns = self.columns + [column for column in extra_columns
+                                  if column not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def fetch_many(self, model_field, compiled, pks):
+        """Объекты many-to-many одним запросом через промежуточную таблицу.
+
+        Порядок внутри списка тот же, что даёт prefetch_related: по
+        ordering связанной модели.
+        """
+        through = model_field.remote_field.through
+        source = model_field.m2m_field_name()
+        target = model_field.m2m_reverse_field_name()
+        ordering = [f'-{target}__{name[1:]}' if name.startswith('-')
+                    else f'{target}__{name}'
+                    for name in compiled.model._meta.ordering]
+        columns = [f'{target}__{column}' for column in compiled.columns]
+        rows = (through._base_manager
+                .filter(**{f'{source}__in': pks})
+                .order_by(*ordering)
+                .values(f'{source}_id', *columns))
+        result = {}
+        prefix = f'{target}__'
+        for row in rows:
+            item = {key[len(prefix):]: value for key, value in row.items()
+                    if key.startswith(prefix)}
+            result.setdefault(row[f'{source}_id'], []).append(
+                compiled.build(item, {}))
+        return result
+
+    def build(self, row, related):
+        return {name: get(row, related) for name, get in self.getters}
+
+    def serialize(self, rows):
+        rows = list(rows)
+        related = {}
+        if self.many and rows:
+            pks = [row[self.pk_key] for row in rows]
+            for name, (model_field, compiled) in self.many.items():
+                related[name] = self.fetch_many(model_field, compiled, pks)
+        return [self.build(row, related) for row in rows]
+
+
+@lru_cache(maxsize=128)
+def compile_serializer(serializer_class, fields=None):
+    """Компилирует сериализатор для набора полей (None — все поля)."""
+    return CompiledSerializer(serializer_class(), fields=fields)
@@ -0,0 +1,15 @@
+from rest_framework.filters import BaseFilterBackend
+
+from reviews.search import search
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по ?q= с сортировкой по рангу."""
+
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search(queryset, text)
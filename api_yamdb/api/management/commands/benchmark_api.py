@@ -0,0 +1,117 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from api.benchmark import (SCENARIOS, ClientRunner, Dataset, HttpRunner,
+                           cleanup, compare, make_report, run_scenario)
+from reviews.importer import IMPORT_SPECS, Importer
+from reviews.models import Title
+from reviews.seed import WORDS, fixture_words, seed_catalogue
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер API по сценариям: пропускная способность, '
+            'задержки и запросы к БД; отчёт сохраняется в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, metavar='N',
+                            help='Предварительно создать N отзывов')
+        parser.add_argument('--from-csv', action='store_true',
+                            help='Загрузить csv из static/data (если база '
+                                 'пуста) и брать слова для текстов из них')
+        parser.add_argument('--random-seed', type=int, default=0,
+                            help='Seed генератора данных и запросов')
+        parser.add_argument('--scenario', action='append',
+                            choices=sorted(SCENARIOS),
+                            help='Выполнить только указанные сценарии')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов в каждом сценарии')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Неучитываемых запросов в начале сценария')
+        parser.add_argument('--url',
+                            help='Адрес запущенного сервера, например '
+                                 'http://127.0.0.1:8000; без него запросы '
+                                 'выполняет тестовый клиент')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Параллельных запросов (только с --url)')
+        parser.add_argument('--output',
+                            help='Файл отчёта; по умолчанию '
+                                 'benchmark-<коммит>.json')
+        parser.add_argument('--compare', metavar='FILE',
+                            help='Сравнить с отчётом предыдущего прогона')
+
+    def handle(self, *args, **options):
+        words = WORDS
+        if options['from_csv']:
+            words = fixture_words()
+            if not Title.objects.exists():
+                Importer(report=self.stdout.write).run(IMPORT_SPECS)
+        if options['seed']:
+            created = seed_catalogue(options['seed'],
+                                     seed=options['random_seed'],
+                                     words=words)
+            self.stdout.write(f'Создано: {created}')
+        if not Title.objects.exists():
+            raise CommandError('В базе нет произведений: используйте '
+                               '--seed или --from-csv')
+        if options['url']:
+            runner, concurrency = HttpRunner(options['url']), max(
+                1, options['concurrency'])
+        else:
+            runner, concurrency = ClientRunner(), 1
+        scenarios = options['scenario'] or list(SCENARIOS)
+        total = options['requests'] + options['warmup']
+        data = Dataset()
+        if options['url']:
+            data.prepare_users(total)
+            try:
+                results = self.run_all(runner, concurrency, scenarios, data,
+                                       options)
+            finally:
+                cleanup()
+        else:
+            # Всё, что создали сценарии, откатывается вместе с транзакцией;
+            # число запросов к БД берётся из Server-Timing каждого ответа.
+            with transaction.atomic(), override_settings(
+                    PERF_SAMPLE_RATE=1, PERF_PUBLIC_TIMING=True):
+                data.prepare_users(total)
+                results = self.run_all(runner, concurrency, scenarios, data,
+                                       options)
+                transaction.set_rollback(True)
+        report = make_report(runner, concurrency, {
+            key: options[key] for key in ('seed', 'from_csv', 'random_seed',
+                                          'requests', 'warmup')}, results)
+        output = options['output'] or (
+            f'benchmark-{(report["commit"] or "local")[:8]}.json')
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Отчёт: {output}'))
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                previous = json.load(file)
+            for line in compare(previous, report):
+                self.stdout.write(line)
+
+    def run_all(self, runner, concurrency, scenarios, data, options):
+        self.stdout.write(f'{"сценарий":<14}{"N":>6}{"ошибок":>8}'
+                          f'{"RPS":>9}{"p50, мс":>10}{"p95, мс":>10}'
+                          f'{"p99, мс":>10}{"SQL":>6}')
+        results = {}
+        for name in scenarios:
+            rng = random.Random(options['random_seed'])
+            calls = SCENARIOS[name](
+                rng, data, options['requests'] + options['warmup'])
+            result = results[name] = run_scenario(
+                runner, calls, concurrency, options['warmup'])
+            latency = result['latency_ms'] or {}
+            self.stdout.write(
+                f'{name:<14}{result["requests"]:>6}{result["errors"]:>8}'
+                f'{result["throughput_rps"] or 0:>9.1f}'
+                f'{latency.get("p50", 0):>10.2f}'
+                f'{latency.get("p95", 0):>10.2f}'
+                f'{latency.get("p99", 0):>10.2f}'
+                f'{result["queries_per_request"] or 0:>6.1f}')
+        return results
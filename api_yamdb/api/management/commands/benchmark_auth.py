@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+
+SIGNUP = '/api/v1/auth/signup/'
+TOKEN = '/api/v1/auth/token/'
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер регистрации и получения токена: запросы '
+            'к БД и время ответа (данные создаются и откатываются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signups', type=int, default=500,
+                            help='Сколько новых пользователей '
+                                 'зарегистрировать')
+
+    def handle(self, *args, **options):
+        client = Client()
+        users = [(f'bench_auth_{i}', f'bench_auth_{i}@yamdb.fake')
+                 for i in range(options['signups'])]
+        self.stdout.write(f'{"сценарий":<16}{"N":>6}{"запросов":>10}'
+                          f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}')
+        with transaction.atomic():
+            self.run('регистрация', users, lambda username, email:
+                     client.post(SIGNUP, {'username': username,
+                                          'email': email}))
+            self.run('повторный код', users, lambda username, email:
+                     client.post(SIGNUP, {'username': username,
+                                          'email': email}))
+            codes = {user.username: default_token_generator.make_token(user)
+                     for user in User.objects.filter(
+                         username__startswith='bench_auth_')}
+            self.run('токен', users, lambda username, email:
+                     client.post(TOKEN, {'username': username,
+                                         'confirmation_code':
+                                         codes[username]}),
+                     status=201)
+            transaction.set_rollback(True)
+
+    def run(self, name, users, request, status=200):
+        timings = []
+        queries = 0
+        for username, email in users:
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(username, email)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != status:
+                raise CommandError(
+                    f'{name}: ответ {response.status_code} '
+                    f'{response.content[:200]!r}')
+            queries += sum(1 for query in captured.captured_queries
+                           if 'SAVEPOINT' not in query['sql'])
+        self.stdout.write(
+            f'{name:<16}{len(users):>6}{queries / len(users):>10.1f}'
+            f'{statistics.median(timings):>10.2f}'
+            f'{percentile(timings, 0.95):>10.2f}'
+            f'{percentile(timings, 0.99):>10.2f}')
@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.benchmark import git_commit
+from api.serving import CONNECTION_MODES, call_wsgi, compare_connections
+from api_yamdb.db.pool import PooledDatabaseMixin
+
+
+class Command(BaseCommand):
+    help = ('Сравнение соединений с БД на коротких запросах: новое на '
+            'каждый ответ, постоянное на поток и общий пул')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append',
+                            help='Адрес запроса (можно несколько); по '
+                                 'умолчанию /api/v1/categories/')
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Запросов в каждом режиме')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Потоков, обрабатывающих запросы')
+        parser.add_argument('--pool-size', type=int, default=4,
+                            help='Размер пула в режиме pool')
+        parser.add_argument('--mode', action='append',
+                            choices=list(CONNECTION_MODES),
+                            help='Выполнить только указанные режимы')
+        parser.add_argument('--cache', action='store_true',
+                            help='Не отключать кэш ответов API; без него '
+                                 'каждый запрос обращается к БД')
+        parser.add_argument('--output', help='Сохранить итоги в JSON')
+
+    def handle(self, *args, **options):
+        if not isinstance(connections[DEFAULT_DB_ALIAS],
+                          PooledDatabaseMixin):
+            raise CommandError('Нужен бэкенд БД из api_yamdb.db, например '
+                               'DB_ENGINE=api_yamdb.db.postgresql')
+        if min(options['requests'], options['concurrency'],
+               options['threads'], options['pool_size']) < 1:
+            raise CommandError('--requests, --concurrency, --threads и '
+                               '--pool-size должны быть больше нуля')
+        application = get_wsgi_application()
+        paths = options['path'] or ['/api/v1/categories/']
+        requests = [paths[i % len(paths)]
+                    for i in range(options['requests'])]
+        with override_settings(
+                **({} if options['cache'] else {'API_CACHE_TIMEOUT': 0})):
+            for path in paths:
+                call_wsgi(application, path)
+            results = compare_connections(
+                application, requests,
+                options['mode'] or list(CONNECTION_MODES),
+                options['concurrency'], options['threads'],
+                options['pool_size'])
+        self.stdout.write(f'{"режим":<12}{"N":>6}{"ошибок":>8}{"RPS":>9}'
+                          f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+                          f'{"соедин.":>9}{"ожид. p95":>11}')
+        for mode, result in results.items():
+            latency = result['latency_ms']
+            wait = (result.get('pool') or {}).get('wait_ms') or {}
+            self.stdout.write(
+                f'{mode:<12}{result["requests"]:>6}{result["errors"]:>8}'
+                f'{result["throughput_rps"] or 0:>9.1f}'
+                f'{latency["p50"]:>10.2f}{latency["p95"]:>10.2f}'
+                f'{latency["p99"]:>10.2f}{result["connections_opened"]:>9}'
+                f'{wait.get("p95", 0):>11.2f}')
+        if options['output']:
+            report = {
+                'commit': git_commit(),
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in (
+                    'requests', 'concurrency', 'threads', 'pool_size',
+                    'cache')},
+                'paths': paths,
+                'modes': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт: {options["output"]}'))
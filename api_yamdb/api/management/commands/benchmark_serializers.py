@@ -0,0 +1,95 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.fast_serializers import compile_serializer
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleGetSerializer)
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+SIZES = (10, 100, 1000)
+
+
+def create_objects(size):
+    """Создаёт size произведений, отзывов на одно из них и комментариев."""
+    category = Category.objects.create(name='bench', slug='bench')
+    Genre.objects.bulk_create(
+        Genre(name=f'bench {i}', slug=f'bench-{i}') for i in range(3))
+    genres = list(Genre.objects.filter(slug__startswith='bench-'))
+    Title.objects.bulk_create(
+        Title(name=f'bench {i}', year=2000, description='x' * 500,
+              category=category) for i in range(size))
+    titles = list(Title.objects.filter(name__startswith='bench '))
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genre)
+        for title in titles for genre in genres)
+    User.objects.bulk_create(
+        User(username=f'bench_{i}', email=f'bench_{i}@yamdb.fake')
+        for i in range(size))
+    users = list(User.objects.filter(username__startswith='bench_'))
+    Review.objects.bulk_create(
+        Review(title=titles[0], author=user, text='x' * 300, score=5)
+        for user in users)
+    review = Review.objects.filter(title=titles[0]).first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user, text='x' * 200)
+        for user in users)
+    return {
+        'titles': (TitleGetSerializer,
+                   Title.objects.filter(name__startswith='bench ')),
+        'reviews': (ReviewSerializer,
+                    Review.objects.filter(title=titles[0])),
+        'comments': (CommentSerializer,
+                     Comment.objects.filter(review=review)),
+    }
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+class Command(BaseCommand):
+    help = ('Сравнение обычного и скомпилированного сериализатора '
+            'на 10/100/1000 объектах (данные создаются и откатываются)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--sizes', type=int, nargs='*', default=SIZES)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        self.stdout.write(f'{"набор":<10}{"N":>6}{"DRF, мс":>12}'
+                          f'{"быстрый, мс":>14}{"ускорение":>12}')
+        for size in options['sizes']:
+            with transaction.atomic():
+                for name, (serializer_class, queryset) in create_objects(
+                        size).items():
+                    compiled = compile_serializer(serializer_class)
+
+                    def regular():
+                        return renderer.render(serializer_class(
+                            queryset.for_listing(), many=True).data)
+
+                    def fast():
+                        return renderer.render(compiled.serialize(
+                            compiled.rows(queryset.for_listing())))
+
+                    regular_ms, expected = measure(regular,
+                                                   options['repeat'])
+                    fast_ms, actual = measure(fast, options['repeat'])
+                    if actual != expected:
+                        raise CommandError(
+                            f'{name}: ответы сериализаторов различаются')
+                    self.stdout.write(
+                        f'{name:<10}{size:>6}{regular_ms:>12.2f}'
+                        f'{fast_ms:>14.2f}{regular_ms / fast_ms:>11.1f}x')
+                transaction.set_rollback(True)
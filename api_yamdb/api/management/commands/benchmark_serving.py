@@ -0,0 +1,73 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.utils import timezone
+
+from api.benchmark import git_commit
+from api.serving import MODES, call_wsgi, compare_serving
+
+
+class Command(BaseCommand):
+    help = ('Сравнение WSGI (воркер gthread) и ASGI (пул потоков) при '
+            'медленном бэкенде и равном числе потоков: запросов в секунду '
+            'и задержки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append',
+                            help='Адрес запроса (можно несколько); по '
+                                 'умолчанию /api/v1/titles/')
+        parser.add_argument('--delay', type=float, default=50,
+                            help='Задержка бэкенда на запрос, мс')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='Запросов в каждом режиме')
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int,
+                            default=settings.ASGI_THREADS,
+                            help='Потоков, выполняющих запросы, в каждом '
+                                 'режиме')
+        parser.add_argument('--mode', action='append', choices=MODES,
+                            help='Выполнить только указанные режимы')
+        parser.add_argument('--output', help='Сохранить итоги в JSON')
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['concurrency'],
+               options['threads']) < 1:
+            raise CommandError('--requests, --concurrency и --threads '
+                               'должны быть больше нуля')
+        application = get_wsgi_application()
+        paths = options['path'] or ['/api/v1/titles/']
+        # Прогрев: кэши и первый импорт представлений не попадают в замер.
+        for path in paths:
+            call_wsgi(application, path)
+        requests = [paths[i % len(paths)]
+                    for i in range(options['requests'])]
+        results = compare_serving(
+            application, requests, options['mode'] or MODES,
+            options['delay'], options['concurrency'], options['threads'])
+        self.stdout.write(f'{"режим":<9}{"N":>6}{"ошибок":>8}{"RPS":>9}'
+                          f'{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}')
+        for mode, result in results.items():
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{mode:<9}{result["requests"]:>6}{result["errors"]:>8}'
+                f'{result["throughput_rps"] or 0:>9.1f}'
+                f'{latency["p50"]:>10.2f}{latency["p95"]:>10.2f}'
+                f'{latency["p99"]:>10.2f}')
+        if options['output']:
+            report = {
+                'commit': git_commit(),
+                'created': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in (
+                    'delay', 'requests', 'concurrency', 'threads')},
+                'paths': paths,
+                'modes': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт: {options["output"]}'))
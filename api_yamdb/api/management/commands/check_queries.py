@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from api.queries import detect_queries
+from reviews.models import Review
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Запрашивает адреса API и выводит N+1 и медленные запросы к '
+            'БД; завершается с ошибкой, если они найдены')
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*',
+                            help='Адреса; по умолчанию QUERY_CHECK_URLS. '
+                                 '{title_id} и {review_id} заменяются '
+                                 'на id первого отзыва')
+        parser.add_argument('--user',
+                            help='Выполнять запросы от имени пользователя')
+        parser.add_argument('--threshold', type=int,
+                            help='Со скольких повторов запрос считать N+1')
+        parser.add_argument('--slow-ms', type=float,
+                            help='Со скольких миллисекунд запрос медленный')
+
+    def handle(self, *args, **options):
+        client = APIClient()
+        if options['user']:
+            try:
+                client.force_authenticate(
+                    User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["user"]} не найден')
+        urls = options['urls'] or settings.QUERY_CHECK_URLS
+        review = Review.objects.order_by('pk').only('title').first()
+        offenders = 0
+        for url in urls:
+            if '{' in url:
+                if review is None:
+                    self.stderr.write(f'{url}: нет отзывов для подстановки')
+                    continue
+                url = url.format(title_id=review.title_id,
+                                 review_id=review.pk)
+            with detect_queries(options['threshold'],
+                                options['slow_ms']) as report:
+                response = client.get(url)
+            lines = report.lines()
+            offenders += len(lines)
+            self.stdout.write(f'{url}: {response.status_code}, '
+                              f'запросов к БД: {report.total}')
+            for line in lines:
+                self.stdout.write(f'  {line}')
+        if offenders:
+            raise CommandError(f'Найдено проблемных запросов: {offenders}')
@@ -0,0 +1,257 @@
+"""Замеры времени обработки запросов по представлениям.
+
+PerformanceMiddleware для выбранных запросов (доля PERF_SAMPLE_RATE)
+считает общее время, число и время запросов к БД (через execute_wrapper
+всех подключений), время сериализации и отрисовки ответа. Значения
+копятся в памяти процесса: по каждому представлению хранятся последние
+PERF_WINDOW замеров, из которых считаются p50/p95/p99 для выдачи в
+формате Prometheus. Заголовок Server-Timing получают только
+администраторы (или все при PERF_PUBLIC_TIMING): остальным незачем
+видеть число запросов к БД.
+
+Сериализацию (serializer.data в list/retrieve) замеряет
+timed_serialization без запросов к БД, которые сериализатор выполняет
+лениво; app — остальная работа представления, render — перевод готовых
+данных в JSON.
+
+Вместе с замерами отдаются число открытых соединений с БД и состояние
+пулов соединений (api_yamdb.db.pool).
+"""
+import random
+import threading
+from collections import deque
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from api_yamdb.db import pool
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Имя метрики Prometheus, пояснение и поле замера.
+SUMMARIES = (
+    ('yamdb_request_duration_seconds', 'Время обработки запроса', 'total'),
+    ('yamdb_db_duration_seconds', 'Время запросов к БД', 'db_time'),
+    ('yamdb_serialize_duration_seconds', 'Время сериализации',
+     'serialize'),
+    ('yamdb_render_duration_seconds', 'Время отрисовки ответа', 'render'),
+    ('yamdb_db_queries', 'Число запросов к БД', 'queries'),
+)
+UNRESOLVED = 'unresolved'
+
+
+def view_name(view_func, method):
+    """Имя вида TitleViewSet.list или APIGetToken.post."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', UNRESOLVED)
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+    if cls.__name__ == 'WrappedAPIView':
+        # Функция с @api_view.
+        return view_func.__name__
+    return f'{cls.__name__}.{method.lower()}'
+
+
+def quantile(ordered, q):
+    """Значение по ближайшему рангу в отсортированном списке."""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Sample:
+    """Замер одного запроса."""
+
+    def __init__(self):
+        self.view = UNRESOLVED
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        self.render_start = None
+
+    def track_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+
+    def start_render(self):
+        self.render_start = perf_counter()
+
+    def finish_render(self, response):
+        self.render = perf_counter() - self.render_start
+
+    def server_timing(self):
+        app = max(self.total - self.db_time - self.serialize - self.render,
+                  0)
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'app;dur={app * 1000:.2f}',
+            f'serialize;dur={self.serialize * 1000:.2f}',
+            f'render;dur={self.render * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ))
+
+
+class ViewMetrics:
+    """Скользящее окно замеров и накопленные суммы одного представления."""
+
+    def __init__(self, window):
+        self.count = 0
+        self.sums = {field: 0 for _, _, field in SUMMARIES}
+        self.windows = {field: deque(maxlen=window)
+                        for _, _, field in SUMMARIES}
+
+    def add(self, sample):
+        self.count += 1
+        for field, window in self.windows.items():
+            value = getattr(sample, field)
+            self.sums[field] += value
+            window.append(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def add(self, sample):
+        with self.lock:
+            metrics = self.views.get(sample.view)
+            if metrics is None:
+                metrics = self.views[sample.view] = ViewMetrics(
+                    settings.PERF_WINDOW)
+            metrics.add(sample)
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+    def snapshot(self):
+        """{представление: (count, суммы, отсортированные окна)}."""
+        with self.lock:
+            return {view: (metrics.count, dict(metrics.sums),
+                           {field: sorted(window) for field, window
+                            in metrics.windows.items()})
+                    for view, metrics in self.views.items()}
+
+    def prometheus(self):
+        """Метрики в текстовом формате Prometheus (тип summary)."""
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+        for name, help_text, field in SUMMARIES:
+            lines += [f'# HELP {name} {help_text}',
+                      f'# TYPE {name} summary']
+            for view, (count, sums, windows) in snapshot:
+                label = f'view="{view}"'
+                for q in QUANTILES:
+                    lines.append(f'{name}{{{label},quantile="{q}"}} '
+                                 f'{quantile(windows[field], q):g}')
+                lines.append(f'{name}_sum{{{label}}} {sums[field]:g}')
+                lines.append(f'{name}_count{{{label}}} {count}')
+        return '\n'.join(lines + connection_metrics()) + '\n'
+
+
+def connection_metrics():
+    """Открытые соединения с БД и состояние пулов (api_yamdb.db.pool)."""
+    lines = ['# HELP yamdb_db_connections_opened_total '
+             'Открыто соединений с БД',
+             '# TYPE yamdb_db_connections_opened_total counter']
+    lines += [f'yamdb_db_connections_opened_total{{database="{alias}"}} '
+              f'{count}' for alias, count in sorted(pool.opened.items())]
+    stats = sorted((alias, connection_pool.stats())
+                   for alias, connection_pool in pool.pools().items())
+    if not stats:
+        return lines
+    for name, help_text, kind, field in (
+            ('yamdb_db_pool_max_size', 'Размер пула', 'gauge', 'max_size'),
+            ('yamdb_db_pool_in_use', 'Выданные соединения', 'gauge',
+             'in_use'),
+            ('yamdb_db_pool_idle', 'Свободные соединения', 'gauge', 'idle'),
+            ('yamdb_db_pool_waiting', 'Потоки в ожидании соединения',
+             'gauge', 'waiting'),
+            ('yamdb_db_pool_timeouts_total',
+             'Не дождались свободного соединения', 'counter', 'timeouts')):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        lines += [f'{name}{{database="{alias}"}} {values[field]}'
+                  for alias, values in stats]
+    name = 'yamdb_db_pool_wait_seconds'
+    lines += [f'# HELP {name} Ожидание соединения из пула',
+              f'# TYPE {name} summary']
+    for alias, values in stats:
+        label = f'database="{alias}"'
+        if values['waits']:
+            for q in QUANTILES:
+                lines.append(f'{name}{{{label},quantile="{q}"}} '
+                             f'{quantile(values["waits"], q):g}')
+        lines.append(f'{name}_sum{{{label}}} {values["wait_sum"]:g}')
+        lines.append(f'{name}_count{{{label}}} {values["acquired"]}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def timed_serialization(request):
+    """Добавляет время блока без запросов к БД к сериализации замера."""
+    sample = getattr(request, '_perf_sample', None)
+    if sample is None:
+        yield
+        return
+    start = perf_counter()
+    db_time = sample.db_time
+    try:
+        yield
+    finally:
+        sample.serialize += (perf_counter() - start
+                             - (sample.db_time - db_time))
+
+
+def response_user(request, response):
+    # JWT проверяет DRF внутри представления, пользователь — у его запроса.
+    context = getattr(response, 'renderer_context', None) or {}
+    return getattr(context.get('request', request), 'user', None)
+
+
+class PerformanceMiddleware:
+    """Замеряет выбранные запросы; остальные проходят без накладных
+    расходов, кроме одного сравнения."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.PERF_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        sample = request._perf_sample = Sample()
+        start = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(sample.track_query))
+            response = self.get_response(request)
+        sample.total = perf_counter() - start
+        if settings.PERF_PUBLIC_TIMING or getattr(
+                response_user(request, response), 'is_admin', False):
+            response['Server-Timing'] = sample.server_timing()
+        registry.add(sample)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample = getattr(request, '_perf_sample', None)
+        if sample is not None:
+            sample.view = view_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        sample = getattr(request, '_perf_sample', None)
+        if sample is not None:
+            sample.start_render()
+            response.add_post_render_callback(sample.finish_render)
+        return response
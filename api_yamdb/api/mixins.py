@@ -1,8 +1,187 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 
+from api_yamdb.db import router
+from .autocomplete import DEFAULT_LIMIT, MAX_LIMIT
+from .bulk import BulkResult, validate_items
+from .fast_serializers import compile_serializer
+from .metrics import timed_serialization
+from .serializers import parse_fields
 
-class CustomViewSet(mixins.ListModelMixin,
+
+class TimedSerializationMixin:
+    """list/retrieve DRF с замером serializer.data (api.metrics)."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(
+            queryset if page is None else page, many=True)
+        with timed_serialization(request):
+            data = serializer.data
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        with timed_serialization(request):
+            data = serializer.data
+        return Response(data)
+
+
+class CustomViewSet(TimedSerializationMixin,
+                    mixins.ListModelMixin,
                     mixins.CreateModelMixin,
                     mixins.DestroyModelMixin,
                     viewsets.GenericViewSet):
     pass
+
+
+class ModelViewSet(TimedSerializationMixin, viewsets.ModelViewSet):
+    pass
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают с реплики (см. api_yamdb.db.router).
+
+    Пользователь, который недавно что-то записал, читает с основной БД.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        router.reset()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            router.reset()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.READ_REPLICAS and request.method in SAFE_METHODS
+                and not (request.user.is_authenticated
+                         and router.is_pinned(request.user.pk))):
+            router.read_from_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if router.has_written() and request.user.is_authenticated:
+            router.pin(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsViewMixin:
+    """Передаёт запрошенные через ?fields= и ?expand= поля в queryset."""
+
+    def get_response_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return parse_fields(self.request, 'fields')
+
+    def get_expanded_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return set()
+        fields = self.get_response_fields()
+        expanded = parse_fields(self.request, 'expand') or set()
+        return expanded if fields is None else expanded & fields
+
+
+class FastListMixin:
+    """list() через скомпилированный сериализатор и строки values().
+
+    Запросы с ?expand= обслуживаются обычным сериализатором.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if 'expand' in request.query_params:
+            return super().list(request, *args, **kwargs)
+        fields = self.get_response_fields()
+        compiled = compile_serializer(self.get_serializer_class(),
+                                      fields and frozenset(fields))
+        rows = compiled.rows(self.filter_queryset(self.get_queryset()),
+                             getattr(self.paginator, 'ordering', ()))
+        page = self.paginate_queryset(rows)
+        with timed_serialization(request):
+            data = compiled.serialize(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class AutocompleteMixin:
+    """Режим автодополнения списка: ?autocomplete=начало&limit=N.
+
+    Возвращает не больше limit объектов без обёртки пагинации. Объекты
+    ищет autocomplete_function(queryset, text, limit) — её обязан задать
+    каждый вьюсет с этим миксином.
+    """
+
+    autocomplete_param = 'autocomplete'
+    autocomplete_function = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.autocomplete_function is None:
+            raise ImproperlyConfigured(
+                f'{cls.__name__}: не задан autocomplete_function')
+
+    def list(self, request, *args, **kwargs):
+        text = request.query_params.get(self.autocomplete_param)
+        if text is None:
+            return super().list(request, *args, **kwargs)
+        text = text.strip()
+        if not text:
+            return Response([])
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
+        # Функция, а не метод: читается с класса, чтобы не привязывалась.
+        found = type(self).autocomplete_function(
+            self.get_queryset(), text, max(1, min(limit, MAX_LIMIT)))
+        return Response(self.get_serializer(found, many=True).data)
+
+
+class BulkUpsertMixin:
+    """POST на .../bulk/ со списком объектов: создание и обновление пачкой.
+
+    Ответ: 201, если записаны все элементы, 207 — если часть элементов
+    отклонена, 400 — если ни один не прошёл проверку. Запись выполняет
+    bulk_upsert_function(items, result, batch_size) — её, как и
+    bulk_serializer_class, обязан задать каждый вьюсет с этим миксином.
+    """
+
+    bulk_serializer_class = None
+    bulk_partial_key = None
+    bulk_upsert_function = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in ('bulk_serializer_class', 'bulk_upsert_function'):
+            if getattr(cls, name) is None:
+                raise ImproperlyConfigured(f'{cls.__name__}: не задан {name}')
+
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Ожидается список объектов'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'Не больше {settings.BULK_MAX_ITEMS} объектов '
+                           'за запрос'},
+                status=status.HTTP_400_BAD_REQUEST)
+        result = BulkResult()
+        items = validate_items(self.bulk_serializer_class, request.data,
+                               result, self.bulk_partial_key)
+        type(self).bulk_upsert_function(items, result,
+                                        settings.BULK_BATCH_SIZE)
+        if not result.errors:
+            code = status.HTTP_201_CREATED
+        elif result.results:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response(result.as_dict(), status=code)
@@ -0,0 +1,158 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class OptionalCountPagination(LimitOffsetPagination):
+    """LimitOffsetPagination, которая по ?count=false не считает COUNT(*).
+
+    Вместо подсчёта строк выбирается limit + 1 объект: лишний объект
+    показывает, есть ли следующая страница. Поле count в ответе — null.
+    """
+
+    count_query_param = 'count'
+    count_disabled_values = ('0', 'false', 'no')
+
+    def count_disabled(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in self.count_disabled_values
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.count_disabled(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count = None
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_next_link(self):
+        if self.count is None and not self.has_next:
+            return None
+        if self.count is None:
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param,
+                                      self.limit)
+            return replace_query_param(url, self.offset_query_param,
+                                       self.offset + self.limit)
+        return super().get_next_link()
+
+
+class KeysetPagination(OptionalCountPagination):
+    """Постраничный вывод по ключу (pub_date, id) вместо OFFSET.
+
+    Режим включается параметром ?cursor= (пустое значение — первая
+    страница); без него работает обычная пагинация limit/offset.
+    Ключ сравнивается с последним объектом страницы, поэтому глубина
+    страницы не влияет на стоимость запроса, а COUNT(*) не выполняется.
+    Результаты поиска (?q=) упорядочены по рангу, а не по ключу, поэтому
+    для них ?cursor= не действует и работает limit/offset.
+    """
+
+    cursor_query_param = 'cursor'
+    ordering = ('pub_date', 'id')
+    ranked_annotation = 'search_rank'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (self.cursor_query_param not in request.query_params
+                or self.ranked_annotation in queryset.query.annotations):
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = True
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        date_field, id_field = self.ordering
+        if self.cursor is None or not self.cursor['reverse']:
+            lookup, order = 'lt', (f'-{date_field}', f'-{id_field}')
+        else:
+            lookup, order = 'gt', (date_field, id_field)
+        queryset = queryset.order_by(*order)
+        if self.cursor is not None:
+            date, pk = self.cursor['position']
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__{lookup}': date})
+                | Q(**{date_field: date, f'{id_field}__{lookup}': pk}))
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if self.cursor is not None and self.cursor['reverse']:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Пустой cursor — первая страница в режиме курсора, без COUNT(*).
+            return replace_query_param(self.base_url,
+                                       self.cursor_query_param, '')
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        date_field, id_field = self.ordering
+        if not isinstance(instance, dict):
+            instance = {date_field: getattr(instance, date_field),
+                        id_field: getattr(instance, id_field)}
+        tokens = {'d': instance[date_field].isoformat(),
+                  'i': instance[id_field]}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii'))
+                                    .decode('ascii'),
+                                    keep_blank_values=True)
+            date = parse_datetime(tokens['d'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(tokens.get('r'))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound('Некорректный курсор')
+        if date is None:
+            raise NotFound('Некорректный курсор')
+        return {'position': (date, pk), 'reverse': reverse}
@@ -0,0 +1,124 @@
+"""Поиск N+1 и медленных запросов к БД.
+
+Каждый запрос к БД приводится к «отпечатку»: литералы и списки IN
+заменяются заглушками, поэтому запросы, различающиеся только
+параметрами, совпадают. Если отпечаток встретился в одном HTTP-запросе
+QUERY_REPEAT_THRESHOLD раз и больше, это почти наверняка N+1: в отчёт
+попадает отпечаток, число повторов и строка кода приложения, откуда
+запрос был выполнен. Запросы дольше SLOW_QUERY_MS отмечаются отдельно.
+
+Используется middleware (в журнал api.queries, при QUERY_DETECTOR),
+тестами (detect_queries) и командой check_queries.
+"""
+import logging
+import re
+import sysconfig
+import traceback
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()[name]
+                        for name in ('stdlib', 'platstdlib',
+                                     'purelib', 'platlib')})
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаков для запросов, отличающихся параметрами."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql.replace('%s', '?'))
+    return _SPACES.sub(' ', sql).strip()
+
+
+def origin():
+    """Ближайшая к запросу строка кода вне библиотек и этого модуля."""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename == __file__:
+            continue
+        if frame.filename.startswith(_LIBRARY_PATHS):
+            continue
+        return f'{frame.filename}:{frame.lineno} in {frame.name}'
+    return None
+
+
+class QueryReport:
+    """Отпечатки запросов к БД за время одного HTTP-запроса."""
+
+    def __init__(self, threshold=None, slow_ms=None):
+        if threshold is None:
+            threshold = settings.QUERY_REPEAT_THRESHOLD
+        if slow_ms is None:
+            slow_ms = settings.SLOW_QUERY_MS
+        self.threshold = threshold
+        self.slow_ms = slow_ms
+        self.total = 0
+        self.counts = {}
+        self.origins = {}
+        self.slow = []
+
+    def track_query(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (perf_counter() - start) * 1000
+            key = fingerprint(sql)
+            count = self.counts[key] = self.counts.get(key, 0) + 1
+            self.total += 1
+            # Стек собирается только для повторов: это дорого.
+            if count == 2:
+                self.origins[key] = origin()
+            if duration >= self.slow_ms:
+                self.slow.append((key, duration, origin()))
+
+    @property
+    def repeated(self):
+        """[(отпечаток, повторов, строка кода)] для повторов от порога."""
+        return sorted(((key, count, self.origins.get(key))
+                       for key, count in self.counts.items()
+                       if count >= self.threshold),
+                      key=lambda item: -item[1])
+
+    def lines(self):
+        result = [f'N+1 ({count} раз) {where}: {key}'
+                  for key, count, where in self.repeated]
+        result += [f'Медленный запрос ({duration:.1f} мс) {where}: {key}'
+                   for key, duration, where in self.slow]
+        return result
+
+
+@contextmanager
+def detect_queries(threshold=None, slow_ms=None):
+    """Собирает отчёт о запросах ко всем БД внутри блока with."""
+    report = QueryReport(threshold, slow_ms)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(report.track_query))
+        yield report
+
+
+class QueryDetectorMiddleware:
+    """Пишет в журнал N+1 и медленные запросы при QUERY_DETECTOR."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_DETECTOR:
+            return self.get_response(request)
+        with detect_queries() as report:
+            response = self.get_response(request)
+        for line in report.lines():
+            logger.warning('%s %s: %s', request.method,
+                           request.get_full_path(), line)
+        return response
@@ -1,13 +1,58 @@
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, GenreTopTitle, Review,
+                            Title, TrendingTitle, User)
 from users.validators import username_validation
 
 
+def parse_fields(request, param):
+    """Множество имён из параметра вида ?fields=id,name или None."""
+    value = request.query_params.get(param) if request else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Поля ответа по ?fields= и раскрытие связей по ?expand=.
+
+    Работает только для безопасных методов; неизвестные имена полей
+    пропускаются.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        for name in parse_fields(request, 'expand') or ():
+            if name in self.expandable_fields:
+                self.fields[name] = self.expandable_fields[name](
+                    read_only=True)
+        fields = parse_fields(request, 'fields')
+        if fields:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    """Раскрытый автор отзыва или комментария."""
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name')
+
+
 class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -22,7 +67,24 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ('id',)
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleStatsSerializer(serializers.Serializer):
+    """Число отзывов, средняя оценка и распределение оценок."""
+
+    def to_representation(self, instance):
+        histogram = instance.histogram
+        count = sum(histogram.values())
+        total = sum(score * number for score, number in histogram.items())
+        return {
+            'reviews_count': count,
+            'average': round(total / count, 2) if count else None,
+            'histogram': {str(score): number
+                          for score, number in histogram.items()},
+        }
+
+
+class TitleGetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'stats': TitleStatsSerializer}
+
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
     rating = serializers.IntegerField(read_only=True)
@@ -38,6 +100,26 @@ class TitleGetSerializer(serializers.ModelSerializer):
                   'category',)
 
 
+class GenreTopTitleSerializer(serializers.ModelSerializer):
+    """Место произведения в списке лучших в жанре."""
+
+    title = TitleGetSerializer()
+
+    class Meta:
+        model = GenreTopTitle
+        fields = ('position', 'rating', 'reviews_count', 'title')
+
+
+class TrendingTitleSerializer(serializers.ModelSerializer):
+    """Место произведения в списке популярного за последние дни."""
+
+    title = TitleGetSerializer()
+
+    class Meta:
+        model = TrendingTitle
+        fields = ('position', 'reviews_count', 'title')
+
+
 class TitlePostSerializer(serializers.ModelSerializer):
     category = SlugRelatedField(queryset=Category.objects.all(),
                                 slug_field='slug')
@@ -47,12 +129,48 @@ class TitlePostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum', 'reviews_count', 'rating')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class BulkCategorySerializer(serializers.ModelSerializer):
+    """Элемент пакетной загрузки категорий; уникальность проверяется
+    для всего пакета сразу."""
+
+    class Meta:
+        model = Category
+        exclude = ('id',)
+        extra_kwargs = {'name': {'validators': []},
+                        'slug': {'validators': []}}
+
+
+class BulkGenreSerializer(BulkCategorySerializer):
+
+    class Meta(BulkCategorySerializer.Meta):
+        model = Genre
+
+
+class BulkTitleSerializer(serializers.ModelSerializer):
+    """Элемент пакетной загрузки произведений.
+
+    Категория и жанры передаются слагами и разрешаются одним запросом
+    на пакет; с id обновляются только переданные поля.
+    """
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    category = serializers.SlugField(required=False, allow_null=True)
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  required=False)
+
+    class Meta:
+        model = Title
+        exclude = ('score_sum', 'reviews_count', 'rating')
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Review."""
 
+    expandable_fields = {'author': AuthorSerializer}
+
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -63,15 +181,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('title', )
 
-    def validate(self, data):
-        if self.context.get('request').method != 'POST':
-            return data
-        author = self.context.get('request').user
-        title_id = self.context.get('view').kwargs['title_id']
-        if Review.objects.filter(author=author, title__id=title_id).exists():
-            raise serializers.ValidationError(
-                'Отзыв на данное произведение уже создан!')
-        return data
+    def create(self, validated_data):
+        # Повтор отзыва отсекает ограничение unique_title_author: отдельный
+        # запрос нужен только, чтобы отличить его от других ошибок.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if Review.objects.filter(
+                    title_id=validated_data['title'].pk,
+                    author_id=validated_data['author'].pk).exists():
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        'Отзыв на данное произведение уже создан!']})
+            raise
 
     def validate_score(self, value):
         if value not in range(1, 11):
@@ -80,9 +202,11 @@ class ReviewSerializer(serializers.ModelSerializer):
         return value
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
 
+    expandable_fields = {'author': AuthorSerializer}
+
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -94,14 +218,10 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('review', )
 
 
-class GetTokenSerializer(serializers.ModelSerializer):
+class GetTokenSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
-    class Meta:
-        model = User
-        fields = ('username', 'confirmation_code')
-
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализация модели User."""
@@ -127,19 +247,21 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class CreateUserSerializer(serializers.ModelSerializer):
-    """Создание пользователя."""
+    """Создание пользователя или повторный запрос кода.
+
+    Занятость имени и почты проверяется одним запросом вместо отдельных
+    UniqueValidator. Если пользователь с такой же парой уже есть,
+    save() возвращает его без записи в БД. Если пара занята между
+    проверкой и вставкой, тот же запрос повторяется после IntegrityError:
+    одновременная одинаковая регистрация получает код повторно, а ошибка
+    относится к тому полю, которое действительно занято.
+    """
     username = serializers.CharField(
-        validators=(
-            username_validation,
-            UniqueValidator(queryset=User.objects.all(),),
-        ),
+        validators=(username_validation,),
         max_length=settings.MAX_LENGTH_USERNAME,
         required=True
     )
     email = serializers.EmailField(
-        validators=(
-            UniqueValidator(queryset=User.objects.all()),
-        ),
         max_length=settings.MAX_LENGTH_EMAIL,
         required=True
     )
@@ -147,3 +269,41 @@ class CreateUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email')
+
+    @staticmethod
+    def find_users(username, email):
+        """Пользователь с той же парой и ошибки по занятым полям."""
+        users = list(User.objects.filter(
+            Q(username=username) | Q(email=email))[:2])
+        for user in users:
+            if user.username == username and user.email == email:
+                return user, {}
+        errors = {}
+        for user in users:
+            if user.username == username:
+                errors['username'] = [UniqueValidator.message]
+            if user.email == email:
+                errors['email'] = [UniqueValidator.message]
+        return None, errors
+
+    def validate(self, attrs):
+        user, errors = self.find_users(attrs['username'], attrs['email'])
+        if errors:
+            raise serializers.ValidationError(errors)
+        self.instance = user
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            user, errors = self.find_users(
+                validated_data['username'], validated_data['email'])
+            if user is not None:
+                return user
+            raise serializers.ValidationError(
+                errors or {'username': [UniqueValidator.message]})
+
+    def update(self, instance, validated_data):
+        return instance
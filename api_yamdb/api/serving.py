@@ -0,0 +1,214 @@
+"""Сравнение WSGI и ASGI при медленном бэкенде.
+
+Оба режима выполняют приложение Django в этом процессе, и каждый запрос
+перед обработкой ждёт delay мс, как ждал бы медленную БД или внешний
+сервис. concurrency клиентов отправляют запросы один за другим. Запросы
+в обоих режимах выполняют threads потоков — при разном числе
+обработчиков сравнивался бы параллелизм, а не способ обслуживания:
+
+- gthread — как gunicorn с воркерами gthread: соединения принимает
+  воркер, запросы выполняет общая очередь к потокам;
+- asgi — как воркер uvicorn с api_yamdb.asgi: соединения принимает
+  цикл событий, запросы выполняет пул потоков.
+
+Django 2.2 выполняет представление синхронно и в режиме asgi, поэтому
+разница между режимами — накладные расходы цикла событий и обёртки.
+
+Задержка считается с момента отправки запроса, включая ожидание в
+очереди, — так её видит клиент.
+
+compare_connections так же сравнивает обращение с соединениями с БД:
+новое на каждый ответ, постоянное на поток и пул (api_yamdb.db.pool).
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.db import connections
+
+from api_yamdb.asgi import ThreadPoolWsgiToAsgi
+from api_yamdb.db import pool
+from .benchmark import summarize
+from .metrics import quantile
+
+MODES = ('gthread', 'asgi')
+# Настройки БД режимов compare_connections; размер пула задаётся отдельно.
+CONNECTION_MODES = {
+    'close': {'CONN_MAX_AGE': 0, 'POOL_SIZE': 0},
+    'persistent': {'CONN_MAX_AGE': 60, 'POOL_SIZE': 0},
+    'pool': {'CONN_MAX_AGE': 0},
+}
+
+
+class SlowBackend:
+    """WSGI-приложение, которое перед каждым запросом ждёт delay мс."""
+
+    def __init__(self, application, delay):
+        self.application = application
+        self.delay = delay / 1000
+
+    def __call__(self, environ, start_response):
+        time.sleep(self.delay)
+        return self.application(environ, start_response)
+
+
+def wsgi_environ(path):
+    path, _, query = path.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver',
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def http_scope(path):
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+
+def call_wsgi(application, path):
+    """Статус ответа WSGI-приложения; тело читается и закрывается."""
+    status = []
+    response = application(wsgi_environ(path),
+                           lambda line, headers, exc_info=None:
+                           status.append(line))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+async def call_asgi(application, path):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(http_scope(path), receive, send)
+    return messages[0]['status']
+
+
+def serve_wsgi(application, paths, concurrency, workers):
+    """Запросы paths к application, обрабатываемые workers воркерами.
+
+    Очередь к воркерам общая и обслуживается по порядку, как очередь
+    соединений gunicorn.
+    """
+    with ThreadPoolExecutor(workers) as backend:
+
+        def timed(path):
+            started = time.perf_counter()
+            status = backend.submit(call_wsgi, application, path).result()
+            return (time.perf_counter() - started) * 1000, status, None
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(timed, paths))
+    return summarize(results, time.perf_counter() - started)
+
+
+def serve_asgi(application, paths, concurrency, threads):
+    """Те же запросы через ASGI-обёртку с пулом из threads потоков."""
+    asgi = ThreadPoolWsgiToAsgi(application, threads)
+    pending = list(reversed(paths))
+    results = []
+
+    async def client():
+        while pending:
+            path = pending.pop()
+            started = time.perf_counter()
+            status = await call_asgi(asgi, path)
+            results.append(
+                ((time.perf_counter() - started) * 1000, status, None))
+
+    async def run():
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    loop = asyncio.new_event_loop()
+    started = time.perf_counter()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+        asgi.executor.shutdown()
+    return summarize(results, time.perf_counter() - started)
+
+
+def compare_serving(application, paths, modes=MODES, delay=50,
+                    concurrency=64, threads=16):
+    """{режим: итоги} для одних и тех же запросов с задержкой delay мс,
+    выполняемых threads потоками в каждом режиме."""
+    slow = SlowBackend(application, delay)
+    serve = {'gthread': serve_wsgi, 'asgi': serve_asgi}
+    return {mode: serve[mode](slow, paths, concurrency, threads)
+            for mode in modes}
+
+
+def compare_connections(application, paths, modes=tuple(CONNECTION_MODES),
+                        concurrency=16, threads=8, pool_size=4,
+                        alias='default'):
+    """{режим: итоги} для одних и тех же запросов в threads потоков.
+
+    На время замера меняет настройки БД alias; бэкенд должен быть из
+    api_yamdb.db, иначе открытые соединения не считаются.
+    """
+    settings_dict = connections.databases[alias]
+    saved = dict(settings_dict)
+    results = {}
+    try:
+        for mode in modes:
+            settings_dict.update(CONNECTION_MODES[mode])
+            if mode == 'pool':
+                settings_dict['POOL_SIZE'] = pool_size
+            pool.close_pools()
+            before = pool.opened[alias]
+            result = serve_wsgi(application, paths, concurrency, threads)
+            result['connections_opened'] = pool.opened[alias] - before
+            connection_pool = pool.pools().get(alias)
+            if connection_pool is not None:
+                stats = connection_pool.stats()
+                result['pool'] = {
+                    'size': pool_size,
+                    'timeouts': stats['timeouts'],
+                    'wait_ms': {
+                        'mean': round(stats['wait_sum'] * 1000
+                                      / max(stats['acquired'], 1), 3),
+                        'p95': round(quantile(stats['waits'], 0.95)
+                                     * 1000, 3),
+                    } if stats['waits'] else None,
+                }
+            results[mode] = result
+    finally:
+        settings_dict.clear()
+        settings_dict.update(saved)
+        pool.close_pools()
+    return results
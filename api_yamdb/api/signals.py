@@ -0,0 +1,65 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.signals import catalogue_changed
+from .cache import (CATEGORIES, GENRES, TITLES, USERS, comments_namespace,
+                    invalidate, reviews_namespace)
+
+User = get_user_model()
+
+
+def affected_namespaces(sender, instance):
+    """Пространства имён, ответы в которых устаревают вместе с объектом."""
+    if sender is Category:
+        return (CATEGORIES, TITLES)
+    if sender is Genre:
+        return (GENRES, TITLES)
+    if sender is Review:
+        return (TITLES, reviews_namespace(instance.title_id))
+    if sender is Comment:
+        return (comments_namespace(instance.review_id),)
+    return (TITLES,)
+
+
+def invalidate_on_commit(*namespaces, using=None):
+    """Сброс после фиксации транзакции: читатель, пришедший до неё,
+    прочитает старые строки и не должен сохранить их под новым
+    поколением."""
+    transaction.on_commit(partial(invalidate, *namespaces), using=using)
+
+
+def invalidate_for_instance(sender, instance, using=None, **kwargs):
+    invalidate_on_commit(*affected_namespaces(sender, instance),
+                         using=using)
+
+
+def invalidate_users(sender, instance, created=False, update_fields=None,
+                     using=None, **kwargs):
+    # Имя пользователя выводится в отзывах и комментариях; у только что
+    # созданного пользователя их ещё нет.
+    if created or (update_fields is not None
+                   and 'username' not in update_fields):
+        return
+    invalidate_on_commit(USERS, using=using)
+
+
+def invalidate_all(sender, **kwargs):
+    invalidate_on_commit()
+
+
+for model in (Category, Genre, Title, GenreTitle, Review, Comment):
+    post_save.connect(invalidate_for_instance, sender=model,
+                      dispatch_uid=f'api_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_for_instance, sender=model,
+                        dispatch_uid=f'api_cache_delete_{model.__name__}')
+m2m_changed.connect(invalidate_for_instance, sender=Title.genre.through,
+                    dispatch_uid='api_cache_title_genre')
+post_save.connect(invalidate_users, sender=User,
+                  dispatch_uid='api_cache_save_user')
+post_delete.connect(invalidate_users, sender=User,
+                    dispatch_uid='api_cache_delete_user')
+catalogue_changed.connect(invalidate_all, dispatch_uid='api_cache_bulk')
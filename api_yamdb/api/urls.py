@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from api.views import (UserViewSet, APIGetToken, user_create_view,
                        CategoryViewSet, GenreViewSet, TitleViewSet,
-                       ReviewViewSet, CommentViewSet)
+                       ReviewViewSet, CommentViewSet, cache_stats_view,
+                       metrics_view)
 
 app_name = 'api'
 
@@ -24,6 +25,8 @@ v1_router.register(
 v1_urls = [
     path('auth/signup/', user_create_view, name='signup'),
     path('auth/token/', APIGetToken.as_view(), name='get_token'),
+    path('cache/stats/', cache_stats_view, name='cache_stats'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 urlpatterns = [
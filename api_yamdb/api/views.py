@@ -1,46 +1,72 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 
 from django_filters.rest_framework import (CharFilter, DjangoFilterBackend,
                                            FilterSet)
+from functools import partial
 from http import HTTPStatus
-from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework import filters, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Category, Genre, Review, Title
-from .mixins import CustomViewSet
+from reviews.models import (Category, Comment, Genre, GenreTopTitle, Review,
+                            Title, TitleStats, TrendingTitle)
+from users import outbox
+from users.authentication import CLAIM_FIELDS, UserClaimsAccessToken
+from .autocomplete import complete_catalogue, complete_users
+from .bulk import upsert_by_slug, upsert_titles
+from .cache import (CATEGORIES, GENRES, TITLES, USERS, CachedResponseMixin,
+                    comments_namespace, get_stats, reviews_namespace)
+from .conditional import ConditionalGetMixin
+from .filters import FullTextSearchFilter
+from .metrics import registry
+from .mixins import (AutocompleteMixin, BulkUpsertMixin, CustomViewSet,
+                     FastListMixin, ModelViewSet, ReplicaReadMixin,
+                     SparseFieldsViewMixin)
+from .pagination import KeysetPagination, OptionalCountPagination
 from .permissions import (AdminModeratorAuthorPermission, AdminOnly,
                           IsAdminOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .serializers import (BulkCategorySerializer, BulkGenreSerializer,
+                          BulkTitleSerializer, CategorySerializer,
+                          CommentSerializer,
                           CreateUserSerializer, GenreSerializer,
-                          GetTokenSerializer, ReviewSerializer,
-                          TitleGetSerializer, TitlePostSerializer,
-                          UserSerializer)
+                          GenreTopTitleSerializer, GetTokenSerializer,
+                          ReviewSerializer, TitleGetSerializer,
+                          TitlePostSerializer, TitleStatsSerializer,
+                          TrendingTitleSerializer, UserSerializer)
 
 
 User = get_user_model()
 
 
-class CategoryViewSet(CustomViewSet):
+class CategoryViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                      CachedResponseMixin, AutocompleteMixin, BulkUpsertMixin,
+                      CustomViewSet):
+    cache_namespace = CATEGORIES
     permission_classes = (IsAdminOrReadOnly,)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = BulkCategorySerializer
+    bulk_upsert_function = partial(upsert_by_slug, Category)
+    autocomplete_function = complete_catalogue
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=name',)
 
 
-class GenreViewSet(CustomViewSet):
+class GenreViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                   AutocompleteMixin, BulkUpsertMixin, CustomViewSet):
+    cache_namespace = GENRES
     permission_classes = (IsAdminOrReadOnly,)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = BulkGenreSerializer
+    bulk_upsert_function = partial(upsert_by_slug, Genre)
+    autocomplete_function = complete_catalogue
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=name',)
@@ -56,11 +82,62 @@ class TitleFilter(FilterSet):
         fields = ('category', 'genre', 'name', 'year')
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin,
+                   FastListMixin, SparseFieldsViewMixin, BulkUpsertMixin,
+                   ModelViewSet):
+    cache_namespace = TITLES
     permission_classes = (IsAdminOrReadOnly,)
-    queryset = Title.objects.annotate(rating=Avg('reviews_title__score'))
-    filter_backends = (DjangoFilterBackend,)
+    queryset = Title.objects.all()
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
     filterset_class = TitleFilter
+    pagination_class = OptionalCountPagination
+    bulk_serializer_class = BulkTitleSerializer
+    bulk_partial_key = 'id'
+    bulk_upsert_function = upsert_titles
+
+    def get_queryset(self):
+        queryset = super().get_queryset().for_listing(
+            self.get_response_fields())
+        if 'stats' in self.get_expanded_fields():
+            queryset = queryset.with_stats()
+        return queryset
+
+    @action(detail=True, methods=['GET'])
+    def stats(self, request, pk=None):
+        return self.conditional_response(self.stats_response, request, pk)
+
+    def stats_response(self, request, pk):
+        stats = get_object_or_404(TitleStats, title_id=pk)
+        return Response(TitleStatsSerializer(stats).data)
+
+    @action(detail=False, methods=['GET'])
+    def top(self, request):
+        """Лучшие по рейтингу произведения жанра ?genre=slug."""
+        genre = request.query_params.get('genre')
+        if not genre:
+            return Response({'genre': ['Укажите слаг жанра']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        ranking = GenreTopTitle.objects.filter(genre__slug=genre)
+        return Response(GenreTopTitleSerializer(
+            self.ranked(ranking, request), many=True).data)
+
+    @action(detail=False, methods=['GET'])
+    def trending(self, request):
+        """Произведения с наибольшим числом отзывов за последние дни."""
+        return Response(TrendingTitleSerializer(
+            self.ranked(TrendingTitle.objects.all(), request),
+            many=True).data)
+
+    def ranked(self, ranking, request):
+        try:
+            limit = int(request.query_params.get('limit',
+                                                 settings.RANKINGS_SIZE))
+        except ValueError:
+            limit = settings.RANKINGS_SIZE
+        return (ranking.order_by('position')
+                .select_related('title__category')
+                .prefetch_related('title__genre')
+                [:max(1, min(limit, settings.RANKINGS_SIZE))])
 
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
@@ -68,46 +145,80 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitlePostSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin, FastListMixin,
+                    SparseFieldsViewMixin, ModelViewSet):
     """Просмотр, создание, редактирование и удаление отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = KeysetPagination
+    filter_backends = (FullTextSearchFilter,)
+
+    def get_version_namespaces(self):
+        return (reviews_namespace(self.kwargs.get('title_id')), USERS)
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        """Произведение из адреса; загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(Title.objects.only('pk'),
+                                            pk=self.kwargs.get('title_id'))
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews_title.all()
+        if self.detail:
+            # Отзыв ищется сразу с условием на произведение: если его нет,
+            # ответ и так будет 404.
+            reviews = Review.objects.filter(
+                title_id=self.kwargs.get('title_id'))
+        else:
+            reviews = self.get_title().reviews_title
+        return reviews.for_listing(self.get_response_fields())
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin, FastListMixin,
+                     SparseFieldsViewMixin, ModelViewSet):
     """Просмотр, создание, редактирование и удаление комментариев отзывов."""
 
     serializer_class = CommentSerializer
     permission_classes = (AdminModeratorAuthorPermission,)
+    pagination_class = KeysetPagination
+    filter_backends = (FullTextSearchFilter,)
+
+    def get_version_namespaces(self):
+        return (comments_namespace(self.kwargs.get('review_id')), USERS)
 
     def get_review(self):
-        return get_object_or_404(Review,
-                                 pk=self.kwargs.get('review_id'),
-                                 title__pk=self.kwargs.get('title_id'))
+        """Отзыв из адреса; загружается один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.only('pk'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'))
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments_review.all()
+        if self.detail:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id'))
+        else:
+            comments = self.get_review().comments_review
+        return comments.for_listing(self.get_response_fields())
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, AutocompleteMixin, ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AdminOnly,)
     filter_backends = [filters.SearchFilter]
     search_fields = ('username',)
+    autocomplete_function = complete_users
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
 
@@ -119,7 +230,9 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path='me'
     )
     def me(self, request, *args, **kwargs):
-        intanse = self.request.user
+        # request.user собран из токена и содержит только поля для
+        # проверки прав, поэтому профиль читается из БД.
+        intanse = User.objects.get(pk=self.request.user.pk)
         serializer = self.get_serializer(intanse)
         if self.request.method == 'PATCH':
             serializer = self.get_serializer(
@@ -129,49 +242,64 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+# Поля, от которых зависят код подтверждения и claims токена.
+TOKEN_USER_FIELDS = ('id', 'password', 'last_login') + CLAIM_FIELDS
+
+
 class APIGetToken(APIView):
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        username = serializer.validated_data.get('username')
-        confirmation_code = request.data['confirmation_code']
-        user = get_object_or_404(User, username=username)
+        username = serializer.validated_data['username']
+        confirmation_code = serializer.validated_data['confirmation_code']
+        user = get_object_or_404(
+            User.objects.only(*TOKEN_USER_FIELDS), username=username)
         if not default_token_generator.check_token(user, confirmation_code):
             return Response(
                 {'username': 'Такого пользователя не существует'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         return Response(
-            {'token': str(RefreshToken.for_user(user).access_token)},
+            {'token': str(UserClaimsAccessToken.for_user(user))},
             status=status.HTTP_201_CREATED
         )
 
 
+@api_view(['GET'])
+@permission_classes((AdminOnly,))
+def cache_stats_view(request):
+    return Response(get_stats())
+
+
+@api_view(['GET'])
+@permission_classes((AdminOnly,))
+def metrics_view(request):
+    return HttpResponse(registry.prometheus(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
 @api_view(['POST'])
 def user_create_view(request):
-    email = request.data.get('email')
-    username = request.data.get('username')
-    if User.objects.filter(username=username, email=email).exists():
-        send_confirmation_code(username, email)
-        return Response(request.data, status=status.HTTP_200_OK)
     serializer = CreateUserSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.save()
-    send_confirmation_code(username, email)
+    send_confirmation_code(serializer.save())
     return Response(serializer.data, status=HTTPStatus.OK)
 
 
-def send_confirmation_code(username, email):
-    user = get_object_or_404(User, email=email, username=username)
+def send_confirmation_code(user):
     confirmation_code = default_token_generator.make_token(user)
-    user.confirmation_code = confirmation_code
+    # Код меняется не чаще раза в сутки: повторный запрос в тот же день
+    # не пишет в таблицу пользователей.
+    if user.confirmation_code != confirmation_code:
+        user.confirmation_code = confirmation_code
+        user.save(update_fields=('confirmation_code',))
     MESSAGE = (
-        f'Добрый день {username}! Код - {user.confirmation_code}'
+        f'Добрый день {user.username}! Код - {user.confirmation_code}'
     )
-    send_mail(
+    outbox.enqueue(
         message=MESSAGE,
         subject='Код подтверждения',
         recipient_list=[user.email],
         from_email=settings.FROM_EMAIL
     )
-    user.save()
@@ -0,0 +1,7 @@
+from django.contrib.staticfiles.apps import StaticFilesConfig
+
+
+class StaticConfig(StaticFilesConfig):
+    # csv-фикстуры из static/data нужны только команде импорта, в
+    # публикуемую статику они не попадают.
+    ignore_patterns = [*StaticFilesConfig.ignore_patterns, 'data']
@@ -0,0 +1,96 @@
+"""ASGI-точка входа: api_yamdb.asgi:application.
+
+Django 2.2 не умеет обрабатывать запросы асинхронно, поэтому приложение
+Django выполняется в пуле из ASGI_THREADS потоков, а цикл событий только
+принимает соединения и отдаёт ответы. Медленный запрос к БД или внешнему
+сервису занимает один поток пула, а не весь процесс воркера, как у
+синхронного gunicorn.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+class ThreadPoolWsgiInstance(WsgiToAsgiInstance):
+    """Обработка одного запроса WSGI-приложением в заданном пуле потоков.
+
+    В отличие от asgiref 3.2 ответ закрывается: без close() Django не
+    отправляет request_finished и не закрывает соединения с БД.
+
+    Класс опирается на внутренние методы и атрибуты WsgiToAsgiInstance
+    (run_wsgi_app, build_environ, sync_send, response_start,
+    response_started) версии из requirements.txt; это поведение
+    закреплено тестом test_asgiref_contract, его нужно прогнать при
+    обновлении asgiref.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await asyncio.get_event_loop().run_in_executor(
+            self.executor, self.run_wsgi_app_sync, body)
+
+    def run_wsgi_app_sync(self, body):
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            for output in response:
+                self.send_start()
+                self.sync_send({'type': 'http.response.body',
+                                'body': output, 'more_body': True})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        self.send_start()
+        self.sync_send({'type': 'http.response.body'})
+
+    def send_start(self):
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WSGI-приложение как ASGI с собственным пулом потоков.
+
+    События lifespan подтверждаются сразу: подготовка при запуске не нужна.
+    """
+
+    def __init__(self, wsgi_application, threads):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=threads,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        await ThreadPoolWsgiInstance(self.wsgi_application, self.executor)(
+            scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def get_asgi_application(threads=None):
+    from django.conf import settings
+
+    wsgi_application = get_wsgi_application()
+    return ThreadPoolWsgiToAsgi(wsgi_application,
+                                threads or settings.ASGI_THREADS)
+
+
+application = get_asgi_application()
@@ -0,0 +1,235 @@
+"""Пул соединений с БД и проверка соединений перед использованием.
+
+Django 2.2 не умеет ни того, ни другого, поэтому бэкенды
+api_yamdb.db.postgresql и api_yamdb.db.sqlite3 добавляют к стандартным:
+
+- CONN_HEALTH_CHECKS: постоянное соединение (CONN_MAX_AGE > 0) перед
+  первым запросом в очередном ответе проверяется через is_usable() и
+  переоткрывается, если БД его разорвала (как в Django 4.1);
+- POOL_SIZE > 0: соединения берутся из общего для потоков процесса пула
+  не больше POOL_SIZE штук и возвращаются в него при закрытии. Когда
+  свободных нет, поток ждёт до POOL_TIMEOUT секунд. Пул нужен при
+  многопоточной обработке (ASGI_THREADS): постоянное соединение на
+  каждый поток держало бы их слишком много. Пул требует CONN_MAX_AGE = 0:
+  соединение возвращается в него после каждого ответа, а постоянные
+  соединения потоков заняли бы его целиком.
+"""
+import threading
+from collections import Counter, deque
+from functools import partial
+from time import perf_counter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import OperationalError
+
+# Окно замеров ожидания свободного соединения для перцентилей.
+WAIT_WINDOW = 1024
+
+_lock = threading.Lock()
+_pools = {}
+# Действительно открытые соединения по псевдонимам БД.
+opened = Counter()
+
+
+class ConnectionPool:
+    """Соединения одной БД, общие для всех потоков процесса."""
+
+    def __init__(self, max_size, timeout, check=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.wait_sum = 0.0
+        self.waits = deque(maxlen=WAIT_WINDOW)
+
+    def acquire(self, connect):
+        """Свободное соединение или новое от connect(), если пул не полон.
+        """
+        started = perf_counter()
+        deadline = started + self.timeout
+        with self.condition:
+            self.waiting += 1
+            try:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - perf_counter()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise OperationalError(
+                            f'Нет свободного соединения с БД за '
+                            f'{self.timeout:g} с (пул на {self.max_size})')
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                # Место в пуле занимается до открытия соединения.
+                self.size += 1
+            waited = perf_counter() - started
+            self.acquired += 1
+            self.wait_sum += waited
+            self.waits.append(waited)
+        if connection is not None:
+            if self.check is None or self.check(connection):
+                return connection
+            self.close(connection)
+        try:
+            return connect()
+        except Exception:
+            self.forget()
+            raise
+
+    def release(self, connection, reuse=True):
+        """Возвращает соединение; незавершённая транзакция откатывается."""
+        if reuse:
+            try:
+                connection.rollback()
+            except Exception:
+                reuse = False
+        if not reuse:
+            self.close(connection)
+            return self.forget()
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def forget(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self, connection):
+        with self.condition:
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Закрывает свободные соединения."""
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+        for connection in idle:
+            self.close(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.size - len(self.idle),
+                'idle': len(self.idle),
+                'waiting': self.waiting,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'wait_sum': self.wait_sum,
+                'waits': sorted(self.waits),
+            }
+
+
+def check_connection(connection):
+    """Соединение отвечает на SELECT 1; транзакция после него откатывается.
+    """
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+        connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+def get_pool(alias, settings_dict):
+    if not settings_dict.get('POOL_SIZE'):
+        return None
+    if settings_dict.get('CONN_MAX_AGE') != 0:
+        # Поток держал бы соединение между ответами, и при потоках больше
+        # POOL_SIZE остальные ждали бы его до POOL_TIMEOUT.
+        raise ImproperlyConfigured(
+            f'Пулу соединений БД {alias} нужен CONN_MAX_AGE = 0 '
+            f'(DB_CONN_MAX_AGE=0)')
+    with _lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(
+                settings_dict['POOL_SIZE'],
+                settings_dict.get('POOL_TIMEOUT', 10),
+                check_connection
+                if settings_dict.get('CONN_HEALTH_CHECKS') else None)
+        return pool
+
+
+def pools():
+    """{псевдоним БД: пул} для созданных в этом процессе пулов."""
+    with _lock:
+        return dict(_pools)
+
+
+def close_pools():
+    """Закрывает свободные соединения и забывает пулы (после смены
+    настроек БД)."""
+    with _lock:
+        closing = list(_pools.values())
+        _pools.clear()
+    for pool in closing:
+        pool.clear()
+
+
+class PooledDatabaseMixin:
+    """Пул соединений и проверка постоянных соединений для бэкенда БД."""
+
+    health_check_done = False
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        connect = partial(self.open_connection, conn_params)
+        if pool is None:
+            return connect()
+        return pool.acquire(connect)
+
+    def open_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        with _lock:
+            opened[self.alias] += 1
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Закрытое внутри atomic соединение Django ещё держит до выхода
+        # из блока, отдавать его другому потоку нельзя.
+        pool.release(self.connection, reuse=not self.in_atomic_block and (
+            not self.errors_occurred or self.is_usable()))
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Вызывается в начале и в конце каждого ответа.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.in_atomic_block):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
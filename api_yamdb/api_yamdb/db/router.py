@@ -0,0 +1,82 @@
+"""Чтение с реплик БД (READ_REPLICAS) для безопасных запросов к API.
+
+Реплику для запроса включают представления (api.mixins.ReplicaReadMixin);
+всё остальное — команды, админка, небезопасные методы — работает с
+основной БД. Запись всегда идёт в основную БД, и после первой записи
+чтение до конца запроса тоже идёт с неё. Пользователь, который что-то
+записал, ещё REPLICA_PIN_SECONDS секунд читает с основной БД, чтобы
+сразу видеть свой отзыв, пока реплика догоняет. Закрепление хранится в
+общем кэше (см. проверку api.E001), поэтому действует во всех воркерах.
+
+Состояние хранится в потоке: и WSGI, и ASGI (api_yamdb.asgi) выполняют
+запрос целиком в одном потоке.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def read_from_replica(alias=None):
+    """Дальнейшее чтение в этом потоке — с реплики (alias или случайной).
+    """
+    if alias is None and settings.READ_REPLICAS:
+        alias = random.choice(settings.READ_REPLICAS)
+    _state.replica = alias
+
+
+def reset():
+    _state.replica = None
+    _state.written = False
+
+
+def replica():
+    """Реплика, с которой сейчас читает поток, или None."""
+    if getattr(_state, 'written', False):
+        return None
+    return getattr(_state, 'replica', None)
+
+
+def has_written():
+    return getattr(_state, 'written', False)
+
+
+def pin(user_id):
+    """Пользователь читает с основной БД следующие REPLICA_PIN_SECONDS."""
+    if settings.READ_REPLICAS and settings.REPLICA_PIN_SECONDS > 0:
+        cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id)) is not None
+
+
+# app_label таблицы DatabaseCache (если CACHE_BACKEND задан так): кэш не
+# читается с реплики, а запись в него не считается записью данных запроса.
+CACHE_APP_LABEL = 'django_cache'
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL or has_written():
+            return DEFAULT_DB_ALIAS
+        # None — обычный выбор Django (БД объекта из подсказки или default).
+        return replica()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != CACHE_APP_LABEL:
+            _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы проекта — копии одной схемы.
+        return True
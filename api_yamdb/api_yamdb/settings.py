@@ -1,5 +1,6 @@
 import os
 from datetime import timedelta
+from itertools import zip_longest
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,16 +21,18 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'api_yamdb.apps.StaticConfig',
     'rest_framework',
     'rest_framework_simplejwt',
-    'api',
-    'users',
-    'reviews',
+    'api.apps.ApiConfig',
+    'users.apps.UsersConfig',
+    'reviews.apps.ReviewsConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.PerformanceMiddleware',
+    'api.queries.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,19 +65,132 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
 # Database
+# Соединение живёт CONN_MAX_AGE секунд (0 — закрывается после каждого
+# ответа). Проверку постоянных соединений (CONN_HEALTH_CHECKS) и пул
+# (POOL_SIZE > 0) добавляет бэкенд api_yamdb.db.postgresql, см.
+# api_yamdb/db/pool.py; стандартный бэкенд эти ключи не читает.
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.getenv('DB_ENGINE',
+                            default='django.db.backends.postgresql'),
         'NAME': os.getenv('DB_NAME', default='default'),
         'USER': os.getenv('POSTGRES_USER', default='default'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='default'),
         'HOST': os.getenv('DB_HOST', default='default'),
-        'PORT': os.getenv('DB_PORT', default='default')
+        'PORT': os.getenv('DB_PORT', default='default'),
+        # С пулом соединение возвращается в него после каждого ответа.
+        'CONN_MAX_AGE': int(os.getenv(
+            'DB_CONN_MAX_AGE',
+            default=0 if int(os.getenv('DB_POOL_SIZE', default=0)) else 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS',
+                                        default='True') == 'True',
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=0)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
     }
 }
 
 
+# Реплики для чтения (api_yamdb/db/router.py): хосты DB_REPLICA_HOSTS и/или
+# имена БД DB_REPLICA_NAMES через запятую, остальное — как у default.
+# Пользователь после записи ещё REPLICA_PIN_SECONDS секунд читает с
+# основной БД.
+
+READ_REPLICAS = []
+for _number, (_host, _name) in enumerate(zip_longest(
+        os.getenv('DB_REPLICA_HOSTS', default='').split(','),
+        os.getenv('DB_REPLICA_NAMES', default='').split(','),
+        fillvalue=''), 1):
+    if not (_host.strip() or _name.strip()):
+        continue
+    DATABASES[f'replica{_number}'] = {
+        **DATABASES['default'],
+        'HOST': _host.strip() or DATABASES['default']['HOST'],
+        'NAME': _name.strip() or DATABASES['default']['NAME'],
+        # В тестах реплика — та же база, что и основная.
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(f'replica{_number}')
+
+DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+
+
+# Cache: общий для всех процессов (воркеры gunicorn, команды manage.py),
+# иначе сброс кэша ответов API не доходит до других процессов. По
+# умолчанию — memcached из infra/docker-compose.yaml; кэш в памяти
+# процесса при DEBUG = False отвергает проверка api.E001.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.memcached.MemcachedCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='memcached:11211'),
+    }
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+
+# Пакетная запись: объектов в запросе и в одной пачке запросов к БД
+
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=10000))
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', default=500))
+
+
+# Замеры запросов: доля замеряемых запросов (0 — выключено), сколько
+# последних замеров на представление хранить для перцентилей и отдавать
+# ли Server-Timing всем клиентам, а не только администраторам (для
+# benchmark_api --url)
+
+PERF_SAMPLE_RATE = float(os.getenv('PERF_SAMPLE_RATE', default=0))
+PERF_WINDOW = int(os.getenv('PERF_WINDOW', default=1024))
+PERF_PUBLIC_TIMING = os.getenv('PERF_PUBLIC_TIMING',
+                               default='False') == 'True'
+
+
+# Поиск N+1 и медленных запросов: журналирование в middleware, порог
+# повторов одного запроса, порог времени (мс) и адреса для check_queries
+
+QUERY_DETECTOR = os.getenv('QUERY_DETECTOR', default=str(DEBUG)) == 'True'
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', default=3))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', default=100))
+QUERY_CHECK_URLS = [
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+    '/api/v1/titles/',
+    '/api/v1/titles/?expand=stats',
+    '/api/v1/titles/{title_id}/',
+    '/api/v1/titles/trending/',
+    '/api/v1/titles/{title_id}/reviews/',
+    '/api/v1/titles/{title_id}/reviews/?cursor=',
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+    '/api/v1/users/',
+]
+
+
+# Материализованные рейтинги: длина списков, окно популярного (дней),
+# задержка учёта свежих отзывов и пауза между полными пересчётами
+# (секунд)
+
+RANKINGS_SIZE = int(os.getenv('RANKINGS_SIZE', default=100))
+TRENDING_DAYS = int(os.getenv('TRENDING_DAYS', default=7))
+RANKINGS_SETTLE_DELAY = int(os.getenv('RANKINGS_SETTLE_DELAY', default=60))
+RANKINGS_FULL_INTERVAL = int(os.getenv('RANKINGS_FULL_INTERVAL',
+                                       default=3600))
+
+
+# ASGI (api_yamdb.asgi): потоков для обработки запросов в одном воркере
+
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', default=16))
+
+
+# Конфигурация полнотекстового поиска PostgreSQL
+
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -109,7 +225,11 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# Сюда collectstatic собирает статику с хэшами в именах и сжатыми копиями
+# для nginx (api_yamdb.storage).
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'api_yamdb.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -119,7 +239,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
@@ -133,6 +253,10 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'users.User'
 
+# Сколько пользователей и сколько секунд держать в кэше аутентификации
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', default=10000))
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', default=300))
+
 MAX_LENGTH_USERNAME = 150
 MAX_LENGTH_FN = 150
 MAX_LENGTH_LN = 150
@@ -140,3 +264,19 @@ MAX_LENGTH_EMAIL = 254
 MAX_LENGTH_ROLE = 150
 MAX_LENGTH_CONF_CODE = 150
 FROM_EMAIL = 'yambd@test.ru'
+
+
+# Email
+
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND',
+                          default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', default='localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', default=25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', default='') == 'True'
+
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', default=100))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', default=30))
+OUTBOX_LEASE = int(os.getenv('OUTBOX_LEASE', default=300))
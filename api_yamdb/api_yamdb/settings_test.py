@@ -0,0 +1,31 @@
+from .settings import *  # noqa: F401,F403
+
+# Тесты запускаются без PostgreSQL: база SQLite создаётся в памяти.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # Отдельная база, изображающая реплику; включается в тестах через
+    # READ_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+READ_REPLICAS = []
+
+# Тесты идут в одном процессе, общий кэш им не нужен.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+SILENCED_SYSTEM_CHECKS = ['api.E001']
+
+PERF_SAMPLE_RATE = 1
+
+# Без collectstatic: у тестов нет манифеста с хэшами статики.
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
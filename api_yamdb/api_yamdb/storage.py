@@ -0,0 +1,65 @@
+"""Статика для раздачи через nginx с долгим кэшированием.
+
+collectstatic сохраняет рядом с каждым файлом копию с хэшем содержимого
+в имени (redoc.3f2a9c1b7e4d.yaml), и {% static %} ссылается на неё:
+такие адреса не меняются без изменения файла, поэтому nginx отдаёт их с
+Cache-Control на год. Текстовые файлы заранее сжимаются в .gz (для
+gzip_static), чтобы nginx не сжимал их на каждый запрос.
+"""
+import gzip
+import io
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+COMPRESSIBLE = ('.css', '.csv', '.eot', '.html', '.ico', '.js', '.json',
+                '.map', '.md', '.otf', '.svg', '.ttf', '.txt', '.xml',
+                '.yaml', '.yml')
+# Меньшие файлы помещаются в один пакет и без сжатия.
+MIN_SIZE = 256
+
+
+def gzip_compress(content):
+    # mtime=0: одинаковый результат при каждой сборке.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9,
+                       mtime=0) as file:
+        file.write(content)
+    return buffer.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if hashed_name:
+                hashed_names[name] = hashed_name
+        if not dry_run:
+            for name, hashed_name in sorted(hashed_names.items()):
+                self.compress(name, hashed_name)
+
+    def compress(self, *names):
+        """Копии файлов в .gz, если они заметно меньше оригинала.
+
+        Файлы с одинаковым содержимым (оригинал и копия с хэшем) сжимаются
+        один раз.
+        """
+        contents = {}
+        for name in names:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                with self.open(name) as file:
+                    contents.setdefault(file.read(), set()).add(name)
+        for content, same in contents.items():
+            if len(content) < MIN_SIZE:
+                continue
+            compressed = gzip_compress(content)
+            if len(compressed) >= len(content) * 0.95:
+                continue
+            for name in same:
+                if self.exists(name + '.gz'):
+                    self.delete(name + '.gz')
+                self._save(name + '.gz', ContentFile(compressed))
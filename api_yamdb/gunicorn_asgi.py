@@ -0,0 +1,34 @@
+"""Профиль gunicorn для ASGI-режима (api_yamdb.asgi).
+
+    gunicorn api_yamdb.asgi:application -c gunicorn_asgi.py
+
+Каждый воркер uvicorn держит соединения в цикле событий, а запросы
+выполняет в пуле из ASGI_THREADS потоков. Воркер с медленным запросом к
+БД или внешнему сервису продолжает обслуживать остальных, поэтому
+процессов нужно меньше, чем синхронных воркеров: по одному на ядро.
+Соединений с БД одновременно открыто до GUNICORN_WORKERS * ASGI_THREADS,
+это должно укладываться в max_connections PostgreSQL, иначе включите пул
+(DB_POOL_SIZE, см. api_yamdb/db/pool.py).
+"""
+import multiprocessing
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class Worker(UvicornWorker):
+    """Воркер uvicorn с uvloop и httptools, если они установлены."""
+
+    CONFIG_KWARGS = {'loop': 'auto', 'http': 'auto'}
+
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+worker_class = 'gunicorn_asgi.Worker'
+workers = int(os.getenv('GUNICORN_WORKERS',
+                        default=multiprocessing.cpu_count()))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+graceful_timeout = timeout
+keepalive = 5
+# Перезапуск воркера после N запросов ограничивает рост памяти.
+max_requests = 10000
+max_requests_jitter = 1000
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from reviews.models import Category, Genre, Title
+from reviews.models import Category, Genre, GenreTitle, Title
 
 
 @admin.register(Category)
@@ -13,6 +13,14 @@ class GenreAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'slug')
 
 
+class GenreTitleInline(admin.TabularInline):
+    model = GenreTitle
+    extra = 1
+
+
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'year', 'description', 'category')
+    inlines = (GenreTitleInline,)
+    list_display = ('id', 'name', 'year', 'description', 'category',
+                    'rating')
+    readonly_fields = ('score_sum', 'reviews_count', 'rating')
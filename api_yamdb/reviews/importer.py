@@ -0,0 +1,248 @@
+"""Потоковый импорт csv-файлов в базу данных.
+
+Строки читаются генератором и записываются пачками через bulk_create
+(или COPY FROM для PostgreSQL) внутри одной транзакции. Внешние ключи
+проверяются по множествам известных id в памяти, без запросов на каждую
+строку.
+"""
+import csv
+import io
+import time
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from reviews import models
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalogue_changed
+from users.models import User
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'static' / 'data'
+
+
+class ImportSpec:
+    """Описание одного csv-файла: модель и внешние ключи по колонкам."""
+
+    def __init__(self, name, file_name, model, foreign_keys=None):
+        self.name = name
+        self.file_name = file_name
+        self.model = model
+        self.foreign_keys = foreign_keys or {}
+
+    @property
+    def path(self):
+        return DATA_DIR / self.file_name
+
+
+# Порядок важен: модель импортируется после всех, на которые ссылается.
+IMPORT_SPECS = (
+    ImportSpec('category', 'category.csv', models.Category),
+    ImportSpec('genre', 'genre.csv', models.Genre),
+    ImportSpec('titles', 'titles.csv', models.Title,
+               {'category': models.Category}),
+    ImportSpec('genre_title', 'genre_title.csv', models.GenreTitle,
+               {'title_id': models.Title, 'genre_id': models.Genre}),
+    ImportSpec('users', 'users.csv', User),
+    ImportSpec('review', 'review.csv', models.Review,
+               {'title_id': models.Title, 'author': User}),
+    ImportSpec('comments', 'comments.csv', models.Comment,
+               {'review_id': models.Review, 'author': User}),
+)
+
+
+def read_columns(path):
+    with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+        return next(csv.reader(csvfile, quotechar='"'))
+
+
+def read_rows(path):
+    """Построчно читает csv-файл, не загружая его целиком в память."""
+    with open(path, 'r', newline='', encoding='utf-8') as csvfile:
+        yield from csv.DictReader(csvfile, quotechar='"')
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def dependents(specs, selected):
+    """Модели, которые нужно очистить вместе с выбранными."""
+    affected = {spec.model for spec in selected}
+    for spec in specs:
+        if affected & set(spec.foreign_keys.values()):
+            affected.add(spec.model)
+    return [spec.model for spec in specs if spec.model in affected]
+
+
+@contextmanager
+def keep_auto_now_add(model, columns):
+    """Сохраняет даты из файла вместо подстановки текущего времени."""
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now_add', False)
+              and field.name in columns]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Импорт набора csv-файлов с отчётом о скорости."""
+
+    def __init__(self, batch_size=1000, use_copy=False, report=None,
+                 report_every=10):
+        self.batch_size = batch_size
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.report = report or (lambda message: None)
+        self.report_every = report_every
+        self.known_ids = {}
+
+    def ids_of(self, model):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model._base_manager.values_list('pk', flat=True))
+        return self.known_ids[model]
+
+    def truncate(self, models_to_clear):
+        models_to_clear = list(reversed(models_to_clear))
+        if connection.vendor == 'postgresql':
+            tables = [model._meta.db_table for model in models_to_clear]
+            for sql in connection.ops.sql_flush(no_style(), tables, (),
+                                                allow_cascade=True):
+                with connection.cursor() as cursor:
+                    cursor.execute(sql)
+        else:
+            for model in models_to_clear:
+                model._base_manager.all().delete()
+        for model in models_to_clear:
+            self.known_ids.pop(model, None)
+
+    def run(self, specs, truncate=False):
+        results = []
+        with transaction.atomic():
+            if truncate:
+                self.truncate(dependents(IMPORT_SPECS, specs))
+            for spec in specs:
+                results.append((spec, self.import_spec(spec)))
+            if truncate or any(spec.model in (models.Review, models.Title)
+                               for spec in specs):
+                rebuild_title_ratings()
+            self.reset_sequences([spec.model for spec in specs])
+        catalogue_changed.send(sender=self.__class__)
+        return results
+
+    def import_spec(self, spec):
+        columns = read_columns(spec.path)
+        rows = read_rows(spec.path)
+        prepare = self.row_preparer(spec, columns)
+        write = self.copy_batch if self.copy_allowed(spec) else self.bulk_batch
+        stats = {'read': 0, 'written': 0, 'skipped': 0}
+        started = time.monotonic()
+        with keep_auto_now_add(spec.model, columns):
+            for number, batch in enumerate(batched(rows, self.batch_size), 1):
+                objects = [obj for obj in map(prepare, batch) if obj]
+                stored = write(spec.model, objects)
+                stats['read'] += len(batch)
+                stats['skipped'] += len(batch) - len(stored)
+                stats['written'] += len(stored)
+                self.ids_of(spec.model).update(stored)
+                if number % self.report_every == 0:
+                    self.report_progress(spec, stats, started)
+        stats['seconds'] = time.monotonic() - started
+        self.report(f'{spec.name}: прочитано {stats["read"]}, '
+                    f'записано {stats["written"]}, '
+                    f'пропущено {stats["skipped"]} '
+                    f'за {stats["seconds"]:.2f} с '
+                    f'({self.rate(stats, started):.0f} строк/с)')
+        return stats
+
+    @staticmethod
+    def rate(stats, started):
+        elapsed = time.monotonic() - started
+        return stats['read'] / elapsed if elapsed else 0
+
+    def report_progress(self, spec, stats, started):
+        self.report(f'{spec.name}: {stats["read"]} строк, '
+                    f'{self.rate(stats, started):.0f} строк/с')
+
+    def row_preparer(self, spec, columns):
+        model = spec.model
+        fields = {column: model._meta.get_field(column)
+                  for column in columns}
+        foreign_keys = {column: self.ids_of(target)
+                        for column, target in spec.foreign_keys.items()}
+
+        def prepare(row):
+            values = {}
+            for column, field in fields.items():
+                value = row[column]
+                if value == '' and field.null:
+                    value = None
+                try:
+                    value = field.to_python(value)
+                except ValidationError:
+                    return None
+                if (column in foreign_keys and value is not None
+                        and value not in foreign_keys[column]):
+                    return None
+                values[field.attname] = value
+            return model(**values)
+
+        return prepare
+
+    def copy_allowed(self, spec):
+        return (self.use_copy
+                and not spec.model._base_manager.exists())
+
+    def bulk_batch(self, model, objects):
+        """Записывает пачку; возвращает id её строк, которые есть в базе.
+
+        ignore_conflicts молча пропускает строку, нарушившую любое
+        ограничение (например, имя пользователя, занятое под другим id).
+        Такие id не становятся известными, и ссылающиеся на них строки
+        отбрасываются, а не роняют проверку внешних ключей при фиксации.
+        """
+        model._base_manager.bulk_create(objects, ignore_conflicts=True)
+        return set(model._base_manager.filter(
+            pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+
+    def copy_batch(self, model, objects):
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            writer.writerow(
+                r'\N' if value is None else value
+                for value in (
+                    field.get_db_prep_save(field.pre_save(obj, True),
+                                           connection)
+                    for field in fields))
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column)
+                            for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f"({columns}) FROM STDIN WITH CSV NULL '\\N'",
+                buffer)
+        return {obj.pk for obj in objects}
+
+    def reset_sequences(self, models_to_reset):
+        statements = connection.ops.sequence_reset_sql(no_style(),
+                                                       models_to_reset)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
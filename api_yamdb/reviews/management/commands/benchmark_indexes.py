@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reviews.models import Comment, GenreTitle, Review, Title
+from reviews.seed import seed_catalogue
+from users.models import User
+
+INDEXED_MODELS = (Title, Review, Comment)
+
+
+def hot_queries():
+    """Запросы API в том виде, в каком их строят вьюсеты."""
+    review = Review.objects.order_by('pk').first()
+    title = (Title.objects.select_related('category')
+             .filter(category__isnull=False).order_by('pk').first())
+    if review is None or title is None:
+        return {}
+    # Жанр берётся у любого произведения: у выбранного выше его может не быть.
+    genre_slug = (GenreTitle.objects.order_by('pk')
+                  .values_list('genre__slug', flat=True).first())
+    queries = {
+        'reviews by title': Review.objects.filter(
+            title_id=review.title_id).order_by('-pub_date', '-id')[:10],
+        'comments by review': Comment.objects.filter(
+            review_id=review.pk).order_by('-pub_date', '-id')[:10],
+        'titles by category': Title.objects.filter(
+            category__slug=title.category.slug).order_by('name')[:10],
+        'titles by year': Title.objects.filter(
+            year=title.year).order_by('name')[:10],
+        'users by username': User.objects.filter(
+            username__startswith=review.author.username[:4])[:10],
+    }
+    if genre_slug is not None:
+        queries['titles by genre'] = Title.objects.filter(
+            genre__slug=genre_slug).order_by('name')[:10]
+    return queries
+
+
+class Command(BaseCommand):
+    help = ('Замер горячих запросов API: планы EXPLAIN и время выполнения '
+            'без составных индексов и с ними')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, metavar='N',
+                            help='Предварительно создать N отзывов')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз выполнять каждый запрос')
+        parser.add_argument('--compare', action='store_true',
+                            help='Сначала замерить без составных индексов '
+                                 '(индексы временно удаляются)')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            created = seed_catalogue(options['seed'])
+            self.stdout.write(f'Создано: {created}')
+        if options['compare']:
+            self.drop_indexes()
+            try:
+                self.run('без индексов', options['repeat'])
+            finally:
+                self.create_indexes()
+        self.run('с индексами', options['repeat'])
+
+    def run(self, label, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {label} =='))
+        for name, queryset in hot_queries().items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: медиана {statistics.median(timings):.3f} мс, '
+                f'макс. {max(timings):.3f} мс'))
+            self.stdout.write(queryset.explain())
+
+    def drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+
+    def create_indexes(self):
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
@@ -0,0 +1,50 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.models import Review, Title
+from reviews.search import search
+from reviews.seed import WORDS, seed_catalogue
+
+
+def search_queries(text):
+    """Поиск подстрокой, как TitleFilter.name, и полнотекстовый поиск."""
+    word = text.split()[0]
+    return {
+        'titles: name contains': Title.objects.filter(
+            name__contains=word).order_by('name')[:10],
+        'titles: ?q=': search(Title.objects.all(), text)[:10],
+        'reviews: text contains': Review.objects.filter(
+            text__contains=word).order_by('-pub_date')[:10],
+        'reviews: ?q=': search(Review.objects.all(), text)[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = ('Замер полнотекстового поиска по сравнению с поиском подстрокой '
+            'на синтетических данных')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, metavar='N',
+                            help='Предварительно создать N отзывов')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Сколько раз выполнять каждый запрос')
+        parser.add_argument('--text', default=f'{WORDS[2]} {WORDS[4]}',
+                            help='Поисковый запрос')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            created = seed_catalogue(options['seed'])
+            self.stdout.write(f'Создано: {created}')
+        for name, queryset in search_queries(options['text']).items():
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                found = len(list(queryset.all()))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: найдено {found}, медиана '
+                f'{statistics.median(timings):.3f} мс, '
+                f'макс. {max(timings):.3f} мс'))
+            self.stdout.write(queryset.explain())
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalogue_changed
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт сохранённого рейтинга произведений по отзывам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title-id', type=int, nargs='*',
+                            help='Пересчитать только указанные произведения')
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_id']:
+            titles = titles.filter(pk__in=options['title_id'])
+        with transaction.atomic():
+            rebuild_title_ratings(titles)
+        catalogue_changed.send(sender=self.__class__, documents={})
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {titles.count()} произведений'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = ('Перестроение поискового индекса: таблицы слов без PostgreSQL '
+            'или GIN-индексов на PostgreSQL')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано документов: {indexed}'))
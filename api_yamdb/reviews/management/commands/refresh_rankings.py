@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = ('Обновление списков лучшего в жанрах и популярного по новым '
+            'отзывам; без --once работает постоянно и периодически '
+            'пересчитывает списки полностью')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Обновить списки и завершиться')
+        parser.add_argument('--full', action='store_true',
+                            help='Пересчитать списки по всем отзывам')
+        parser.add_argument('--interval', type=float, default=60,
+                            help='Пауза между обновлениями, секунд')
+        parser.add_argument('--full-interval', type=float,
+                            default=settings.RANKINGS_FULL_INTERVAL,
+                            help='Пауза между полными пересчётами, секунд')
+
+    def handle(self, *args, **options):
+        # Правка оценок и удаление отзывов учитываются только полным
+        # пересчётом, поэтому он повторяется каждые --full-interval.
+        full_at = time.monotonic()
+        if not options['full']:
+            full_at += options['full_interval']
+        while True:
+            full = time.monotonic() >= full_at
+            if full:
+                full_at = time.monotonic() + options['full_interval']
+            reviews, genres = refresh_rankings(full=full)
+            self.stdout.write(f'Учтено отзывов: {reviews}, '
+                              f'пересобрано жанров: {genres}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,180 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_relations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReviewCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('reviews_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+            ],
+            options={
+                'verbose_name': 'Отзывы за день',
+                'verbose_name_plural': 'Отзывы по дням',
+                'ordering': ('day', 'title'),
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreTopTitle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('rating', models.PositiveSmallIntegerField(verbose_name='Рейтинг')),
+                ('reviews_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+            ],
+            options={
+                'verbose_name': 'Лучшее в жанре',
+                'verbose_name_plural': 'Лучшее в жанрах',
+                'ordering': ('genre', 'position'),
+            },
+        ),
+        migrations.CreateModel(
+            name='RankingWatermark',
+            fields=[
+                ('name', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Рейтинг')),
+                ('pub_date', models.DateTimeField(verbose_name='Учтены отзывы до')),
+            ],
+            options={
+                'verbose_name': 'Отметка обновления рейтинга',
+                'verbose_name_plural': 'Отметки обновления рейтингов',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=16, verbose_name='Тип документа')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Документ')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Оценок 10')),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+                'verbose_name_plural': 'Статистика оценок',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingTitle',
+            fields=[
+                ('position', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Место')),
+                ('reviews_count', models.PositiveIntegerField(verbose_name='Отзывов за период')),
+            ],
+            options={
+                'verbose_name': 'Популярное произведение',
+                'verbose_name_plural': 'Популярные произведения',
+                'ordering': ('position',),
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Средняя оценка произведения', null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, help_text='Поддерживается автоматически при изменении отзывов', verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, help_text='Поддерживается автоматически при изменении отзывов', verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.PositiveSmallIntegerField(help_text='Год выпуска произведения', null=True, validators=[reviews.validators.validate_year], verbose_name='Год выпуска'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date', '-id'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date', '-id'], name='review_title_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name'], name='title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ),
+        migrations.AddField(
+            model_name='trendingtitle',
+            name='title',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['kind', 'term', 'object_id'], name='search_term_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['kind', 'object_id'], name='search_document_idx'),
+        ),
+        migrations.AddField(
+            model_name='genretoptitle',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='top_titles', to='reviews.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AddField(
+            model_name='genretoptitle',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddField(
+            model_name='dailyreviewcount',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddConstraint(
+            model_name='genretoptitle',
+            constraint=models.UniqueConstraint(fields=('genre', 'position'), name='unique_genre_position'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyreviewcount',
+            index=models.Index(fields=['day'], name='daily_review_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyreviewcount',
+            constraint=models.UniqueConstraint(fields=('title', 'day'), name='unique_title_day'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+"""Title.genre переходит с автоматической таблицы на модель GenreTitle.
+
+До перехода связи жанров хранились в reviews_title_genre, а
+reviews_genretitle заполнялась отдельно (импорт genre_title.csv). Связи
+из старой таблицы переносятся в GenreTitle без повторов, после чего
+старая таблица удаляется, а поле меняется только в состоянии миграций.
+"""
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def genre_through(apps):
+    """Автоматическая промежуточная модель поля в состоянии до перехода."""
+    Title = apps.get_model('reviews', 'Title')
+    return Title._meta.get_field('genre').remote_field.through
+
+
+def copy_to_genre_title(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    through = genre_through(apps)
+    db_alias = schema_editor.connection.alias
+    links, duplicates = set(), []
+    for pk, title_id, genre_id in (GenreTitle.objects.using(db_alias)
+                                   .order_by('pk')
+                                   .values_list('pk', 'title_id', 'genre_id')
+                                   .iterator()):
+        if (title_id, genre_id) in links:
+            duplicates.append(pk)
+        links.add((title_id, genre_id))
+    for start in range(0, len(duplicates), BATCH_SIZE):
+        GenreTitle.objects.using(db_alias).filter(
+            pk__in=duplicates[start:start + BATCH_SIZE]).delete()
+    missing = []
+    for title_id, genre_id in (through.objects.using(db_alias)
+                               .values_list('title_id', 'genre_id')
+                               .iterator()):
+        if (title_id, genre_id) not in links:
+            links.add((title_id, genre_id))
+            missing.append(GenreTitle(title_id=title_id, genre_id=genre_id))
+    GenreTitle.objects.using(db_alias).bulk_create(missing,
+                                                   batch_size=BATCH_SIZE)
+    schema_editor.delete_model(through)
+
+
+def copy_to_auto_table(apps, schema_editor):
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    through = genre_through(apps)
+    db_alias = schema_editor.connection.alias
+    schema_editor.create_model(through)
+    through.objects.using(db_alias).bulk_create(
+        (through(title_id=title_id, genre_id=genre_id)
+         for title_id, genre_id in GenreTitle.objects.using(db_alias)
+         .values_list('title_id', 'genre_id').iterator()),
+        batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_listing_and_rankings'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_genre_title, copy_to_auto_table),
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='title',
+                name='genre',
+                field=models.ManyToManyField(help_text='Жанр произведения', related_name='titles', through='reviews.GenreTitle', to='reviews.Genre', verbose_name='Жанр'),
+            ),
+        ]),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_title'),
+        ),
+    ]
@@ -1,11 +1,60 @@
 from django.core.validators import (MaxValueValidator, MinValueValidator,
                                     RegexValidator)
-from django.db import models
+from django.db import models, transaction
 from reviews.constants import MAX_SCORE, MIN_SCORE
 from reviews.validators import validate_year
 from users.models import User
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям с заранее подгруженными связями."""
+
+    def for_listing(self, fields=None):
+        """Категория и жанры загружаются фиксированным числом запросов.
+
+        Если передан набор полей ответа, выбираются только нужные колонки,
+        а категория и жанры подгружаются, только если они запрошены.
+        """
+        if fields is None:
+            return self.select_related('category').prefetch_related('genre')
+        queryset = self
+        columns = {'id'} | (fields & {'name', 'year', 'rating',
+                                      'description'})
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+            columns |= {'category', 'category__name', 'category__slug'}
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related(models.Prefetch(
+                'genre', queryset=Genre.objects.only('name', 'slug')))
+        return queryset.only(*columns)
+
+    def with_stats(self):
+        """Статистика оценок загружается тем же запросом."""
+        return self.select_related('stats')
+
+
+class AuthoredQuerySet(models.QuerySet):
+    """Запросы к отзывам и комментариям вместе с автором."""
+
+    def for_listing(self, fields=None):
+        """Автор подгружается тем же запросом, что и сами объекты.
+
+        Если передан набор полей ответа, откладывается загрузка ненужных
+        колонок. Внешние ключи и дата публикации выбираются всегда: по ним
+        связанный менеджер проставляет родителя, а пагинация строит курсор.
+        """
+        if fields is None:
+            return self.select_related('author')
+        queryset = self
+        concrete = self.model._meta.concrete_fields
+        columns = {'id', 'pub_date'} | (
+            fields & {field.name for field in concrete})
+        columns |= {field.name for field in concrete if field.is_relation}
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        return queryset.only(*columns)
+
+
 class Category(models.Model):
     """Тут описана модель 'Категория'."""
 
@@ -64,13 +113,13 @@ class Title(models.Model):
         verbose_name='Год выпуска',
         help_text='Год выпуска произведения',
         null=True,
-        db_index=True,
         validators=(validate_year,))
     description = models.CharField(verbose_name='Описание',
                                    help_text='Описание произведения',
                                    max_length=2000,
                                    blank=True)
     genre = models.ManyToManyField(Genre,
+                                   through='GenreTitle',
                                    verbose_name='Жанр',
                                    help_text='Жанр произведения',
                                    related_name='titles')
@@ -80,16 +129,89 @@ class Title(models.Model):
                                  on_delete=models.SET_NULL,
                                  related_name='titles',
                                  null=True)
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        help_text='Поддерживается автоматически при изменении отзывов',
+        default=0)
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        help_text='Поддерживается автоматически при изменении отзывов',
+        default=0)
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        help_text='Средняя оценка произведения',
+        null=True,
+        blank=True)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['category', 'name'],
+                         name='title_category_name_idx'),
+            models.Index(fields=['year', 'name'],
+                         name='title_year_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TitleStats(models.Model):
+    """Распределение оценок произведения: по счётчику на каждую оценку.
+
+    Поля score_<N> — для каждой оценки от MIN_SCORE до MAX_SCORE.
+    Счётчики обновляются при записи отзывов, поэтому чтение статистики —
+    одна строка вне зависимости от числа отзывов.
+    """
+
+    title = models.OneToOneField(Title,
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='stats',
+                                 verbose_name='Произведение')
+    score_1 = models.PositiveIntegerField(verbose_name='Оценок 1',
+                                          default=0)
+    score_2 = models.PositiveIntegerField(verbose_name='Оценок 2',
+                                          default=0)
+    score_3 = models.PositiveIntegerField(verbose_name='Оценок 3',
+                                          default=0)
+    score_4 = models.PositiveIntegerField(verbose_name='Оценок 4',
+                                          default=0)
+    score_5 = models.PositiveIntegerField(verbose_name='Оценок 5',
+                                          default=0)
+    score_6 = models.PositiveIntegerField(verbose_name='Оценок 6',
+                                          default=0)
+    score_7 = models.PositiveIntegerField(verbose_name='Оценок 7',
+                                          default=0)
+    score_8 = models.PositiveIntegerField(verbose_name='Оценок 8',
+                                          default=0)
+    score_9 = models.PositiveIntegerField(verbose_name='Оценок 9',
+                                          default=0)
+    score_10 = models.PositiveIntegerField(verbose_name='Оценок 10',
+                                           default=0)
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+        verbose_name_plural = 'Статистика оценок'
+
+    def __str__(self):
+        return f'Статистика оценок: {self.title_id}'
+
+    @staticmethod
+    def score_field(score):
+        return f'score_{score}'
+
+    @property
+    def histogram(self):
+        return {score: getattr(self, self.score_field(score))
+                for score in range(MIN_SCORE, MAX_SCORE + 1)}
+
+
 class GenreTitle(models.Model):
     """Вспомогательный класс, связывающий жанры и произведения."""
 
@@ -104,6 +226,8 @@ class GenreTitle(models.Model):
         verbose_name = 'Соответствие жанра и произведения'
         verbose_name_plural = 'Таблица соответствия жанров и произведений'
         ordering = ('id',)
+        constraints = [models.UniqueConstraint(fields=['genre', 'title'],
+                                               name='unique_genre_title')]
 
     def __str__(self):
         return f'{self.title} принадлежит жанру(ам) {self.genre}'
@@ -136,16 +260,36 @@ class Review(models.Model):
                                     auto_now_add=True,
                                     db_index=True)
 
+    objects = AuthoredQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('-pub_date',)
         constraints = [models.UniqueConstraint(fields=['title', 'author'],
                                                name='unique_title_author')]
+        indexes = [
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_rating_state = (instance.__dict__.get('title_id'),
+                                         instance.__dict__.get('score'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в post_save, поэтому запись
+        # отзыва и пересчёт рейтинга выполняются в одной транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+        self._loaded_rating_state = (self.title_id, self.score)
+
 
 class Comment(models.Model):
     """Модель Comment (Комментарии)."""
@@ -165,10 +309,130 @@ class Comment(models.Model):
                                     auto_now_add=True,
                                     db_index=True)
 
+    objects = AuthoredQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class SearchEntry(models.Model):
+    """Строка обратного индекса для полнотекстового поиска без Postgres.
+
+    Для каждого слова документа хранится его суммарный вес: вхождения
+    в поля с весом A (название, текст) ценятся выше, чем в описании.
+    """
+
+    kind = models.CharField(verbose_name='Тип документа', max_length=16)
+    object_id = models.PositiveIntegerField(verbose_name='Документ')
+    term = models.CharField(verbose_name='Слово', max_length=64)
+    weight = models.PositiveIntegerField(verbose_name='Вес')
+
+    class Meta:
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['kind', 'term', 'object_id'],
+                         name='search_term_idx'),
+            models.Index(fields=['kind', 'object_id'],
+                         name='search_document_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id} {self.term}'
+
+
+class RankingWatermark(models.Model):
+    """До какой даты публикации отзывы уже учтены в рейтингах."""
+
+    name = models.CharField(verbose_name='Рейтинг', max_length=32,
+                            primary_key=True)
+    pub_date = models.DateTimeField(verbose_name='Учтены отзывы до')
+
+    class Meta:
+        verbose_name = 'Отметка обновления рейтинга'
+        verbose_name_plural = 'Отметки обновления рейтингов'
+
+    def __str__(self):
+        return f'{self.name}: {self.pub_date}'
+
+
+class GenreTopTitle(models.Model):
+    """Место произведения в списке лучших по рейтингу в жанре."""
+
+    genre = models.ForeignKey(Genre,
+                              on_delete=models.CASCADE,
+                              related_name='top_titles',
+                              verbose_name='Жанр')
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='+',
+                              verbose_name='Произведение')
+    rating = models.PositiveSmallIntegerField(verbose_name='Рейтинг')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов')
+
+    class Meta:
+        verbose_name = 'Лучшее в жанре'
+        verbose_name_plural = 'Лучшее в жанрах'
+        ordering = ('genre', 'position')
+        constraints = [models.UniqueConstraint(
+            fields=['genre', 'position'], name='unique_genre_position')]
+
+    def __str__(self):
+        return f'{self.genre_id}: {self.position}. {self.title_id}'
+
+
+class DailyReviewCount(models.Model):
+    """Число отзывов на произведение за день — основа списка популярного.
+    """
+
+    title = models.ForeignKey(Title,
+                              on_delete=models.CASCADE,
+                              related_name='+',
+                              verbose_name='Произведение')
+    day = models.DateField(verbose_name='День')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов')
+
+    class Meta:
+        verbose_name = 'Отзывы за день'
+        verbose_name_plural = 'Отзывы по дням'
+        ordering = ('day', 'title')
+        constraints = [models.UniqueConstraint(
+            fields=['title', 'day'], name='unique_title_day')]
+        indexes = [models.Index(fields=['day'], name='daily_review_day_idx')]
+
+    def __str__(self):
+        return f'{self.day} {self.title_id}: {self.reviews_count}'
+
+
+class TrendingTitle(models.Model):
+    """Место произведения в списке самых обсуждаемых за последние дни."""
+
+    position = models.PositiveIntegerField(verbose_name='Место',
+                                           primary_key=True)
+    title = models.OneToOneField(Title,
+                                 on_delete=models.CASCADE,
+                                 related_name='+',
+                                 verbose_name='Произведение')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Отзывов за период')
+
+    class Meta:
+        verbose_name = 'Популярное произведение'
+        verbose_name_plural = 'Популярные произведения'
+        ordering = ('position',)
+
+    def __str__(self):
+        return f'{self.position}. {self.title_id}'
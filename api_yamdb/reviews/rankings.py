@@ -0,0 +1,131 @@
+"""Материализованные рейтинги: лучшее в жанре и популярное за неделю.
+
+Списки хранятся в таблицах GenreTopTitle и TrendingTitle, уже
+разложенными по местам, поэтому чтение — диапазон по индексу без
+агрегации отзывов. Таблицы обновляет команда refresh_rankings.
+
+Обновление инкрементальное: обрабатываются только отзывы, опубликованные
+после отметки RankingWatermark. Их число по дням добавляется в
+DailyReviewCount, из которой пересобирается список популярного, а
+список лучших пересобирается только в жанрах затронутых произведений.
+Правка оценки и удаление отзывов дату публикации не меняют, поэтому
+такие изменения учитываются полным пересчётом: команда без --once
+повторяет его каждые RANKINGS_FULL_INTERVAL секунд.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from reviews.importer import batched
+from reviews.models import (DailyReviewCount, Genre, GenreTitle,
+                            GenreTopTitle, RankingWatermark, Review, Title,
+                            TrendingTitle)
+
+WATERMARK = 'reviews'
+BATCH_SIZE = 500
+
+
+def add_daily_counts(rows, fresh=False):
+    """Прибавляет к счётчикам по дням строки {title, day, total}.
+
+    fresh — счётчиков ещё нет (полный пересчёт), искать их не нужно.
+    """
+    for batch in batched(rows, BATCH_SIZE):
+        existing = {}
+        if not fresh:
+            existing = {(row.title_id, row.day): row
+                        for row in DailyReviewCount.objects.filter(
+                            title__in={row['title'] for row in batch},
+                            day__in={row['day'] for row in batch})}
+        to_create, to_update = [], []
+        for row in batch:
+            counter = existing.get((row['title'], row['day']))
+            if counter is None:
+                to_create.append(DailyReviewCount(
+                    title_id=row['title'], day=row['day'],
+                    reviews_count=row['total']))
+            else:
+                counter.reviews_count += row['total']
+                to_update.append(counter)
+        DailyReviewCount.objects.bulk_create(to_create)
+        DailyReviewCount.objects.bulk_update(to_update, ['reviews_count'])
+
+
+def rebuild_trending(since):
+    """Пересобирает популярное по счётчикам с дня since включительно."""
+    rows = (DailyReviewCount.objects
+            .filter(day__gte=since)
+            .values('title')
+            .annotate(total=Sum('reviews_count'))
+            .order_by('-total', 'title')[:settings.RANKINGS_SIZE])
+    TrendingTitle.objects.all().delete()
+    TrendingTitle.objects.bulk_create(
+        TrendingTitle(position=position, title_id=row['title'],
+                      reviews_count=row['total'])
+        for position, row in enumerate(rows, 1))
+
+
+def rebuild_genre_top(genre_ids):
+    """Пересобирает лучшее по рейтингу в каждом из жанров genre_ids."""
+    for genre_id in genre_ids:
+        titles = (Title.objects
+                  .filter(genre=genre_id, rating__isnull=False)
+                  .order_by('-rating', '-reviews_count', 'pk')
+                  .values_list('pk', 'rating', 'reviews_count')
+                  [:settings.RANKINGS_SIZE])
+        GenreTopTitle.objects.filter(genre=genre_id).delete()
+        GenreTopTitle.objects.bulk_create(
+            GenreTopTitle(genre_id=genre_id, position=position,
+                          title_id=title_id, rating=rating,
+                          reviews_count=reviews_count)
+            for position, (title_id, rating, reviews_count)
+            in enumerate(titles, 1))
+
+
+def refresh_rankings(full=False, now=None):
+    """Учитывает отзывы после отметки и пересобирает рейтинги.
+
+    Отзывы моложе RANKINGS_SETTLE_DELAY секунд откладываются до
+    следующего запуска: транзакция, начатая раньше, может зафиксировать
+    отзыв с датой публикации до новой отметки. Возвращает число
+    учтённых отзывов и пересобранных жанров.
+    """
+    until = (now or timezone.now()) - timedelta(
+        seconds=settings.RANKINGS_SETTLE_DELAY)
+    window_start = (timezone.localtime(until).date()
+                    - timedelta(days=settings.TRENDING_DAYS - 1))
+    with transaction.atomic():
+        watermark = (RankingWatermark.objects.select_for_update()
+                     .filter(name=WATERMARK).first())
+        full = full or watermark is None
+        reviews = Review.objects.filter(pub_date__lte=until).order_by()
+        if full:
+            DailyReviewCount.objects.all().delete()
+        else:
+            until = max(until, watermark.pub_date)
+            reviews = reviews.filter(pub_date__gt=watermark.pub_date,
+                                     pub_date__lte=until)
+        reviews_count = reviews.count()
+        add_daily_counts(
+            reviews.filter(pub_date__date__gte=window_start)
+            .values('title', day=TruncDate('pub_date'))
+            .annotate(total=Count('pk')),
+            fresh=full)
+        DailyReviewCount.objects.filter(day__lt=window_start).delete()
+        rebuild_trending(window_start)
+        if full:
+            genres = Genre.objects.values_list('pk', flat=True)
+        else:
+            genres = (GenreTitle.objects
+                      .filter(title__in=reviews.values('title'))
+                      .order_by('genre').values_list('genre', flat=True)
+                      .distinct())
+        genres = list(genres)
+        rebuild_genre_top(genres)
+        RankingWatermark.objects.update_or_create(
+            name=WATERMARK, defaults={'pub_date': until})
+    return reviews_count, len(genres)
@@ -0,0 +1,90 @@
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery
+from django.db.models import Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import Review, Title, TitleStats
+
+
+def shift_title_rating(title_id, score_delta, count_delta, using=None):
+    """Атомарно сдвигает сумму оценок и число отзывов произведения.
+
+    Все выражения SET в одном UPDATE видят значения строки до изменения,
+    поэтому средняя оценка считается по уже сдвинутым сумме и количеству.
+    """
+    new_sum = F('score_sum') + score_delta
+    new_count = F('reviews_count') + count_delta
+    Title.objects.using(using).filter(pk=title_id).update(
+        score_sum=new_sum,
+        reviews_count=new_count,
+        rating=Case(
+            When(reviews_count__lte=-count_delta, then=Value(None)),
+            default=new_sum / new_count,
+            output_field=IntegerField()))
+
+
+def shift_score_histogram(title_id, score, delta, using=None):
+    """Сдвигает счётчик оценки score в статистике произведения."""
+    stats = TitleStats.objects.using(using).filter(title_id=title_id)
+    field = TitleStats.score_field(score)
+    if not stats.update(**{field: F(field) + delta}) and delta > 0:
+        # Строки ещё нет: произведение создано в обход сигналов. При
+        # удалении отзывов строку не создаём — при каскадном удалении
+        # произведения её уже удалили.
+        rebuild_score_histograms(Title.objects.using(using).filter(
+            pk=title_id))
+
+
+def rebuild_score_histograms(titles=None):
+    """Пересчитывает счётчики оценок по таблице отзывов.
+
+    Недостающие строки статистики создаются одним INSERT, счётчики
+    обновляются одним UPDATE на весь набор произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    TitleStats.objects.using(titles.db).bulk_create(
+        (TitleStats(title_id=pk) for pk in titles.filter(
+            stats__isnull=True).values_list('pk', flat=True)),
+        ignore_conflicts=True)
+    reviews = (Review.objects
+               .filter(title=OuterRef('pk'))
+               .order_by()
+               .values('title'))
+    counters = {
+        TitleStats.score_field(score): Coalesce(
+            Subquery(reviews.filter(score=score)
+                     .annotate(total=Count('pk')).values('total'),
+                     output_field=IntegerField()),
+            0)
+        for score in range(MIN_SCORE, MAX_SCORE + 1)}
+    TitleStats.objects.using(titles.db).filter(
+        title__in=titles.values('pk')).update(**counters)
+
+
+def rebuild_title_ratings(titles=None):
+    """Пересчитывает рейтинг и статистику оценок по таблице отзывов.
+
+    Рейтинг пересчитывается двумя запросами UPDATE на весь набор
+    произведений, без загрузки строк в память.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    reviews = (Review.objects
+               .filter(title=OuterRef('pk'))
+               .order_by()
+               .values('title'))
+    titles.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total'),
+                     output_field=IntegerField()),
+            0),
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total'),
+                     output_field=IntegerField()),
+            0))
+    titles.update(rating=Case(
+        When(reviews_count=0, then=Value(None)),
+        default=F('score_sum') / F('reviews_count'),
+        output_field=IntegerField()))
+    rebuild_score_histograms(titles)
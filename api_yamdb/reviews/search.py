@@ -0,0 +1,214 @@
+"""Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+На PostgreSQL используется встроенный полнотекстовый поиск: по каждому
+документу строится tsvector с весами полей, а GIN-индекс по тому же
+выражению создаётся после migrate. Индекс выражения Postgres обновляет
+сам, отдельная колонка и триггеры не нужны.
+
+На остальных СУБД (SQLite в тестах и при разработке) документы
+разбиваются на слова и складываются в таблицу SearchEntry, которая
+обновляется сигналами моделей. Слова запроса должны встретиться все,
+ранг — сумма весов найденных слов.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import (BooleanField, Count, FloatField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+from reviews.importer import batched
+from reviews.models import Comment, Review, SearchEntry, Title
+from reviews.signals import catalogue_changed
+
+# Поля документа и их веса в терминах setweight() Postgres.
+DOCUMENTS = {
+    Title: (('name', 'A'), ('description', 'B')),
+    Review: (('text', 'A'),),
+    Comment: (('text', 'A'),),
+}
+# Веса для встроенного индекса, в тех же пропорциях, что у ts_rank.
+WEIGHTS = {'A': 10, 'B': 4, 'C': 2, 'D': 1}
+TERM_LENGTH = 64
+WORD = re.compile(r'\w+')
+
+
+def kind_of(model):
+    return model._meta.model_name
+
+
+def uses_postgres(model):
+    alias = router.db_for_read(model)
+    return connections[alias].vendor == 'postgresql'
+
+
+def config():
+    name = settings.SEARCH_CONFIG
+    if not re.fullmatch(r'\w+', name):
+        raise ValueError(f'Некорректная конфигурация поиска: {name}')
+    return name
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, без однобуквенных."""
+    words = WORD.findall((text or '').lower().replace('ё', 'е'))
+    return [word[:TERM_LENGTH] for word in words if len(word) > 1]
+
+
+# PostgreSQL
+
+def document_sql(model, qualify=True):
+    """Выражение tsvector документа; одно и то же в индексе и запросах."""
+    quote = connections[router.db_for_read(model)].ops.quote_name
+    table = quote(model._meta.db_table)
+    parts = []
+    for name, weight in DOCUMENTS[model]:
+        column = quote(model._meta.get_field(name).column)
+        if qualify:
+            column = f'{table}.{column}'
+        parts.append(f"setweight(to_tsvector('{config()}'::regconfig, "
+                     f"coalesce({column}, '')), '{weight}')")
+    return ' || '.join(parts)
+
+
+def index_name(model):
+    return f'{model._meta.db_table}_search_idx'
+
+
+def create_search_indexes(using='default', **kwargs):
+    """GIN-индексы по документам; вызывается после migrate."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in DOCUMENTS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {index_name(model)} '
+                f'ON {connection.ops.quote_name(model._meta.db_table)} '
+                f'USING gin (({document_sql(model, qualify=False)}))')
+
+
+def search_postgres(queryset, text):
+    document = document_sql(queryset.model)
+    query = 'plainto_tsquery(%s::regconfig, %s)'
+    params = (config(), text)
+    return queryset.annotate(
+        search_match=RawSQL(f'({document}) @@ {query}', params,
+                            output_field=BooleanField()),
+        search_rank=RawSQL(f'ts_rank({document}, {query})', params,
+                           output_field=FloatField()),
+    ).filter(search_match=True)
+
+
+# Встроенный индекс
+
+def document_terms(instance):
+    terms = Counter()
+    for name, weight in DOCUMENTS[type(instance)]:
+        for term in tokenize(getattr(instance, name)):
+            terms[term] += WEIGHTS[weight]
+    return terms
+
+
+def entries(instance):
+    return [SearchEntry(kind=kind_of(type(instance)), object_id=instance.pk,
+                        term=term, weight=weight)
+            for term, weight in document_terms(instance).items()]
+
+
+def index_document(sender, instance, **kwargs):
+    if uses_postgres(sender):
+        return
+    remove_document(sender, instance)
+    SearchEntry.objects.bulk_create(entries(instance))
+
+
+def remove_document(sender, instance, **kwargs):
+    if uses_postgres(sender):
+        return
+    SearchEntry.objects.filter(kind=kind_of(sender),
+                               object_id=instance.pk).delete()
+
+
+def rebuild_search_index(models=None, batch_size=1000):
+    """Перестраивает встроенный индекс; на PostgreSQL создаёт GIN-индексы.
+
+    Возвращает число проиндексированных документов.
+    """
+    indexed = 0
+    for model in models or DOCUMENTS:
+        if uses_postgres(model):
+            create_search_indexes(router.db_for_write(model))
+            continue
+        SearchEntry.objects.filter(kind=kind_of(model)).delete()
+        fields = ['pk'] + [name for name, _ in DOCUMENTS[model]]
+        documents = model._base_manager.only(*fields).order_by().iterator(
+            chunk_size=batch_size)
+        for batch in batched(documents, batch_size):
+            SearchEntry.objects.bulk_create(
+                [entry for document in batch for entry in entries(document)])
+            indexed += len(batch)
+    return indexed
+
+
+def reindex_documents(model, ids, batch_size=1000):
+    """Обновляет встроенный индекс только для документов model с id из ids.
+    """
+    if uses_postgres(model):
+        return
+    fields = ['pk'] + [name for name, _ in DOCUMENTS[model]]
+    for batch in batched(sorted(set(ids)), batch_size):
+        SearchEntry.objects.filter(kind=kind_of(model),
+                                   object_id__in=batch).delete()
+        SearchEntry.objects.bulk_create(
+            entry for document in model._base_manager.filter(
+                pk__in=batch).only(*fields)
+            for entry in entries(document))
+
+
+def search_entries(queryset, text):
+    terms = sorted(set(tokenize(text)))
+    if not terms:
+        return queryset.none()
+    matches = (SearchEntry.objects
+               .filter(kind=kind_of(queryset.model), term__in=terms)
+               .values('object_id')
+               .annotate(matched=Count('term'), rank=Sum('weight'))
+               .filter(matched=len(terms))
+               .order_by())
+    rank = matches.filter(object_id=OuterRef('pk')).values('rank')
+    return queryset.filter(
+        pk__in=matches.values('object_id')
+    ).annotate(search_rank=Subquery(rank, output_field=FloatField()))
+
+
+def search(queryset, text):
+    """Документы, подходящие под запрос, отсортированные по рангу."""
+    if uses_postgres(queryset.model):
+        queryset = search_postgres(queryset, text)
+    else:
+        queryset = search_entries(queryset, text)
+    return queryset.order_by('-search_rank', '-pk')
+
+
+def reindex_after_bulk_changes(sender, documents=None, **kwargs):
+    if all(uses_postgres(model) for model in DOCUMENTS):
+        return
+    if documents is None:
+        rebuild_search_index()
+        return
+    for model, ids in documents.items():
+        if model in DOCUMENTS and ids:
+            reindex_documents(model, ids)
+
+
+for model in DOCUMENTS:
+    post_save.connect(index_document, sender=model,
+                      dispatch_uid=f'search_index_{model.__name__}')
+    post_delete.connect(remove_document, sender=model,
+                        dispatch_uid=f'search_remove_{model.__name__}')
+catalogue_changed.connect(reindex_after_bulk_changes,
+                          dispatch_uid='search_rebuild')
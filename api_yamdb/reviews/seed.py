@@ -0,0 +1,133 @@
+"""Детерминированное наполнение базы синтетическими данными.
+
+Используется командами замеров производительности: при одинаковых
+параметрах данные получаются одинаковыми, поэтому результаты разных
+коммитов можно сравнивать между собой.
+"""
+import random
+import re
+from datetime import datetime, timedelta
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.importer import DATA_DIR, batched, keep_auto_now_add, read_rows
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.ratings import rebuild_title_ratings
+from reviews.signals import catalogue_changed
+from users.models import User
+
+REVIEWS_PER_TITLE = 100
+WORDS = ('фильм', 'книга', 'сюжет', 'герой', 'финал', 'музыка', 'автор',
+         'актёр', 'сцена', 'смысл', 'хорошо', 'плохо', 'скучно', 'ярко')
+
+
+def next_id(model):
+    return (model._base_manager.aggregate(pk=Max('pk'))['pk'] or 0) + 1
+
+
+def text(rng, count=12, vocabulary=WORDS):
+    return ' '.join(rng.choice(vocabulary) for _ in range(count))
+
+
+def fixture_words():
+    """Словарь из текстов csv-фикстур static/data: названий и отзывов.
+
+    Слова отсортированы, поэтому при одном seed тексты совпадают.
+    """
+    words = set()
+    for file_name, column in (('titles.csv', 'name'),
+                              ('review.csv', 'text'),
+                              ('comments.csv', 'text')):
+        for row in read_rows(DATA_DIR / file_name):
+            words.update(re.findall(r'[^\W\d_]{3,}', row[column].lower()))
+    return tuple(sorted(words))
+
+
+def seed_catalogue(reviews, seed=0, batch_size=1000, prefix='seed',
+                   words=WORDS):
+    """Создаёт около `reviews` отзывов вместе со всем, на что они ссылаются.
+
+    На каждое произведение приходится до REVIEWS_PER_TITLE отзывов от
+    разных пользователей, на каждый второй отзыв — один комментарий.
+    Тексты составляются из слов words. Возвращает словарь с количеством
+    созданных объектов.
+    """
+    rng = random.Random(seed)
+    title_count = max(1, -(-reviews // REVIEWS_PER_TITLE))
+    per_title = min(reviews, REVIEWS_PER_TITLE)
+    start = timezone.make_aware(datetime(2020, 1, 1))
+
+    def pub_date():
+        return start + timedelta(seconds=rng.randrange(365 * 24 * 60 * 60))
+
+    with transaction.atomic():
+        first = next_id(User)
+        users = [User(id=first + i, username=f'{prefix}_user_{first + i}',
+                      email=f'{prefix}_user_{first + i}@yamdb.fake')
+                 for i in range(per_title)]
+        User.objects.bulk_create(users, batch_size=batch_size)
+
+        first = next_id(Category)
+        categories = [Category(id=first + i, name=f'{prefix} category {i}',
+                               slug=f'{prefix}-category-{first + i}')
+                      for i in range(5)]
+        Category.objects.bulk_create(categories)
+        first = next_id(Genre)
+        genres = [Genre(id=first + i, name=f'{prefix} genre {i}',
+                        slug=f'{prefix}-genre-{first + i}')
+                  for i in range(20)]
+        Genre.objects.bulk_create(genres)
+
+        first = next_id(Title)
+        titles = [Title(id=first + i, name=f'{text(rng, 3, words)} {i}',
+                        year=rng.randint(1950, 2020),
+                        description=text(rng, 30, words),
+                        category=rng.choice(categories))
+                  for i in range(title_count)]
+        Title.objects.bulk_create(titles, batch_size=batch_size)
+        GenreTitle.objects.bulk_create(
+            (GenreTitle(title=title, genre=genre)
+             for title in titles
+             for genre in rng.sample(genres, rng.randint(1, 3))),
+            batch_size=batch_size)
+
+        def review_objects():
+            pk = next_id(Review)
+            created = 0
+            for title in titles:
+                count = min(per_title, reviews - created)
+                for author in rng.sample(users, count):
+                    yield Review(id=pk, title=title, author=author,
+                                 text=text(rng, 12, words),
+                                 pub_date=pub_date(),
+                                 score=rng.randint(MIN_SCORE, MAX_SCORE))
+                    pk += 1
+                created += count
+
+        counts = {'users': len(users), 'titles': len(titles),
+                  'reviews': 0, 'comments': 0}
+        with keep_auto_now_add(Review, ['pub_date']), \
+                keep_auto_now_add(Comment, ['pub_date']):
+            for batch in batched(review_objects(), batch_size):
+                Review.objects.bulk_create(batch)
+                comments = [Comment(review=review, author=rng.choice(users),
+                                    text=text(rng, 8, words),
+                                    pub_date=pub_date())
+                            for review in batch[::2]]
+                Comment.objects.bulk_create(comments)
+                counts['reviews'] += len(batch)
+                counts['comments'] += len(comments)
+
+        rebuild_title_ratings(Title.objects.filter(pk__gte=titles[0].pk))
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Category, Genre, Title, Review])
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    catalogue_changed.send(sender=seed_catalogue)
+    return counts
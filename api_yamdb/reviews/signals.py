@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from reviews.models import Review, Title, TitleStats
+from reviews.ratings import (rebuild_title_ratings, shift_score_histogram,
+                             shift_title_rating)
+
+# Отправляется после массовых изменений в обход сигналов моделей
+# (bulk_create, update), чтобы сбросить производные данные и кэши.
+# documents — {модель: id} документов поиска, текст которых мог
+# измениться; None — изменено неизвестно что.
+catalogue_changed = Signal()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, using, **kwargs):
+    if created:
+        shift_title_rating(instance.title_id, instance.score, 1, using)
+        shift_score_histogram(instance.title_id, instance.score, 1, using)
+        return
+    old_title_id, old_score = getattr(instance, '_loaded_rating_state',
+                                      (None, None))
+    if old_title_id is None or old_score is None:
+        rebuild_title_ratings(
+            Title.objects.using(using).filter(pk=instance.title_id))
+        return
+    if old_title_id != instance.title_id:
+        shift_title_rating(old_title_id, -old_score, -1, using)
+        shift_title_rating(instance.title_id, instance.score, 1, using)
+    elif old_score != instance.score:
+        shift_title_rating(instance.title_id,
+                           instance.score - old_score, 0, using)
+    else:
+        return
+    shift_score_histogram(old_title_id, old_score, -1, using)
+    shift_score_histogram(instance.title_id, instance.score, 1, using)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, using, **kwargs):
+    shift_title_rating(instance.title_id, -instance.score, -1, using)
+    shift_score_histogram(instance.title_id, instance.score, -1, using)
+
+
+@receiver(post_save, sender=Title)
+def create_title_stats(sender, instance, created, using, raw=False,
+                       **kwargs):
+    if created and not raw:
+        TitleStats.objects.using(using).create(title=instance)
@@ -1,4 +1,13 @@
 from django.contrib import admin
-from .models import User
+from .models import OutboxEmail, User
 
 admin.site.register(User)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created', 'attempts',
+                    'sent_at', 'send_after')
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
+    readonly_fields = ('created', 'sent_at', 'last_error')
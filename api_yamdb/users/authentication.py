@@ -0,0 +1,142 @@
+"""JWT-аутентификация без чтения пользователя из БД на каждый запрос.
+
+APIGetToken кладёт в access-токен имя, роль и флаги пользователя. Для
+проверки прав этого достаточно, поэтому пользователь собирается из
+claims свежего токена или берётся из LRU-кэша процесса, записи которого
+живут USER_CACHE_TTL секунд. В БД запрос уходит только при промахе.
+
+Изменение роли, флагов или имени (сохранение через ORM) отмечает время
+изменения в общем кэше Django. Оно читается на каждом запросе: claims
+токенов, выданных раньше, и записи кэша любого процесса, загруженные
+раньше, после этого не используются.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import User
+
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+
+
+class UserCache:
+    """LRU-кэш состояний пользователей с ограниченным временем жизни."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """Пара (время загрузки, состояние) или None."""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, loaded, state = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return loaded, state
+
+    def set(self, user_id, loaded, state):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic()
+                                     + settings.USER_CACHE_TTL, loaded, state)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+def changed_key(user_id):
+    return f'users:changed:{user_id}'
+
+
+def forget_user(user_id):
+    """Сбрасывает известное состояние пользователя после его изменения."""
+    user_cache.discard(user_id)
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(changed_key(user_id), time.time(), int(lifetime))
+
+
+def build_user(user_id, state):
+    """Экземпляр User с полями из claims; остальные поля отложены."""
+    values = dict(zip(CLAIM_FIELDS, state), id=user_id)
+    names = [field.attname for field in User._meta.concrete_fields
+             if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, names,
+                        [values[name] for name in names])
+
+
+class UserClaimsAccessToken(AccessToken):
+    """Access-токен с временем выдачи и полями для проверки прав."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_exp(claim='iat', lifetime=timedelta())
+        for name in CLAIM_FIELDS:
+            token[name] = getattr(user, name)
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification')
+        # Запись кэша процесса старше изменения, сделанного любым
+        # процессом, не используется.
+        changed = cache.get(changed_key(user_id))
+        entry = user_cache.get(user_id)
+        if entry is None or changed is not None and entry[0] <= changed:
+            entry = (self.state_from_claims(validated_token, changed)
+                     or self.state_from_db(user_id))
+            user_cache.set(user_id, *entry)
+        user = build_user(user_id, entry[1])
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return user
+
+    def state_from_claims(self, token, changed):
+        """Claims годятся, если токен свежий и выдан после изменений."""
+        if any(name not in token for name in CLAIM_FIELDS + ('iat',)):
+            return None
+        if token['iat'] < time.time() - settings.USER_CACHE_TTL:
+            return None
+        if changed is not None and token['iat'] <= changed:
+            return None
+        return token['iat'], tuple(token[name] for name in CLAIM_FIELDS)
+
+    def state_from_db(self, user_id):
+        loaded = time.time()
+        try:
+            user = User.objects.only(*CLAIM_FIELDS).get(pk=user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found',
+                                       code='user_not_found')
+        return loaded, tuple(getattr(user, name) for name in CLAIM_FIELDS)
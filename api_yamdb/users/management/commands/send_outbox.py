@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = ('Отправка писем из очереди пачками через одно SMTP-соединение; '
+            'без --once работает постоянно')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Отправить готовые письма и завершиться')
+        parser.add_argument('--batch-size', type=int,
+                            help='Сколько писем забирать за раз')
+        parser.add_argument('--max-attempts', type=int,
+                            help='Сколько раз пытаться отправить письмо')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Пауза между проверками очереди, секунд')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = deliver_pending(options['batch_size'],
+                                               options['max_attempts'])
+            except Exception as error:
+                # Почтовый сервер недоступен: письма остаются в очереди.
+                if options['once']:
+                    raise
+                self.stderr.write(f'Ошибка отправки: {error}')
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, с ошибкой: {failed}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
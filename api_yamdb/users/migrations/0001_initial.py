@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:09
+
+import django.contrib.auth.models
+from django.db import migrations, models
+import django.utils.timezone
+import users.validators
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('is_staff', models.BooleanField(default=False, help_text='Designates whether the user can log into this admin site.', verbose_name='staff status')),
+                ('is_active', models.BooleanField(default=True, help_text='Designates whether this user should be treated as active. Unselect this instead of deleting accounts.', verbose_name='active')),
+                ('date_joined', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date joined')),
+                ('username', models.CharField(max_length=150, unique=True, validators=[users.validators.username_validation], verbose_name='Имя пользователя')),
+                ('first_name', models.CharField(blank=True, max_length=150, verbose_name='Имя')),
+                ('last_name', models.CharField(blank=True, max_length=150, verbose_name='Фамилия')),
+                ('bio', models.TextField(blank=True, verbose_name='Биография')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Email')),
+                ('role', models.CharField(choices=[('admin', 'Администратор'), ('moderator', 'Модератор'), ('user', 'Пользователь')], default='user', max_length=150)),
+                ('confirmation_code', models.CharField(blank=True, max_length=150, verbose_name='Код для идентификации')),
+                ('groups', models.ManyToManyField(blank=True, related_name='users_groups', to='auth.Group', verbose_name='группы')),
+                ('user_permissions', models.ManyToManyField(blank=True, related_name='users_permissions', to='auth.Permission', verbose_name='разрешения')),
+            ],
+            options={
+                'ordering': ('username',),
+            },
+            managers=[
+                ('objects', django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 from .validators import username_validation
 
@@ -79,3 +80,36 @@ class User(AbstractUser):
     @property
     def is_user(self):
         return self.role == User.USER
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    message = models.TextField(verbose_name='Текст письма')
+    from_email = models.EmailField(verbose_name='Отправитель',
+                                   max_length=settings.MAX_LENGTH_EMAIL)
+    recipient = models.EmailField(verbose_name='Получатель',
+                                  max_length=settings.MAX_LENGTH_EMAIL)
+    created = models.DateTimeField(verbose_name='Поставлено в очередь',
+                                   auto_now_add=True)
+    send_after = models.DateTimeField(verbose_name='Отправить не раньше',
+                                      default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки', default=0)
+    sent_at = models.DateTimeField(verbose_name='Отправлено',
+                                   null=True, blank=True)
+    last_error = models.TextField(verbose_name='Последняя ошибка',
+                                  blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['sent_at', 'send_after'],
+                         name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipient}'
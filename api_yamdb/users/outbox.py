@@ -0,0 +1,110 @@
+"""Очередь исходящих писем в базе данных.
+
+Запрос только сохраняет письмо в таблицу, а отправкой занимается
+отдельный процесс (команда send_outbox): он забирает письма пачками и
+отправляет их через одно SMTP-соединение, повторяя неудачные попытки с
+экспоненциально растущей паузой. Забранные письма не блокируются на
+время отправки, а откладываются на OUTBOX_LEASE секунд.
+"""
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue(subject, message, recipient_list, from_email=None):
+    """Ставит письмо в очередь, по одной строке на получателя."""
+    return OutboxEmail.objects.bulk_create(
+        OutboxEmail(subject=subject, message=message,
+                    from_email=from_email or settings.FROM_EMAIL,
+                    recipient=recipient)
+        for recipient in recipient_list)
+
+
+def pending(max_attempts):
+    return OutboxEmail.objects.filter(sent_at__isnull=True,
+                                      attempts__lt=max_attempts,
+                                      send_after__lte=timezone.now())
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size, max_attempts):
+    """Забирает пачку писем: короткая транзакция сдвигает их send_after
+    на OUTBOX_LEASE секунд, и другие обработчики их не видят.
+
+    Если обработчик упадёт, не записав результат, письма снова станут
+    готовы к отправке, когда аренда истечёт.
+    """
+    with transaction.atomic():
+        emails = list(pending(max_attempts)
+                      .select_for_update(skip_locked=True)[:batch_size])
+        lease = timezone.now() + timedelta(seconds=settings.OUTBOX_LEASE)
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]).update(send_after=lease)
+    return emails
+
+
+def send(connection, email):
+    message = EmailMessage(subject=email.subject, body=email.message,
+                           from_email=email.from_email,
+                           to=[email.recipient], connection=connection)
+    try:
+        message.send()
+    except SMTPServerDisconnected:
+        # Сервер закрыл соединение (простой, лимит писем на сессию):
+        # письмо повторяется один раз через новое соединение.
+        connection.close()
+        connection.open()
+        message.send()
+
+
+def deliver_batch(connection, batch_size=None, max_attempts=None):
+    """Отправляет одну пачку писем; возвращает (отправлено, с ошибкой).
+
+    Письма отправляются вне транзакции, результат каждого записывается
+    сразу после отправки.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+    sent = failed = 0
+    for email in claim(batch_size, max_attempts):
+        email.attempts += 1
+        try:
+            send(connection, email)
+        except Exception as error:
+            email.send_after = timezone.now() + retry_delay(email.attempts)
+            email.last_error = f'{type(error).__name__}: {error}'
+            email.save(update_fields=('attempts', 'send_after',
+                                      'last_error'))
+            failed += 1
+        else:
+            email.sent_at = timezone.now()
+            email.save(update_fields=('attempts', 'sent_at'))
+            sent += 1
+    return sent, failed
+
+
+def deliver_pending(batch_size=None, max_attempts=None):
+    """Отправляет всё, что готово к отправке, через одно соединение."""
+    total_sent = total_failed = 0
+    connection = get_connection()
+    connection.open()
+    try:
+        while True:
+            sent, failed = deliver_batch(connection, batch_size,
+                                         max_attempts)
+            total_sent += sent
+            total_failed += failed
+            if not sent and not failed:
+                return total_sent, total_failed
+    finally:
+        connection.close()
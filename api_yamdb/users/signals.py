@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+
+from .authentication import CLAIM_FIELDS, forget_user
+from .models import User
+
+
+def forget_changed_user(sender, instance, created=False, update_fields=None,
+                        **kwargs):
+    # Сохранение только, например, last_login или кода подтверждения
+    # не меняет права пользователя.
+    if created or (update_fields is not None
+                   and not set(update_fields) & set(CLAIM_FIELDS)):
+        return
+    forget_user(instance.pk)
+
+
+post_save.connect(forget_changed_user, sender=User,
+                  dispatch_uid='users_forget_saved_user')
+post_delete.connect(forget_changed_user, sender=User,
+                    dispatch_uid='users_forget_deleted_user')
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', password='1234567'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother', email='testuseranother@yamdb.fake',
+        password='1234567'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake',
+        password='1234567', role='admin'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def admin_client(admin):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@pytest.fixture
+def titles():
+    from reviews.models import Category, Genre, Title
+
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = [Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+              for i in range(3)]
+    result = []
+    for i in range(5):
+        title = Title.objects.create(name=f'Произведение {i}', year=2000 + i,
+                                     category=category)
+        title.genre.set(genres[:i % 3 + 1])
+        result.append(title)
+    return result
+
+
+@pytest.fixture
+def reviews(titles, user, another_user):
+    from reviews.models import Comment, Review
+
+    title = titles[0]
+    result = []
+    for score, author in ((7, user), (9, another_user)):
+        review = Review.objects.create(title=title, author=author,
+                                       score=score, text='Отзыв')
+        for _ in range(3):
+            Comment.objects.create(review=review, author=author,
+                                   text='Комментарий')
+        result.append(review)
+    return result
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def assert_no_n_plus_one():
+    """Контекст, который падает при N+1 внутри блока with."""
+    from contextlib import contextmanager
+
+    from api.queries import detect_queries
+
+    @contextmanager
+    def check(threshold=None):
+        with detect_queries(threshold, slow_ms=float('inf')) as report:
+            yield report
+        assert not report.repeated, '\n'.join(report.lines())
+    return check
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import UserCache, changed_key, user_cache
+from users.models import User
+
+STATS = '/api/v1/cache/stats/'
+
+
+def token_client(user):
+    client = APIClient()
+    response = client.post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user)})
+    assert response.status_code == 201
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client, response.json()['token']
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+
+    def test_token_has_claims(self, admin):
+        _, token = token_client(admin)
+        claims = AccessToken(token)
+        assert claims['username'] == admin.username
+        assert claims['role'] == 'admin'
+        assert 'iat' in claims
+
+    def test_user_is_resolved_without_queries(self, admin,
+                                              django_assert_num_queries):
+        client, _ = token_client(admin)
+        with django_assert_num_queries(0):
+            assert client.get(STATS).status_code == 200
+        user_cache.clear()
+        with django_assert_num_queries(0):
+            assert client.get(STATS).status_code == 200
+
+    def test_stale_claims_are_not_trusted(self, admin, settings,
+                                          django_assert_num_queries):
+        client, _ = token_client(admin)
+        settings.USER_CACHE_TTL = -1
+        with django_assert_num_queries(1):
+            assert client.get(STATS).status_code == 200
+
+    def test_role_change_is_applied(self, user, admin_client,
+                                    django_assert_num_queries):
+        client, _ = token_client(user)
+        assert client.get(STATS).status_code == 403
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      {'role': 'admin'})
+        assert response.status_code == 200
+        with django_assert_num_queries(1):
+            assert client.get(STATS).status_code == 200
+        with django_assert_num_queries(0):
+            assert client.get(STATS).status_code == 200
+
+    def test_change_in_other_process_is_applied(self, user,
+                                                django_assert_num_queries):
+        client, _ = token_client(user)
+        assert client.get(STATS).status_code == 403
+        assert user_cache.get(user.pk) is not None
+        # Другой процесс меняет роль: его кэш сброшен, кэш этого — нет.
+        User.objects.filter(pk=user.pk).update(role='admin')
+        cache.set(changed_key(user.pk), time.time())
+        with django_assert_num_queries(1):
+            assert client.get(STATS).status_code == 200
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        cache.set(changed_key(user.pk), time.time())
+        assert client.get(STATS).status_code == 401
+
+    def test_deleted_user_is_rejected(self, user, admin_client):
+        client, _ = token_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_me_returns_full_profile(self, user):
+        user.bio = 'о себе'
+        user.save()
+        client, _ = token_client(user)
+        response = client.patch('/api/v1/users/me/', {'first_name': 'Имя'})
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == 'о себе'
+        assert response.json()['role'] == 'user'
+
+
+def test_user_cache_is_bounded(settings):
+    settings.USER_CACHE_SIZE = 2
+    cache = UserCache()
+    for user_id in range(3):
+        cache.set(user_id, 1.0, ('name',))
+    assert cache.get(0) is None
+    assert cache.get(2) == (1.0, ('name',))
+    settings.USER_CACHE_TTL = -1
+    cache.set(5, 1.0, ('name',))
+    assert cache.get(5) is None
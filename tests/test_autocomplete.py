@@ -0,0 +1,80 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from api.autocomplete import PrefixTrie, similarity
+
+USERS = '/api/v1/users/'
+
+
+def test_prefix_trie():
+    trie = PrefixTrie()
+    for position, key in enumerate(('фантастика', 'фэнтези', 'драма')):
+        trie.insert(key, position)
+    assert sorted(trie.values('ф')) == [0, 1]
+    assert trie.values('фан') == [0]
+    assert trie.values('х') == []
+
+
+def test_similarity():
+    assert similarity('фантастика', 'фантастика') == 1
+    assert similarity('фонтастика', 'фантастика') > 0.3
+    assert similarity('драма', 'фантастика') < 0.3
+
+
+def test_hook_is_required():
+    from api.mixins import AutocompleteMixin
+
+    with pytest.raises(ImproperlyConfigured):
+        type('Broken', (AutocompleteMixin,), {})
+
+
+@pytest.mark.django_db
+class TestAutocomplete:
+
+    @pytest.fixture
+    def catalogue(self):
+        from reviews.models import Genre
+        for name, slug in (('Научная фантастика', 'sci-fi'),
+                           ('Фэнтези', 'fantasy'), ('Драма', 'drama')):
+            Genre.objects.create(name=name, slug=slug)
+
+    def test_genres_prefix(self, client, catalogue, django_assert_num_queries):
+        response = client.get('/api/v1/genres/?autocomplete=фан')
+        assert response.status_code == 200
+        assert response.json() == [{'name': 'Научная фантастика',
+                                    'slug': 'sci-fi'}]
+        # дерево уже построено: повторный запрос не обращается к БД
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/genres/?autocomplete=Ф')
+        assert [genre['slug'] for genre in response.json()] == [
+            'sci-fi', 'fantasy']
+
+    def test_genres_fuzzy(self, client, catalogue):
+        response = client.get('/api/v1/genres/?autocomplete=драмма')
+        assert [genre['slug'] for genre in response.json()] == ['drama']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_follows_changes(self, client, catalogue, admin_client):
+        admin_client.post('/api/v1/categories/', {'name': 'Фильм',
+                                                  'slug': 'movie'})
+        response = client.get('/api/v1/categories/?autocomplete=фил')
+        assert response.json() == [{'name': 'Фильм', 'slug': 'movie'}]
+        admin_client.delete('/api/v1/categories/movie/')
+        response = client.get('/api/v1/categories/?autocomplete=фил')
+        assert response.json() == []
+
+    def test_users(self, admin_client, django_user_model):
+        for username in ('alice', 'alina', 'albert', 'bob'):
+            django_user_model.objects.create(
+                username=username, email=f'{username}@yamdb.fake')
+        response = admin_client.get(f'{USERS}?autocomplete=ali')
+        assert [user['username'] for user in response.json()] == [
+            'alice', 'alina']
+        response = admin_client.get(f'{USERS}?autocomplete=al&limit=1')
+        assert [user['username'] for user in response.json()] == ['albert']
+        response = admin_client.get(f'{USERS}?autocomplete=alise')
+        assert response.json()[0]['username'] == 'alice'
+
+    def test_users_admin_only(self, user_client):
+        response = user_client.get(f'{USERS}?autocomplete=a')
+        assert response.status_code == 403
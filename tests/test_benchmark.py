@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestBenchmarkApi:
+
+    def run(self, output, *args):
+        call_command('benchmark_api', '--requests', '10', '--warmup', '2',
+                     '--output', str(output), *args)
+        with open(output, encoding='utf-8') as file:
+            return json.load(file)
+
+    def test_report(self, tmp_path, capsys):
+        report = self.run(tmp_path / 'first.json', '--seed', '300',
+                          '--from-csv')
+        assert report['runner'] == 'client'
+        assert report['database'] == 'sqlite'
+        assert set(report['scenarios']) == {'browse', 'threads',
+                                            'post_review', 'admin_users'}
+        for name, result in report['scenarios'].items():
+            assert result['requests'] == 10
+            assert result['errors'] == 0, (name, result['statuses'])
+            assert result['latency_ms']['p50'] > 0
+            assert result['queries_per_request'] > 0
+        assert report['scenarios']['post_review']['statuses'] == {'201': 10}
+        # Пользователи и отзывы сценариев откатываются.
+        assert not User.objects.filter(
+            username__startswith='bench_api').exists()
+        second = self.run(tmp_path / 'second.json', '--scenario', 'browse',
+                          '--compare', str(tmp_path / 'first.json'))
+        assert set(second['scenarios']) == {'browse'}
+        assert 'browse: p50' in capsys.readouterr().out
+
+    def test_requires_data(self, tmp_path):
+        with pytest.raises(Exception, match='--seed'):
+            self.run(tmp_path / 'report.json')
+
+
+@pytest.mark.django_db
+def test_benchmark_indexes_title_without_genre(titles, reviews, capsys):
+    titles[0].genre.clear()
+    call_command('benchmark_indexes', '--repeat', '1')
+    out = capsys.readouterr().out
+    assert 'titles by category' in out
+    assert 'titles by genre' in out
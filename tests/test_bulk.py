@@ -0,0 +1,152 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from reviews.models import Category, Genre, Title, TitleStats
+
+
+def test_upsert_hook_is_required():
+    from api.mixins import BulkUpsertMixin
+    from api.serializers import BulkGenreSerializer
+
+    with pytest.raises(ImproperlyConfigured):
+        type('Broken', (BulkUpsertMixin,),
+             {'bulk_serializer_class': BulkGenreSerializer})
+
+
+@pytest.mark.django_db
+class TestBulkCatalogue:
+
+    def test_create_and_update_by_slug(self, admin_client):
+        Genre.objects.create(name='Старое', slug='drama')
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        assert response.status_code == 201
+        assert response.json() == {'results': [
+            {'index': 0, 'status': 'updated', 'slug': 'drama'},
+            {'index': 1, 'status': 'created', 'slug': 'comedy'},
+        ], 'errors': []}
+        assert dict(Genre.objects.values_list('slug', 'name')) == {
+            'drama': 'Драма', 'comedy': 'Комедия'}
+
+    def test_partial_errors(self, admin_client):
+        Category.objects.create(name='Фильм', slug='movie')
+        response = admin_client.post('/api/v1/categories/bulk/', [
+            {'name': 'Книга', 'slug': 'book'},
+            {'name': 'Фильм', 'slug': 'film'},
+            {'name': 'Ещё книга', 'slug': 'book'},
+            {'name': 'Без слага'},
+            'не объект',
+        ], format='json')
+        assert response.status_code == 207
+        data = response.json()
+        assert [item['index'] for item in data['results']] == [0]
+        assert [item['index'] for item in data['errors']] == [1, 2, 3, 4]
+        assert 'name' in data['errors'][0]['errors']
+        assert 'slug' in data['errors'][1]['errors']
+        assert Category.objects.count() == 2
+
+    def test_concurrent_insert(self, admin_client, monkeypatch):
+        manager = Category.objects
+        read = manager.filter
+
+        def read_then_insert(*args, **kwargs):
+            # Другой запрос вставляет тот же слаг после чтения пачки.
+            known = list(read(*args, **kwargs))
+            manager.create(name='Фильм', slug='movie')
+            return known
+
+        monkeypatch.setattr(manager, 'filter', read_then_insert)
+        response = admin_client.post('/api/v1/categories/bulk/', [
+            {'name': 'Кино', 'slug': 'movie'},
+            {'name': 'Книга', 'slug': 'book'},
+        ], format='json')
+        assert response.status_code == 207
+        data = response.json()
+        assert data['results'] == [
+            {'index': 1, 'status': 'created', 'slug': 'book'}]
+        assert [item['index'] for item in data['errors']] == [0]
+        monkeypatch.undo()
+        assert dict(Category.objects.values_list('slug', 'name')) == {
+            'movie': 'Фильм', 'book': 'Книга'}
+
+    def test_nothing_valid(self, admin_client):
+        response = admin_client.post('/api/v1/categories/bulk/',
+                                     [{'slug': 'book'}], format='json')
+        assert response.status_code == 400
+        response = admin_client.post('/api/v1/categories/bulk/',
+                                     {'slug': 'book'}, format='json')
+        assert response.status_code == 400
+
+    def test_limit(self, admin_client, settings):
+        settings.BULK_MAX_ITEMS = 1
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        assert response.status_code == 400
+        assert not Genre.objects.exists()
+
+    def test_admin_only(self, client, user_client):
+        payload = [{'name': 'Драма', 'slug': 'drama'}]
+        assert client.post('/api/v1/genres/bulk/', payload,
+                           content_type='application/json').status_code == 401
+        assert user_client.post('/api/v1/genres/bulk/', payload,
+                                format='json').status_code == 403
+
+    def test_queries_do_not_grow_with_items(self, admin_client,
+                                            django_assert_max_num_queries):
+        payload = [{'name': f'Жанр {i}', 'slug': f'genre-{i}'}
+                   for i in range(100)]
+        with django_assert_max_num_queries(10):
+            response = admin_client.post('/api/v1/genres/bulk/', payload,
+                                         format='json')
+        assert response.status_code == 201
+        assert Genre.objects.count() == 100
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    def test_create_and_update(self, admin_client, titles):
+        title = titles[0]
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Новое', 'year': 2020, 'category': 'movie',
+             'genre': ['genre-1', 'genre-2', 'genre-1']},
+            {'id': title.id, 'name': 'Переименовано', 'genre': []},
+        ], format='json')
+        assert response.status_code == 201
+        created, updated = response.json()['results']
+        assert updated == {'index': 1, 'status': 'updated', 'id': title.id}
+        new = Title.objects.get(pk=created['id'])
+        assert new.category.slug == 'movie'
+        assert sorted(new.genre.values_list('slug', flat=True)) == [
+            'genre-1', 'genre-2']
+        assert TitleStats.objects.filter(title=new).exists()
+        title.refresh_from_db()
+        assert title.name == 'Переименовано'
+        assert title.year == 2000
+        assert not title.genre.exists()
+        listed = admin_client.get(f'/api/v1/titles/{new.id}/').json()
+        assert listed['name'] == 'Новое'
+
+    def test_unknown_references(self, admin_client, titles):
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Новое', 'year': 2020, 'category': 'unknown'},
+            {'name': 'Новое', 'year': 2020, 'genre': ['genre-0', 'nope']},
+            {'id': 0, 'name': 'Нет такого'},
+            {'id': 10 ** 6, 'name': 'Нет такого'},
+            {'id': titles[1].id, 'category': None},
+        ], format='json')
+        assert response.status_code == 207
+        data = response.json()
+        assert [item['index'] for item in data['results']] == [4]
+        errors = {item['index']: item['errors'] for item in data['errors']}
+        assert set(errors[0]) == {'category'}
+        assert set(errors[1]) == {'genre'}
+        assert set(errors[2]) == {'id'}
+        assert set(errors[3]) == {'id'}
+        assert Title.objects.count() == len(titles)
+        titles[1].refresh_from_db()
+        assert titles[1].category is None
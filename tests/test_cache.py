@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+
+from api.cache import TITLES, get_generation
+from reviews.models import Category
+
+# Кэш сбрасывается после фиксации транзакции, поэтому тесты сброса
+# выполняются с настоящими транзакциями (transaction=True).
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_get_is_served_from_cache(self, client, titles,
+                                               django_assert_num_queries):
+        first = client.get('/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/')
+        assert second['X-Cache'] == 'HIT'
+        assert second.json() == first.json()
+
+    def test_hit_is_one_cache_read(self, client, titles, monkeypatch):
+        client.get('/api/v1/categories/')
+        reads = []
+        get = cache.get
+
+        def get_many(keys):
+            reads.append(keys)
+            values = {key: get(key) for key in keys}
+            return {key: value for key, value in values.items()
+                    if value is not None}
+
+        monkeypatch.setattr(cache, 'get', lambda *args: reads.append(args))
+        monkeypatch.setattr(cache, 'get_many', get_many)
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT'
+        # ETag до и после ответа и один get_many за поколением и ответом.
+        assert len(reads) == 3
+        assert any(any(key.startswith('api:response:') for key in keys)
+                   for keys in reads)
+
+    def test_query_string_is_part_of_key(self, client, titles):
+        client.get('/api/v1/titles/?limit=1')
+        response = client.get('/api/v1/titles/?limit=2')
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results']) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_invalidates_titles(self, client, user_client, titles):
+        url = f'/api/v1/titles/{titles[0].id}/'
+        assert client.get(url).json()['rating'] is None
+        user_client.post(f'{url}reviews/', {'text': 'Отзыв', 'score': 8})
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 8
+
+    @pytest.mark.django_db(transaction=True)
+    def test_category_change_invalidates_titles(self, client, titles):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/categories/')
+        category = titles[0].category
+        category.name = 'Кино'
+        category.save()
+        for url in ('/api/v1/titles/', '/api/v1/categories/'):
+            assert client.get(url)['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_assignment_invalidates_titles(self, client, titles):
+        from reviews.models import Genre
+
+        client.get('/api/v1/titles/')
+        titles[0].genre.add(Genre.objects.create(name='Новый', slug='new'))
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+
+    def test_stats(self, client, admin_client, user_client, titles):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+        stats = admin_client.get('/api/v1/cache/stats/').json()
+        assert stats['hits'] >= 1
+        assert stats['misses'] >= 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalidated_after_commit(self):
+        generation = get_generation(TITLES)
+        with transaction.atomic():
+            Category.objects.create(name='Кино', slug='movie')
+            # Читатель до фиксации видит старые строки и старое поколение.
+            assert get_generation(TITLES) == generation
+        assert get_generation(TITLES) != generation
+
+
+def test_local_cache_rejected(settings):
+    from api.checks import check_shared_cache
+
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    assert [error.id for error in check_shared_cache(None)] == ['api.E001']
+    settings.DEBUG = True
+    assert check_shared_cache(None) == []
+    settings.DEBUG = False
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': 'memcached:11211'}}
+    assert check_shared_cache(None) == []
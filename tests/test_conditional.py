@@ -0,0 +1,69 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_titles_not_modified(self, client, titles,
+                                 django_assert_num_queries):
+        response = client.get('/api/v1/titles/')
+        etag = response['ETag']
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+
+    def test_if_modified_since(self, client, titles):
+        response = client.get(f'/api/v1/titles/{titles[0].id}/')
+        response = client.get(
+            f'/api/v1/titles/{titles[0].id}/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304
+
+    def test_etag_depends_on_query_string(self, client, titles):
+        etag = client.get('/api/v1/titles/?limit=1')['ETag']
+        response = client.get('/api/v1/titles/?limit=2',
+                              HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_write_changes_etag(self, client, user_client, reviews,
+                                       django_assert_num_queries):
+        title_id = reviews[0].title_id
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(0):
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        review = reviews[0]
+        review.text = 'Новый текст'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comment_write_changes_only_its_review(self, client, reviews):
+        from reviews.models import Comment
+
+        first, second = reviews
+        comments_url = (f'/api/v1/titles/{first.title_id}/reviews/'
+                        f'{first.id}/comments/')
+        reviews_url = f'/api/v1/titles/{first.title_id}/reviews/'
+        comments_etag = client.get(comments_url)['ETag']
+        reviews_etag = client.get(reviews_url)['ETag']
+        Comment.objects.create(review=first, author=second.author,
+                               text='Ещё комментарий')
+        assert client.get(comments_url,
+                          HTTP_IF_NONE_MATCH=comments_etag).status_code == 200
+        assert client.get(reviews_url,
+                          HTTP_IF_NONE_MATCH=reviews_etag).status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_username_change_changes_review_etag(self, client, reviews):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/'
+        etag = client.get(url)['ETag']
+        author = reviews[0].author
+        author.username = 'Renamed'
+        author.save()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
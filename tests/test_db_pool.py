@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import ConnectionHandler, OperationalError
+
+from api_yamdb.db import pool
+from api_yamdb.db.pool import ConnectionPool
+
+
+@pytest.fixture
+def database(tmp_path, django_db_blocker):
+    """Настройки БД-файла SQLite с бэкендом api_yamdb.db.sqlite3."""
+    with django_db_blocker.unblock():
+        yield {'ENGINE': 'api_yamdb.db.sqlite3',
+               'NAME': str(tmp_path / 'pool.sqlite3')}
+    pool.close_pools()
+    pool.opened.pop('pooled', None)
+
+
+def wrapper(settings_dict):
+    return ConnectionHandler({DEFAULT_DB_ALIAS: {},
+                              'pooled': dict(settings_dict)})['pooled']
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool:
+
+    def test_reuses_released(self):
+        connection_pool = ConnectionPool(2, 1)
+        first = connection_pool.acquire(FakeConnection)
+        connection_pool.release(first)
+        assert connection_pool.acquire(FakeConnection) is first
+        stats = connection_pool.stats()
+        assert (stats['in_use'], stats['idle'], stats['acquired']) == (1, 0, 2)
+
+    def test_timeout(self):
+        connection_pool = ConnectionPool(1, 0.05)
+        connection_pool.acquire(FakeConnection)
+        with pytest.raises(OperationalError):
+            connection_pool.acquire(FakeConnection)
+        assert connection_pool.stats()['timeouts'] == 1
+
+    def test_waits_for_release(self):
+        connection_pool = ConnectionPool(1, 5)
+        first = connection_pool.acquire(FakeConnection)
+        timer = threading.Timer(0.05, connection_pool.release, (first,))
+        timer.start()
+        assert connection_pool.acquire(FakeConnection) is first
+        timer.join()
+        assert connection_pool.stats()['waits'][-1] >= 0.04
+
+    def test_discards_broken(self):
+        connection_pool = ConnectionPool(1, 1, check=lambda connection: False)
+        first = connection_pool.acquire(FakeConnection)
+        connection_pool.release(first)
+        second = connection_pool.acquire(FakeConnection)
+        assert second is not first and first.closed
+        assert connection_pool.stats()['discarded'] == 1
+
+    def test_failed_connect_frees_slot(self):
+        connection_pool = ConnectionPool(1, 0.05)
+
+        def fail():
+            raise OperationalError('нет связи')
+
+        with pytest.raises(OperationalError):
+            connection_pool.acquire(fail)
+        assert connection_pool.acquire(FakeConnection)
+
+
+class TestPooledBackend:
+
+    def test_pool(self, database):
+        first = wrapper({**database, 'POOL_SIZE': 2})
+        second = wrapper({**database, 'POOL_SIZE': 2})
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        second.ensure_connection()
+        assert second.connection is raw
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert pool.opened['pooled'] == 1
+        assert pool.pools()['pooled'].stats()['in_use'] == 1
+        second.close()
+
+    def test_requires_conn_max_age_zero(self, database):
+        connection = wrapper({**database, 'POOL_SIZE': 2,
+                              'CONN_MAX_AGE': 60})
+        with pytest.raises(ImproperlyConfigured, match='CONN_MAX_AGE'):
+            connection.ensure_connection()
+
+    def test_closed_in_atomic_not_reused(self, database):
+        connection = wrapper({**database, 'POOL_SIZE': 1})
+        connection.ensure_connection()
+        connection.set_autocommit(False)
+        connection.in_atomic_block = True
+        connection.close()
+        assert pool.pools()['pooled'].stats()['discarded'] == 1
+
+    @pytest.mark.parametrize('health_checks, reopened',
+                             ((True, True), (False, False)))
+    def test_health_checks(self, database, health_checks, reopened):
+        connection = wrapper({**database, 'CONN_MAX_AGE': 60,
+                              'CONN_HEALTH_CHECKS': health_checks})
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.is_usable = lambda: False
+        # Начало следующего ответа.
+        connection.close_if_unusable_or_obsolete()
+        connection.ensure_connection()
+        assert (connection.connection is not raw) == reopened
+        assert pool.opened['pooled'] == 1 + reopened
+        connection.close()
+
+
+@pytest.mark.django_db
+class TestConnectionMetrics:
+
+    def test_metrics(self, admin_client, database):
+        connection = wrapper({**database, 'POOL_SIZE': 3})
+        connection.ensure_connection()
+        text = admin_client.get('/api/v1/metrics/').content.decode()
+        assert ('yamdb_db_connections_opened_total{database="pooled"} 1'
+                in text)
+        assert 'yamdb_db_pool_max_size{database="pooled"} 3' in text
+        assert 'yamdb_db_pool_in_use{database="pooled"} 1' in text
+        assert 'yamdb_db_pool_wait_seconds_count{database="pooled"} 1' in text
+        connection.close()
+
+    def test_benchmark_requires_backend(self):
+        with pytest.raises(Exception, match='api_yamdb.db'):
+            call_command('benchmark_connections', '--requests', '1')
+
+
+def test_waiting_thread_gets_connection(database):
+    settings_dict = {**database, 'POOL_SIZE': 1, 'POOL_TIMEOUT': 5}
+    first = wrapper(settings_dict)
+    first.ensure_connection()
+    got = []
+
+    def take():
+        second = wrapper(settings_dict)
+        second.ensure_connection()
+        got.append(second.connection)
+        second.close()
+
+    thread = threading.Thread(target=take)
+    thread.start()
+    time.sleep(0.05)
+    assert pool.pools()['pooled'].stats()['waiting'] == 1
+    raw = first.connection
+    first.close()
+    thread.join()
+    assert got == [raw]
@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+class TestFastSerializers:
+
+    def compare(self, serializer_class, queryset, fields=None):
+        from api.fast_serializers import compile_serializer
+
+        compiled = compile_serializer(serializer_class, fields)
+        fast = compiled.serialize(compiled.rows(queryset))
+        assert fast, 'Проверьте, что в выборке есть объекты'
+        regular = serializer_class(queryset, many=True).data
+        if fields:
+            regular = [{name: item[name] for name in item if name in fields}
+                       for item in regular]
+        assert render(fast) == render(regular)
+
+    def test_titles(self, titles, reviews):
+        from api.serializers import TitleGetSerializer
+        from reviews.models import Title
+
+        titles[1].category = None
+        titles[1].save()
+        self.compare(TitleGetSerializer, Title.objects.for_listing())
+        self.compare(TitleGetSerializer, Title.objects.for_listing(),
+                     frozenset({'id', 'genre', 'rating'}))
+
+    def test_reviews(self, reviews):
+        from api.serializers import ReviewSerializer
+        from reviews.models import Review
+
+        self.compare(ReviewSerializer, Review.objects.for_listing())
+
+    def test_comments(self, reviews):
+        from api.serializers import CommentSerializer
+        from reviews.models import Comment
+
+        self.compare(CommentSerializer, Comment.objects.for_listing())
+
+    def test_endpoint_matches_serializer(self, client, titles):
+        from api.serializers import TitleGetSerializer
+        from reviews.models import Title
+
+        response = client.get('/api/v1/titles/?limit=100')
+        expected = TitleGetSerializer(Title.objects.for_listing(),
+                                      many=True).data
+        assert render(response.json()['results']) == render(expected)
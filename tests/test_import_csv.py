@@ -0,0 +1,73 @@
+import csv
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+
+def csv_rows(name):
+    path = os.path.join(settings.BASE_DIR, 'static', 'data', name)
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    def test_import_all(self, django_user_model):
+        from reviews.models import Comment, GenreTitle, Review, Title
+
+        call_command('import_csv_files', '--batch-size', '7')
+
+        assert Title.objects.count() == len(csv_rows('titles.csv'))
+        assert GenreTitle.objects.count() == len(csv_rows('genre_title.csv'))
+        assert django_user_model.objects.count() == len(
+            csv_rows('users.csv'))
+        assert Review.objects.count() == len(csv_rows('review.csv'))
+        assert Comment.objects.count() == len(csv_rows('comments.csv'))
+
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что дата публикации берётся из файла'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews_title.values_list('score', flat=True))
+        assert title.reviews_count == len(scores)
+        assert title.rating == sum(scores) // len(scores)
+
+    def test_import_is_idempotent(self):
+        from reviews.models import Review
+
+        call_command('import_csv_files')
+        call_command('import_csv_files')
+        assert Review.objects.count() == len(csv_rows('review.csv'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_conflicting_rows_are_skipped(self, django_user_model):
+        from reviews.models import Comment, Review
+
+        # Имя bingobongo (id 100 в файле) занято пользователем с другим id.
+        django_user_model.objects.create(username='bingobongo',
+                                         email='other@yamdb.fake')
+        call_command('import_csv_files')
+        assert not django_user_model.objects.filter(pk=100).exists()
+        reviews = [row for row in csv_rows('review.csv')
+                   if row['author'] != '100']
+        assert Review.objects.count() == len(reviews)
+        review_ids = {row['id'] for row in reviews}
+        assert Comment.objects.count() == len([
+            row for row in csv_rows('comments.csv')
+            if row['author'] != '100' and row['review_id'] in review_ids])
+
+    def test_only_and_truncate(self):
+        from reviews.models import Category, Genre, Title
+
+        call_command('import_csv_files', '--only', 'category',
+                     '--only', 'genre')
+        Category.objects.create(name='Лишняя', slug='extra')
+        call_command('import_csv_files', '--only', 'category', '--truncate')
+
+        assert Category.objects.count() == len(csv_rows('category.csv'))
+        assert Genre.objects.count() == len(csv_rows('genre.csv'))
+        assert not Title.objects.exists()
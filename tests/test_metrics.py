@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+from api.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    registry.clear()
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    def test_server_timing(self, admin_client, titles,
+                           django_assert_num_queries):
+        with django_assert_num_queries(3) as context:
+            response = admin_client.get('/api/v1/titles/?expand=stats')
+        timing = response['Server-Timing']
+        assert f'desc="{len(context.captured_queries)} queries"' in timing
+        for name in ('db', 'app', 'serialize', 'render', 'total'):
+            assert re.search(rf'\b{name};dur=\d+\.\d\d', timing)
+        assert not re.search(r'\bserialize;dur=0\.00\b', timing)
+
+    def test_server_timing_admin_only(self, client, user_client, titles,
+                                      settings):
+        for api_client in (client, user_client):
+            assert 'Server-Timing' not in api_client.get('/api/v1/titles/')
+        # Замеры при этом копятся.
+        assert registry.snapshot()['TitleViewSet.list'][0] == 2
+        settings.PERF_PUBLIC_TIMING = True
+        assert 'Server-Timing' in client.get('/api/v1/titles/?limit=1')
+
+    def test_metrics(self, client, admin_client, titles):
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0].id}/')
+        client.post('/api/v1/auth/token/', {})
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert ('# TYPE yamdb_request_duration_seconds summary'
+                in text)
+        assert re.search(r'yamdb_request_duration_seconds\{view='
+                         r'"TitleViewSet.list",quantile="0.99"\} \S+', text)
+        assert ('yamdb_db_queries_count{view="TitleViewSet.list"} 3'
+                in text)
+        assert 'view="TitleViewSet.retrieve"' in text
+        assert 'view="APIGetToken.post"' in text
+
+    def test_admin_only(self, client, user_client):
+        assert client.get('/api/v1/metrics/').status_code == 401
+        assert user_client.get('/api/v1/metrics/').status_code == 403
+
+    def test_sampling_off(self, client, titles, settings):
+        settings.PERF_SAMPLE_RATE = 0
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response
+        assert not registry.snapshot()
@@ -0,0 +1,43 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.test.utils import override_settings
+
+from reviews.models import GenreTitle
+
+genre_through = import_module('reviews.migrations.0004_title_genre_through')
+
+
+@override_settings(MIGRATION_MODULES={})
+def test_models_match_migrations():
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    changes = MigrationAutodetector(
+        loader.project_state(), ProjectState.from_apps(apps),
+    ).changes(graph=loader.graph)
+    assert changes == {}
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(MIGRATION_MODULES={})
+def test_genre_links_copied(titles):
+    state = MigrationLoader(connection).project_state(
+        ('reviews', '0003_listing_and_rankings')).apps
+    through = genre_through.genre_through(state)
+    first, second = titles[0], titles[1]
+    genres = list(first.genre.all())
+    GenreTitle.objects.filter(title=second).delete()
+    with connection.schema_editor() as schema_editor:
+        # Таблица автоматического поля, как до перехода на GenreTitle.
+        schema_editor.create_model(through)
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title in (first, second) for genre in genres)
+        genre_through.copy_to_genre_title(state, schema_editor)
+    assert set(second.genre.all()) == set(genres)
+    assert first.genre.count() == len(genres)
+    assert through._meta.db_table not in connection.introspection.table_names()
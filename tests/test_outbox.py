@@ -0,0 +1,134 @@
+from smtplib import SMTPException, SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutboxEmail
+from users.outbox import pending
+
+SIGNUP = '/api/v1/auth/signup/'
+
+
+@pytest.fixture(autouse=True)
+def locmem_email(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.OUTBOX_RETRY_DELAY = 60
+
+
+@pytest.mark.django_db
+def test_signup_only_enqueues(client):
+    response = client.post(SIGNUP, {'username': 'new_user',
+                                    'email': 'new_user@yamdb.fake'})
+    assert response.status_code == 200
+    assert mail.outbox == []
+    email = OutboxEmail.objects.get()
+    assert email.recipient == 'new_user@yamdb.fake'
+    assert email.sent_at is None
+
+    call_command('send_outbox', '--once')
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ['new_user@yamdb.fake']
+    assert 'Код' in mail.outbox[0].body
+    email.refresh_from_db()
+    assert email.sent_at is not None
+    assert email.attempts == 1
+
+    call_command('send_outbox', '--once')
+    assert len(mail.outbox) == 1
+
+
+@pytest.mark.django_db
+def test_worker_uses_one_connection_per_run(client, monkeypatch):
+    from django.core.mail.backends import locmem
+    connections = []
+    original = locmem.EmailBackend.__init__
+
+    def init(self, *args, **kwargs):
+        connections.append(self)
+        original(self, *args, **kwargs)
+
+    monkeypatch.setattr(locmem.EmailBackend, '__init__', init)
+    for i in range(5):
+        client.post(SIGNUP, {'username': f'user_{i}',
+                             'email': f'user_{i}@yamdb.fake'})
+    call_command('send_outbox', '--once', '--batch-size', '2')
+    assert len(mail.outbox) == 5
+    assert len(connections) == 1
+
+
+@pytest.mark.django_db
+def test_failed_email_is_retried_with_backoff(client, monkeypatch):
+    from django.core.mail.backends import locmem
+
+    def fail(self, messages):
+        raise SMTPException('server unavailable')
+
+    client.post(SIGNUP, {'username': 'new_user',
+                         'email': 'new_user@yamdb.fake'})
+    monkeypatch.setattr(locmem.EmailBackend, 'send_messages', fail)
+    call_command('send_outbox', '--once')
+    email = OutboxEmail.objects.get()
+    assert email.sent_at is None
+    assert email.attempts == 1
+    assert 'server unavailable' in email.last_error
+    assert email.send_after > timezone.now()
+
+    monkeypatch.undo()
+    call_command('send_outbox', '--once')
+    assert mail.outbox == []
+
+    OutboxEmail.objects.update(send_after=timezone.now())
+    call_command('send_outbox', '--once')
+    assert len(mail.outbox) == 1
+    email.refresh_from_db()
+    assert email.attempts == 2
+    assert email.sent_at is not None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_emails_are_sent_outside_transaction(client, monkeypatch):
+    from django.core.mail.backends import locmem
+    from django.db import connection
+
+    send_messages = locmem.EmailBackend.send_messages
+    states = []
+
+    def send(self, messages):
+        states.append(connection.in_atomic_block)
+        # Пока письмо отправляется, другие обработчики его не забирают.
+        assert not pending(5).exists()
+        return send_messages(self, messages)
+
+    client.post(SIGNUP, {'username': 'new_user',
+                         'email': 'new_user@yamdb.fake'})
+    monkeypatch.setattr(locmem.EmailBackend, 'send_messages', send)
+    call_command('send_outbox', '--once')
+    assert len(mail.outbox) == 1
+    assert states == [False]
+
+
+@pytest.mark.django_db
+def test_reconnects_after_disconnect(client, monkeypatch):
+    from django.core.mail.backends import locmem
+
+    send_messages = locmem.EmailBackend.send_messages
+    opened = []
+
+    def send(self, messages):
+        if len(mail.outbox) == 1 and len(opened) == 1:
+            raise SMTPServerDisconnected('Connection unexpectedly closed')
+        return send_messages(self, messages)
+
+    monkeypatch.setattr(locmem.EmailBackend, 'send_messages', send)
+    monkeypatch.setattr(locmem.EmailBackend, 'open',
+                        lambda self: opened.append(self))
+    for i in range(3):
+        client.post(SIGNUP, {'username': f'user_{i}',
+                             'email': f'user_{i}@yamdb.fake'})
+    call_command('send_outbox', '--once')
+    assert len(mail.outbox) == 3
+    assert len(opened) == 2
+    assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+    assert set(OutboxEmail.objects.values_list('attempts', flat=True)) == {1}
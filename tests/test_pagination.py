@@ -0,0 +1,98 @@
+from urllib.parse import parse_qs, quote, urlsplit
+
+import pytest
+
+
+def walk(client, url, link='next'):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([item['id'] for item in data['results']])
+        url = data[link]
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def comments_url(self, review):
+        return (f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                'comments/')
+
+    def test_cursor_walks_all_comments(self, client, reviews):
+        review = reviews[0]
+        pages = walk(client, self.comments_url(review) + '?cursor=&limit=1')
+        ids = [pk for page in pages for pk in page]
+        expected = list(review.comments_review.order_by('-pub_date', '-id')
+                        .values_list('id', flat=True))
+        assert ids == expected
+        assert all(len(page) == 1 for page in pages)
+
+    def test_cursor_previous_link(self, client, reviews):
+        review = reviews[0]
+        first = client.get(self.comments_url(review) + '?cursor=&limit=1')
+        second = client.get(first.json()['next'])
+        back = client.get(second.json()['previous']).json()
+        assert back['results'] == first.json()['results']
+        assert 'count' not in back
+
+    def test_empty_page_previous_keeps_cursor(self, client, reviews):
+        review = reviews[0]
+        first = client.get(self.comments_url(review) + '?cursor=&limit=1')
+        review.comments_review.all().delete()
+        empty = client.get(first.json()['next']).json()
+        assert empty['results'] == []
+        query = parse_qs(urlsplit(empty['previous']).query,
+                         keep_blank_values=True)
+        assert query['cursor'] == ['']
+        assert 'count' not in client.get(empty['previous']).json()
+
+    def test_cursor_skips_count_query(self, client, reviews,
+                                      django_assert_num_queries):
+        # произведение + страница отзывов, без COUNT(*)
+        with django_assert_num_queries(2):
+            response = client.get(
+                f'/api/v1/titles/{reviews[0].title_id}/reviews/?cursor=')
+        assert response.status_code == 200
+
+    def test_invalid_cursor(self, client, reviews):
+        response = client.get(
+            f'/api/v1/titles/{reviews[0].title_id}/reviews/?cursor=broken')
+        assert response.status_code == 404
+
+    def test_search_keeps_rank_order(self, client, reviews):
+        reviews[0].text = 'Туман, снова туман'
+        reviews[0].save()
+        reviews[1].text = 'Туман'
+        reviews[1].save()
+        url = (f'/api/v1/titles/{reviews[0].title_id}/reviews/'
+               f'?q={quote("туман")}')
+        ranked = client.get(url).json()['results']
+        data = client.get(url + '&cursor=&limit=1').json()
+        # Поиск упорядочен по рангу: курсор по дате не применяется.
+        assert data['count'] == 2
+        assert data['results'] == ranked[:1]
+        assert client.get(data['next']).json()['results'] == ranked[1:]
+
+    def test_limit_offset_still_supported(self, client, reviews):
+        review = reviews[0]
+        data = client.get(
+            self.comments_url(review) + '?limit=2&offset=1').json()
+        assert data['count'] == 3
+        assert len(data['results']) == 2
+
+
+@pytest.mark.django_db
+class TestTitlesWithoutCount:
+
+    def test_count_disabled(self, client, titles, django_assert_num_queries):
+        # произведения с категорией + жанры, без COUNT(*)
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/?count=false&limit=2')
+        data = response.json()
+        assert data['count'] is None
+        assert len(data['results']) == 2
+        pages = walk(client, '/api/v1/titles/?count=false&limit=2')
+        assert sum(len(page) for page in pages) == len(titles)
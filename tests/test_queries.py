@@ -0,0 +1,68 @@
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from api.queries import detect_queries, fingerprint
+from reviews.models import Title
+
+
+class TestFingerprint:
+
+    def test_values_are_replaced(self):
+        assert fingerprint(
+            "SELECT * FROM t WHERE a = 1 AND b = 'x''y' AND c IN (%s, %s)"
+        ) == fingerprint(
+            "SELECT  * FROM t WHERE a = 25 AND b = 'z' AND c IN (%s)")
+
+    def test_different_queries(self):
+        assert fingerprint('SELECT a FROM t WHERE id = %s') != fingerprint(
+            'SELECT b FROM t WHERE id = %s')
+
+
+@pytest.mark.django_db
+class TestDetector:
+
+    def test_repeated_queries(self, titles):
+        with detect_queries(threshold=3) as report:
+            names = [title.category.name for title in Title.objects.all()]
+        assert len(names) == len(titles)
+        [(key, count, where)] = report.repeated
+        assert count == len(titles)
+        assert 'reviews_category' in key
+        assert where.startswith(__file__.rstrip('c'))
+        assert 'N+1' in report.lines()[0]
+
+    def test_slow_queries(self, titles):
+        with detect_queries(slow_ms=0) as report:
+            list(Title.objects.all())
+        assert len(report.slow) == 1
+        assert not report.repeated
+
+    def test_middleware(self, client, titles, settings, caplog):
+        settings.QUERY_DETECTOR = True
+        settings.SLOW_QUERY_MS = 0
+        client.get('/api/v1/titles/')
+        assert 'Медленный запрос' in caplog.text
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', settings.QUERY_CHECK_URLS)
+def test_no_n_plus_one(url, admin_client, reviews, assert_no_n_plus_one):
+    url = url.format(title_id=reviews[0].title_id, review_id=reviews[0].pk)
+    # В фикстурах по два отзыва на произведение: N+1 даст два повтора.
+    with assert_no_n_plus_one(threshold=2):
+        assert admin_client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+class TestCheckQueriesCommand:
+
+    def test_clean(self, admin, reviews, capsys):
+        call_command('check_queries', '--user', admin.username)
+        assert 'N+1' not in capsys.readouterr().out
+
+    def test_offenders(self, reviews, capsys):
+        with pytest.raises(CommandError):
+            call_command('check_queries', '/api/v1/titles/', '--slow-ms',
+                         '0')
+        assert 'Медленный запрос' in capsys.readouterr().out
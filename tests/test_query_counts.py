@@ -0,0 +1,180 @@
+import pytest
+from rest_framework.exceptions import ValidationError
+
+from api.serializers import CreateUserSerializer
+from users.models import User
+
+
+@pytest.mark.django_db
+class TestQueryCounts:
+    """Число запросов к БД не должно зависеть от размера страницы."""
+
+    def test_titles_list(self, client, titles, django_assert_num_queries):
+        # count + произведения с категорией + жанры
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == len(titles)
+
+    def test_titles_list_with_filters(self, client, titles,
+                                      django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/?genre=genre-0&limit=100')
+        assert response.status_code == 200
+
+    def test_title_detail(self, client, titles, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{titles[0].id}/')
+        assert response.status_code == 200
+
+    def test_reviews_list(self, client, reviews, django_assert_num_queries):
+        title_id = reviews[0].title_id
+        # произведение + count + отзывы с авторами
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title_id}/reviews/')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == len(reviews)
+
+    def test_comments_list(self, client, reviews, django_assert_num_queries):
+        review = reviews[0]
+        # отзыв + count + комментарии с авторами
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                'comments/'
+            )
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 3
+
+
+@pytest.mark.django_db
+class TestAuthQueryCounts:
+    signup = '/api/v1/auth/signup/'
+    data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+
+    def test_signup(self, client, django_assert_num_queries):
+        # поиск по имени и почте + savepoint, вставка, release + код + письмо
+        with django_assert_num_queries(6):
+            response = client.post(self.signup, self.data)
+        assert response.status_code == 200
+        assert response.json() == self.data
+        # повторный запрос в тот же день: поиск + письмо
+        with django_assert_num_queries(2):
+            response = client.post(self.signup, self.data)
+        assert response.status_code == 200
+
+    def test_signup_conflicts(self, client, user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = client.post(self.signup, {'username': user.username,
+                                                 'email': 'other@yamdb.fake'})
+        assert response.status_code == 400
+        assert set(response.json()) == {'username'}
+        response = client.post(self.signup, {'username': 'other',
+                                             'email': user.email})
+        assert set(response.json()) == {'email'}
+
+    def test_signup_race(self):
+        # Пара занята между проверкой и вставкой.
+        serializer = CreateUserSerializer(data=self.data)
+        assert serializer.is_valid()
+        same = User.objects.create(**self.data)
+        assert serializer.save() == same
+
+        serializer = CreateUserSerializer(data={'username': 'other',
+                                                'email': 'other@yamdb.fake'})
+        assert serializer.is_valid()
+        User.objects.create(username='another', email='other@yamdb.fake')
+        with pytest.raises(ValidationError) as error:
+            serializer.save()
+        assert set(error.value.detail) == {'email'}
+
+    def test_token(self, client, django_assert_num_queries):
+        client.post(self.signup, self.data)
+        code = User.objects.get(username='new_user').confirmation_code
+        with django_assert_num_queries(1):
+            response = client.post('/api/v1/auth/token/', {
+                'username': 'new_user', 'confirmation_code': code})
+        assert response.status_code == 201
+        assert 'token' in response.json()
+
+
+@pytest.mark.django_db
+class TestWriteQueryCounts:
+    """Запись отзывов и комментариев; на SQLite к каждой записи
+    добавляется обновление поискового индекса."""
+
+    def review_url(self, review):
+        return f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+
+    def test_create_review(self, user_client, titles,
+                           django_assert_num_queries):
+        url = f'/api/v1/titles/{titles[1].id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        # произведение + savepoint, вставка, рейтинг, статистика, индекс
+        # (удаление и вставка), release
+        with django_assert_num_queries(8):
+            response = user_client.post(url, data)
+        assert response.status_code == 201
+        response = user_client.post(url, data)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Отзыв на данное произведение уже создан!']}
+
+    def test_update_review(self, user_client, reviews,
+                           django_assert_num_queries):
+        # отзыв с автором + savepoint, запись, рейтинг, две строки
+        # статистики, индекс (удаление и вставка), release
+        with django_assert_num_queries(9):
+            response = user_client.patch(self.review_url(reviews[0]),
+                                         {'score': 3})
+        assert response.status_code == 200
+        assert response.json()['author'] == reviews[0].author.username
+
+    def test_update_foreign_review(self, user_client, reviews,
+                                   django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = user_client.patch(self.review_url(reviews[1]),
+                                         {'score': 3})
+        assert response.status_code == 403
+
+    def test_moderator_updates_review(self, reviews, django_user_model):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(django_user_model.objects.create(
+            username='moderator', email='moderator@yamdb.fake',
+            role='moderator'))
+        response = client.patch(self.review_url(reviews[0]), {'score': 3})
+        assert response.status_code == 200
+
+    def test_review_of_other_title(self, user_client, reviews, titles):
+        url = f'/api/v1/titles/{titles[1].id}/reviews/{reviews[0].id}/'
+        assert user_client.patch(url, {'score': 3}).status_code == 404
+        assert user_client.get(url).status_code == 404
+
+    def test_delete_review(self, user_client, reviews,
+                           django_assert_num_queries):
+        # отзыв + комментарии, их удаление и три записи индекса + удаление
+        # отзыва, рейтинг, статистика, индекс
+        with django_assert_num_queries(10):
+            response = user_client.delete(self.review_url(reviews[0]))
+        assert response.status_code == 204
+
+    def test_comments(self, user_client, reviews, django_assert_num_queries):
+        review = reviews[0]
+        url = self.review_url(review) + 'comments/'
+        # отзыв + вставка, индекс (удаление и вставка)
+        with django_assert_num_queries(4):
+            response = user_client.post(url, {'text': 'Комментарий'})
+        assert response.status_code == 201
+        url += f'{response.json()["id"]}/'
+        # комментарий с автором + запись, индекс (удаление и вставка)
+        with django_assert_num_queries(4):
+            response = user_client.patch(url, {'text': 'Исправлено'})
+        assert response.status_code == 200
+        with django_assert_num_queries(3):
+            response = user_client.delete(url)
+        assert response.status_code == 204
+        other_review = f'/api/v1/titles/{review.title_id}/reviews/0/comments/'
+        assert user_client.post(other_review,
+                                {'text': 'x'}).status_code == 404
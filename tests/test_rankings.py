@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import (DailyReviewCount, GenreTopTitle, RankingWatermark,
+                            Review, TrendingTitle)
+from reviews.rankings import refresh_rankings
+
+
+def publish(review, days_ago):
+    published = timezone.now() - timedelta(days=days_ago)
+    Review.objects.filter(pk=review.pk).update(pub_date=published)
+
+
+@pytest.fixture
+def rated(titles, user, another_user):
+    """Отзывы на три произведения: сегодня, вчера и десять дней назад."""
+    result = []
+    for title, score, days_ago in ((titles[0], 5, 0), (titles[1], 9, 1),
+                                   (titles[2], 7, 10)):
+        for author in (user, another_user):
+            review = Review.objects.create(title=title, author=author,
+                                           score=score, text='Отзыв')
+            publish(review, days_ago)
+            result.append(review)
+    return result
+
+
+@pytest.mark.django_db
+class TestRefreshRankings:
+
+    def test_full_refresh(self, rated, titles, settings):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        assert refresh_rankings() == (6, 3)
+        trending = list(TrendingTitle.objects.values_list(
+            'position', 'title', 'reviews_count'))
+        assert trending == [(1, titles[0].id, 2), (2, titles[1].id, 2)]
+        # Жанр genre-0 есть у всех произведений, genre-2 — только у третьего.
+        top = GenreTopTitle.objects.filter(genre__slug='genre-0')
+        assert list(top.values_list('title', flat=True)) == [
+            titles[1].id, titles[2].id, titles[0].id]
+        assert list(GenreTopTitle.objects.filter(
+            genre__slug='genre-2').values_list('title', flat=True)) == [
+            titles[2].id]
+
+    def test_incremental_refresh(self, rated, titles, user, settings,
+                                 django_assert_max_num_queries):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        refresh_rankings()
+        review = Review.objects.create(title=titles[3], author=user,
+                                       score=10, text='Отзыв')
+        with django_assert_max_num_queries(20):
+            assert refresh_rankings() == (1, 1)
+        assert TrendingTitle.objects.get(title=titles[3]).reviews_count == 1
+        assert GenreTopTitle.objects.get(
+            genre__slug='genre-0', position=1).title_id == titles[3].id
+        assert RankingWatermark.objects.get().pub_date >= review.pub_date
+        # Повторный запуск ничего не учитывает дважды.
+        assert refresh_rankings() == (0, 0)
+        assert DailyReviewCount.objects.get(
+            title=titles[3]).reviews_count == 1
+
+    def test_fresh_reviews_wait_for_next_run(self, rated, titles, user,
+                                             settings):
+        settings.RANKINGS_SETTLE_DELAY = 60
+        assert refresh_rankings() == (4, 3)
+        assert not TrendingTitle.objects.filter(title=titles[0]).exists()
+        assert refresh_rankings(
+            now=timezone.now() + timedelta(minutes=2)) == (2, 1)
+        assert TrendingTitle.objects.filter(title=titles[0]).exists()
+
+    def test_window_moves(self, rated, titles, settings):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        refresh_rankings()
+        refresh_rankings(now=timezone.now() + timedelta(days=7))
+        assert not TrendingTitle.objects.exists()
+        assert not DailyReviewCount.objects.exists()
+
+    def test_command(self, rated, settings):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        call_command('refresh_rankings', '--once', '--full')
+        assert TrendingTitle.objects.count() == 2
+
+    def test_service_repeats_full_refresh(self, rated, settings,
+                                          monkeypatch):
+        from reviews.management.commands import refresh_rankings as command
+
+        settings.RANKINGS_SETTLE_DELAY = 0
+        clock = iter(range(0, 1000, 10))
+        passes = []
+
+        def sleep(seconds):
+            if len(passes) == 4:
+                raise KeyboardInterrupt
+            if len(passes) == 2:
+                Review.objects.filter(title=rated[0].title).delete()
+
+        monkeypatch.setattr(command.time, 'monotonic', lambda: next(clock))
+        monkeypatch.setattr(command.time, 'sleep', sleep)
+        monkeypatch.setattr(command, 'refresh_rankings', lambda full: (
+            passes.append(full) or refresh_rankings(full=full)))
+        with pytest.raises(KeyboardInterrupt):
+            call_command('refresh_rankings', '--full-interval', '25')
+        assert passes == [False, False, True, False]
+        # Удалённые отзывы ушли из популярного после полного пересчёта.
+        assert not TrendingTitle.objects.filter(
+            title=rated[0].title).exists()
+
+
+@pytest.mark.django_db
+class TestRankingEndpoints:
+
+    def test_top(self, client, rated, titles, settings,
+                 django_assert_num_queries):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        refresh_rankings()
+        # места с произведениями и категориями + жанры
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/top/?genre=genre-0')
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['title']['id'] for item in data] == [
+            titles[1].id, titles[2].id, titles[0].id]
+        assert data[0]['position'] == 1
+        assert data[0]['rating'] == 9
+        assert data[0]['title']['genre']
+        response = client.get('/api/v1/titles/top/?genre=genre-0&limit=1')
+        assert len(response.json()) == 1
+        assert client.get('/api/v1/titles/top/?genre=nope').json() == []
+        assert client.get('/api/v1/titles/top/').status_code == 400
+
+    def test_trending(self, client, rated, titles, settings):
+        settings.RANKINGS_SETTLE_DELAY = 0
+        refresh_rankings()
+        response = client.get('/api/v1/titles/trending/')
+        assert response.status_code == 200
+        assert [(item['position'], item['title']['id'], item['reviews_count'])
+                for item in response.json()] == [
+            (1, titles[0].id, 2), (2, titles[1].id, 2)]
@@ -0,0 +1,142 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api.cache import CATEGORIES, REPLICA_LAG_KEY, invalidate
+from api.views import CategoryViewSet
+from api_yamdb.db import router
+from api_yamdb.db.router import ReplicaRouter
+from reviews.models import Category, Review, Title
+
+pytestmark = pytest.mark.django_db(databases=['default', 'replica'])
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    """Вторая база SQLite изображает реплику."""
+    settings.READ_REPLICAS = ['replica']
+    router.reset()
+    yield 'replica'
+    router.reset()
+
+
+def copy_to_replica(*objects):
+    # bulk_create не вызывает сигналы, которые записали бы в основную БД.
+    for obj in objects:
+        type(obj).objects.using('replica').bulk_create([obj])
+
+
+def slugs(response):
+    return [item['slug'] for item in response.json()['results']]
+
+
+class TestReplicaRouter:
+
+    def test_reads_and_writes(self):
+        replica_router = ReplicaRouter()
+        assert replica_router.db_for_read(Title) is None
+        router.read_from_replica()
+        assert replica_router.db_for_read(Title) == 'replica'
+        assert replica_router.db_for_write(Title) == 'default'
+        # После записи чтение до конца запроса — с основной БД.
+        assert replica_router.db_for_read(Title) == 'default'
+        router.reset()
+        assert replica_router.db_for_read(Title) is None
+
+    def test_write_of_replica_object_goes_to_primary(self):
+        copy_to_replica(Category(name='Книга', slug='book'))
+        category = Category.objects.using('replica').get()
+        assert ReplicaRouter().db_for_write(
+            Category, instance=category) == 'default'
+
+
+class TestReplicaReads:
+
+    def test_safe_requests_read_replica(self, client, admin_client):
+        Category.objects.create(name='Основная', slug='primary')
+        copy_to_replica(Category(name='Реплика', slug='replica'))
+        assert slugs(client.get('/api/v1/categories/')) == ['replica']
+        # Запись и чтение внутри небезопасного запроса — в основной БД.
+        response = admin_client.post('/api/v1/categories/',
+                                     {'name': 'Новая', 'slug': 'new'})
+        assert response.status_code == 201
+        assert Category.objects.filter(slug='new').exists()
+        assert not Category.objects.using('replica').filter(
+            slug='new').exists()
+
+    def test_without_replicas(self, client, settings):
+        settings.READ_REPLICAS = []
+        Category.objects.create(name='Основная', slug='primary')
+        assert slugs(client.get('/api/v1/categories/')) == ['primary']
+
+    def test_read_your_writes(self, user, another_user, user_client):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Произведение', year=2000,
+                                     category=category)
+        copy_to_replica(category, title)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 8})
+        assert response.status_code == 201
+        # Автор сразу видит свой отзыв, другие читают реплику.
+        assert user_client.get(url).json()['count'] == 1
+        other = APIClient()
+        other.force_authenticate(user=another_user)
+        assert other.get(url).json()['count'] == 0
+        assert not Review.objects.using('replica').exists()
+
+    def test_pin_expires(self, user_client, user):
+        copy_to_replica(Category(name='Фильм', slug='movie'))
+        router.pin(user.pk)
+        assert slugs(user_client.get('/api/v1/categories/')) == []
+        cache.delete(router.pin_key(user.pk))
+        assert slugs(user_client.get('/api/v1/categories/?limit=5')) == [
+            'movie']
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_lagging_replica_not_cached(self, client):
+        Category.objects.create(name='Основная', slug='primary')
+        response = client.get('/api/v1/categories/')
+        assert slugs(response) == []
+        assert 'ETag' not in response
+        copy_to_replica(Category(name='Основная', slug='primary'))
+        # Пустой ответ отстающей реплики не попал в кэш.
+        assert slugs(client.get('/api/v1/categories/')) == ['primary']
+
+    def test_replica_cached_after_lag(self, client):
+        copy_to_replica(Category(name='Реплика', slug='replica'))
+        cache.delete(REPLICA_LAG_KEY)
+        response = client.get('/api/v1/categories/')
+        assert 'ETag' in response
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT'
+
+    def test_database_cache(self, client, settings):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache'}}
+        call_command('createcachetable')
+        copy_to_replica(Category(name='Реплика', slug='replica'))
+        cache.delete(REPLICA_LAG_KEY)
+        response = client.get('/api/v1/categories/')
+        # Запись в таблицу кэша не переключает запрос на основную БД.
+        assert slugs(response) == ['replica'] and 'ETag' in response
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT'
+
+    def test_changed_during_request_not_cached(self, client, monkeypatch):
+        copy_to_replica(Category(name='Реплика', slug='replica'))
+        cache.delete(REPLICA_LAG_KEY)
+        filter_queryset = CategoryViewSet.filter_queryset
+
+        def filter_and_write(self, queryset):
+            # Запись в другом процессе, пока ответ ещё не сохранён, и
+            # реплика отстаёт дольше REPLICA_PIN_SECONDS.
+            invalidate(CATEGORIES)
+            cache.delete(REPLICA_LAG_KEY)
+            return filter_queryset(self, queryset)
+
+        monkeypatch.setattr(CategoryViewSet, 'filter_queryset',
+                            filter_and_write)
+        response = client.get('/api/v1/categories/')
+        assert slugs(response) == ['replica'] and 'ETag' not in response
+        monkeypatch.undo()
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'MISS'
@@ -0,0 +1,100 @@
+import pytest
+
+from reviews.models import Comment, Review, SearchEntry, Title
+from reviews.search import rebuild_search_index, tokenize
+
+
+def test_tokenize():
+    assert tokenize('Ёжик в Тумане, 1975!') == ['ежик', 'тумане', '1975']
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    @pytest.fixture
+    def documents(self, titles, reviews):
+        titles[1].name = 'Ёжик в тумане'
+        titles[1].save()
+        titles[2].description = 'Мультфильм про ежика и туман'
+        titles[2].save()
+        reviews[0].text = 'Туман красивый, ежик смешной, ежик грустный'
+        reviews[0].save()
+        return titles, reviews
+
+    def test_titles_ranked(self, client, titles):
+        titles[0].name = 'Туман'
+        titles[0].save()
+        titles[2].description = 'Мультфильм про туман'
+        titles[2].save()
+        response = client.get('/api/v1/titles/?q=туман')
+        # Совпадение в названии весит больше, чем в описании; при равном
+        # ранге первым шло бы произведение с большим id.
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0].id, titles[2].id]
+
+    def test_reviews_ranked(self, client, reviews):
+        reviews[0].text = 'Туман, снова туман'
+        reviews[0].save()
+        reviews[1].text = 'Туман'
+        reviews[1].save()
+        response = client.get(
+            f'/api/v1/titles/{reviews[0].title_id}/reviews/?q=туман')
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[0].id, reviews[1].id]
+
+    def test_all_words_must_match(self, client, documents):
+        response = client.get('/api/v1/titles/?q=ежик+в+тумане')
+        assert response.json()['count'] == 1
+        response = client.get('/api/v1/titles/?q=ежик+смешной')
+        assert response.json()['count'] == 0
+
+    def test_combines_with_filters(self, client, documents):
+        response = client.get('/api/v1/titles/?q=ежик&year=2001')
+        assert response.json()['count'] == 1
+        response = client.get('/api/v1/titles/?q=ежик&year=2002')
+        assert response.json()['count'] == 0
+
+    def test_reviews_and_comments(self, client, documents):
+        _, reviews = documents
+        title_id = reviews[0].title_id
+        response = client.get(
+            f'/api/v1/titles/{title_id}/reviews/?q=смешной')
+        assert [review['id'] for review in response.json()['results']] == [
+            reviews[0].id]
+        response = client.get(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1].id}/comments/'
+            '?q=комментарий')
+        assert len(response.json()['results']) == 3
+
+    def test_index_follows_changes(self, client, documents):
+        titles, reviews = documents
+        reviews[0].delete()
+        assert not SearchEntry.objects.filter(
+            kind='review', object_id=reviews[0].id).exists()
+        titles[1].name = 'Другое'
+        titles[1].save()
+        response = client.get('/api/v1/titles/?q=ежик')
+        assert response.json()['count'] == 0
+
+    def test_rebuild(self, documents):
+        SearchEntry.objects.all().delete()
+        indexed = rebuild_search_index()
+        assert indexed == (Title.objects.count() + Review.objects.count()
+                           + Comment.objects.count())
+        assert SearchEntry.objects.filter(term='ежик').count() == 2
+
+    def test_bulk_reindexes_only_changed(self, admin_client, documents):
+        titles, _ = documents
+        SearchEntry.objects.filter(kind='title',
+                                   object_id=titles[1].id).delete()
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'id': titles[2].id, 'name': 'Туманность'},
+            {'name': 'Новый туман', 'year': 2020},
+        ], format='json')
+        assert response.status_code == 201
+        # Индекс остальных документов не перестраивается.
+        assert not SearchEntry.objects.filter(
+            kind='title', object_id=titles[1].id).exists()
+        assert SearchEntry.objects.filter(
+            kind='title', object_id=titles[2].id, term='туманность').exists()
+        assert SearchEntry.objects.filter(term='новый').count() == 1
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.core.wsgi import get_wsgi_application
+
+from api.serving import call_asgi, compare_serving
+from api_yamdb.asgi import ThreadPoolWsgiToAsgi
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsgiApplication:
+
+    def test_request(self):
+        application = ThreadPoolWsgiToAsgi(get_wsgi_application(), 2)
+        finished = []
+
+        def receiver(**kwargs):
+            finished.append(True)
+
+        request_finished.connect(receiver)
+        try:
+            assert run(call_asgi(application, '/api/v1/')) == 200
+        finally:
+            request_finished.disconnect(receiver)
+            application.executor.shutdown()
+        # Ответ закрыт: Django закрывает соединения с БД после запроса.
+        assert finished
+
+    def test_asgiref_contract(self):
+        """ThreadPoolWsgiInstance переопределяет внутренние методы
+        WsgiToAsgiInstance из asgiref 3.2: после обновления asgiref этот
+        тест показывает, что они всё ещё вызываются так, как ожидается."""
+        calls = []
+
+        class Response(list):
+            def close(self):
+                calls.append('close')
+
+        def wsgi_application(environ, start_response):
+            calls.append((threading.current_thread().name,
+                          environ['PATH_INFO'], environ['QUERY_STRING'],
+                          environ['wsgi.input'].read()))
+            start_response('201 Created', [('X-Test', '1')])
+            return Response([b'a', b'b'])
+
+        application = ThreadPoolWsgiToAsgi(wsgi_application, 1)
+        scope = {'type': 'http', 'method': 'POST', 'path': '/path/',
+                 'query_string': b'q=1', 'http_version': '1.1',
+                 'headers': []}
+        messages = iter([{'type': 'http.request', 'body': b'body'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        try:
+            run(application(scope, receive, send))
+        finally:
+            application.executor.shutdown()
+        (thread, path, query, body), closed = calls
+        assert thread.startswith('asgi')
+        assert (path, query, body, closed) == ('/path/', 'q=1', b'body',
+                                               'close')
+        assert sent == [
+            {'type': 'http.response.start', 'status': 201,
+             'headers': [(b'x-test', b'1')]},
+            {'type': 'http.response.body', 'body': b'a', 'more_body': True},
+            {'type': 'http.response.body', 'body': b'b', 'more_body': True},
+            {'type': 'http.response.body'},
+        ]
+
+    def test_lifespan(self):
+        application = ThreadPoolWsgiToAsgi(get_wsgi_application(), 1)
+        messages = iter([{'type': 'lifespan.startup'},
+                         {'type': 'lifespan.shutdown'}])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        run(application({'type': 'lifespan'}, receive, send))
+        assert sent == ['lifespan.startup.complete',
+                        'lifespan.shutdown.complete']
+
+
+class TestBenchmarkServing:
+
+    def test_modes(self):
+        results = compare_serving(get_wsgi_application(), ['/api/v1/'] * 16,
+                                  delay=5, concurrency=8, threads=4)
+        assert set(results) == {'gthread', 'asgi'}
+        for result in results.values():
+            assert result['requests'] == 16
+            assert result['errors'] == 0
+            assert result['statuses'] == {'200': 16}
+
+    @pytest.mark.django_db
+    def test_command(self, tmp_path, capsys):
+        output = tmp_path / 'serving.json'
+        call_command('benchmark_serving', '--path', '/api/v1/',
+                     '--requests', '4', '--delay', '1', '--concurrency', '2',
+                     '--output', str(output))
+        with open(output, encoding='utf-8') as file:
+            report = json.load(file)
+        assert set(report['modes']) == {'gthread', 'asgi'}
+        assert report['modes']['asgi']['statuses'] == {'200': 4}
+        assert 'asgi' in capsys.readouterr().out
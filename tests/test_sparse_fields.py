@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_title_fields(self, client, titles, django_assert_num_queries):
+        # count + произведения, без категории и жанров
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        for item in response.json()['results']:
+            assert set(item) == {'id', 'name', 'rating'}
+
+    def test_title_fields_narrow_select(self, client, titles):
+        with CaptureQueriesContext(connection) as context:
+            client.get(f'/api/v1/titles/{titles[0].id}/?fields=id,name')
+        sql = context.captured_queries[-1]['sql']
+        assert 'description' not in sql
+        assert 'reviews_category' not in sql
+
+    def test_title_with_genre_only(self, client, titles):
+        response = client.get(f'/api/v1/titles/{titles[1].id}/'
+                              '?fields=name,genre')
+        data = response.json()
+        assert set(data) == {'name', 'genre'}
+        assert len(data['genre']) == 2
+
+    def test_default_output_unchanged(self, client, titles):
+        data = client.get(f'/api/v1/titles/{titles[0].id}/').json()
+        assert set(data) == {'id', 'name', 'year', 'rating', 'description',
+                             'genre', 'category'}
+
+    def test_review_fields_and_expand(self, client, reviews):
+        url = f'/api/v1/titles/{reviews[0].title_id}/reviews/'
+        data = client.get(url + '?fields=id,score').json()
+        assert all(set(item) == {'id', 'score'} for item in data['results'])
+        data = client.get(url + '?expand=author').json()
+        author = data['results'][0]['author']
+        assert set(author) == {'username', 'first_name', 'last_name'}
+
+    def test_comment_fields_with_cursor(self, client, reviews,
+                                        django_assert_num_queries):
+        review = reviews[0]
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+               'comments/?fields=id,text&cursor=&limit=1')
+        # отзыв + страница комментариев: курсор не подгружает даты
+        with django_assert_num_queries(2):
+            data = client.get(url).json()
+        assert set(data['results'][0]) == {'id', 'text'}
+        assert data['next']
+
+    def test_fields_ignored_on_write(self, user_client, titles):
+        response = user_client.post(
+            f'/api/v1/titles/{titles[0].id}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        assert 'text' in response.json()
@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+import requests
+from django.conf import settings
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from api_yamdb import storage
+from reviews.models import Category
+
+from .conftest import infra_dir_path
+
+NGINX_CONF = os.path.join(infra_dir_path, 'nginx', 'default.conf')
+
+
+def nginx_conf():
+    with open(NGINX_CONF, encoding='utf-8') as file:
+        return file.read()
+
+
+def location(conf, start):
+    return conf[conf.index(start):].split('\n    }', 1)[0]
+
+
+@pytest.fixture(scope='module')
+def collected(tmp_path_factory):
+    """Статика, собранная collectstatic один раз на модуль."""
+    root = tmp_path_factory.mktemp('static')
+    with override_settings(
+            STATIC_ROOT=str(root),
+            STATICFILES_STORAGE=(
+                'api_yamdb.storage.CompressedManifestStaticFilesStorage')):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(root / 'staticfiles.json') as file:
+            yield root, json.load(file)['paths']
+
+
+class TestCollectStatic:
+
+    def test_hashed_and_compressed(self, collected):
+        root, manifest = collected
+        hashed = manifest['redoc.yaml']
+        assert re.fullmatch(r'redoc\.[0-9a-f]{12}\.yaml', hashed)
+        content = (root / hashed).read_bytes()
+        assert content == (root / 'redoc.yaml').read_bytes()
+        assert gzip.decompress(
+            (root / (hashed + '.gz')).read_bytes()) == content
+        assert not (root / (hashed + '.br')).exists()
+        assert (root / manifest['admin/css/base.css']).exists()
+        assert (root / (manifest['admin/css/base.css'] + '.gz')).exists()
+        assert not any(name.startswith('data/') for name in manifest)
+
+    def test_compress(self, tmp_path):
+        (tmp_path / 'small.css').write_text('body {margin: 0}')
+        (tmp_path / 'image.png').write_bytes(b'\0' * 1024)
+        (tmp_path / 'big.css').write_text('body {margin: 0}\n' * 100)
+        static_storage = storage.CompressedManifestStaticFilesStorage(
+            location=str(tmp_path))
+        static_storage.compress('small.css', 'image.png', 'big.css')
+        assert {'small.css.gz', 'image.png.gz'}.isdisjoint(
+            os.listdir(tmp_path))
+        assert gzip.decompress((tmp_path / 'big.css.gz').read_bytes()) == (
+            (tmp_path / 'big.css').read_bytes())
+
+    def test_redoc_uses_hashed_name(self, client, collected):
+        _, manifest = collected
+        response = client.get('/redoc/')
+        assert f"spec-url='/static/{manifest['redoc.yaml']}'" in (
+            response.content.decode())
+
+
+def test_collectstatic_before_server():
+    with open(os.path.join(settings.BASE_DIR, 'Dockerfile')) as file:
+        command = re.search(r'^CMD (.+)$', file.read(), re.M).group(1)
+    # Манифест читается один раз: статика собирается до gunicorn.
+    assert 0 <= command.find('collectstatic') < command.find('gunicorn')
+
+
+class TestNginxConf:
+
+    def test_static(self, collected):
+        _, manifest = collected
+        conf = nginx_conf()
+        hashed = location(conf, 'location ~')
+        static = location(conf, 'location /static/')
+        for block in (hashed, static):
+            assert 'gzip_static on;' in block
+        assert 'max-age=31536000, immutable' in hashed
+        assert 'immutable' not in static
+        pattern = re.search(r'location ~ "(.+)"', hashed).group(1)
+        for name in ('redoc.yaml', 'admin/css/base.css'):
+            assert re.search(pattern, f'/static/{manifest[name]}')
+            assert not re.search(pattern, f'/static/{name}')
+
+    def test_api_gzip(self):
+        conf = nginx_conf()
+        assert re.search(r'^\s*gzip on;', conf, re.M)
+        assert 'gzip_proxied any;' in conf
+        types = re.search(r'gzip_types([^;]+);', conf).group(1).split()
+        assert 'application/json' in types
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def nginx(collected, live_server, tmp_path):
+    """nginx с infra/nginx/default.conf перед live_server."""
+    if shutil.which('nginx') is None:
+        pytest.skip('nginx не установлен')
+    root, _ = collected
+    port = free_port()
+    html = tmp_path / 'html'
+    html.mkdir()
+    (html / 'static').symlink_to(root)
+    server = nginx_conf().replace('listen 80;', f'listen 127.0.0.1:{port};')
+    server = server.replace('root /var/html/;', f'root {html}/;')
+    server = server.replace('http://web:8000', live_server.url)
+    temp = ' '.join(f'{name}_temp_path {tmp_path}/{name};' for name in (
+        'client_body', 'proxy', 'fastcgi', 'uwsgi', 'scgi'))
+    (tmp_path / 'nginx.conf').write_text(
+        f'daemon off; pid {tmp_path}/nginx.pid; '
+        f'error_log {tmp_path}/error.log; events {{}} '
+        f'http {{ access_log off; {temp} {server} }}')
+    process = subprocess.Popen(
+        ['nginx', '-p', str(tmp_path), '-c', str(tmp_path / 'nginx.conf')])
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(50):
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    yield url
+    process.terminate()
+    process.wait()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_nginx_headers(nginx, collected):
+    _, manifest = collected
+    gzipped = {'Accept-Encoding': 'gzip'}
+    response = requests.get(f'{nginx}/static/{manifest["redoc.yaml"]}',
+                            headers=gzipped)
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    response = requests.get(f'{nginx}/static/redoc.yaml', headers=gzipped)
+    assert 'immutable' not in response.headers['Cache-Control']
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(10))
+    response = requests.get(f'{nginx}/api/v1/categories/', headers=gzipped)
+    assert response.json()['count'] == 10
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
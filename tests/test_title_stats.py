@@ -0,0 +1,75 @@
+import pytest
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.models import TitleStats
+from reviews.ratings import rebuild_title_ratings
+
+
+def histogram(**counts):
+    result = {str(score): 0 for score in range(1, 11)}
+    result.update(counts)
+    return result
+
+
+def test_field_per_score():
+    names = {field.name for field in TitleStats._meta.get_fields()}
+    assert {TitleStats.score_field(score) for score in range(
+        MIN_SCORE, MAX_SCORE + 1)} == names - {'title'}
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def url(self, title_id):
+        return f'/api/v1/titles/{title_id}/stats/'
+
+    def test_stats_endpoint(self, client, reviews,
+                            django_assert_num_queries):
+        title_id = reviews[0].title_id
+        with django_assert_num_queries(1):
+            response = client.get(self.url(title_id))
+        assert response.status_code == 200
+        assert response.json() == {'reviews_count': 2, 'average': 8.0,
+                                   'histogram': histogram(**{'7': 1,
+                                                             '9': 1})}
+
+    def test_unknown_title(self, client, titles):
+        assert client.get(self.url(0)).status_code == 404
+
+    def test_counters_follow_review_writes(self, client, reviews, titles):
+        review = reviews[0]
+        review.score = 10
+        review.save()
+        reviews[1].delete()
+        data = client.get(self.url(review.title_id)).json()
+        assert data['histogram'] == histogram(**{'10': 1})
+        assert data['average'] == 10
+        review.title = titles[1]
+        review.save()
+        assert client.get(self.url(titles[0].id)).json()[
+            'reviews_count'] == 0
+        assert client.get(self.url(titles[1].id)).json()[
+            'histogram'] == histogram(**{'10': 1})
+
+    def test_stats_block(self, client, reviews, django_assert_num_queries):
+        # count + произведения со статистикой и категорией + жанры
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/?expand=stats')
+        results = {title['id']: title for title in response.json()['results']}
+        assert results[reviews[0].title_id]['stats']['reviews_count'] == 2
+        response = client.get('/api/v1/titles/?expand=stats&fields=id,stats')
+        assert set(response.json()['results'][0]) == {'id', 'stats'}
+        response = client.get('/api/v1/titles/')
+        assert 'stats' not in response.json()['results'][0]
+
+    def test_rebuild(self, reviews):
+        TitleStats.objects.all().delete()
+        rebuild_title_ratings()
+        stats = TitleStats.objects.get(title_id=reviews[0].title_id)
+        assert stats.histogram[7] == 1 and stats.histogram[9] == 1
+        assert sum(stats.histogram.values()) == 2
+
+    def test_title_delete(self, client, reviews):
+        title_id = reviews[0].title_id
+        reviews[0].title.delete()
+        assert not TitleStats.objects.filter(title_id=title_id).exists()